@@ -0,0 +1,39 @@
+# Batch compile scaling: the same set of generated .hz files compiled with
+# 1, 2, 4 and 8 worker processes (1 runs in-process).
+#
+#   python benchmarks/bench_batch.py [files] [functions-per-file]
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from bench_inline_transform import FUNCTION
+from hintzCompiler.batch import compile_batch
+
+
+def run(files, functions):
+    with tempfile.TemporaryDirectory() as tmp:
+        sources = []
+        for i in range(files):
+            path = os.path.join(tmp, "src", f"unit{i}.hz")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as f:
+                f.write("".join(FUNCTION.format(n=n) for n in range(functions)))
+            sources.append(path)
+
+        print(f"{files} files x {functions} functions, {os.cpu_count()} CPUs")
+        base = None
+        for jobs in (1, 2, 4, 8):
+            start = time.perf_counter()
+            results = compile_batch(sources, os.path.join(tmp, "out"), jobs=jobs)
+            elapsed = time.perf_counter() - start
+            assert all(r.ok for r in results)
+            base = base or elapsed
+            print(f"{jobs} workers: {elapsed:6.2f} s   speedup {base / elapsed:4.2f}x")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    run(*(args + [200, 50][len(args):]))
@@ -0,0 +1,54 @@
+# BuildCache over a generated tree of translation units sharing a few
+# headers: cold build, no-op rebuild, and rebuild after touching one header
+# that a tenth of the units include.
+#
+#   python benchmarks/bench_build_cache.py [units]
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from bench_inline_transform import FUNCTION
+from hintzCompiler.build_cache import BuildCache
+
+HEADERS = 10
+
+
+def run(units):
+    with tempfile.TemporaryDirectory() as tmp:
+        inc = os.path.join(tmp, "inc")
+        src = os.path.join(tmp, "src")
+        os.makedirs(inc)
+        os.makedirs(src)
+        for h in range(HEADERS):
+            with open(os.path.join(inc, f"h{h}.hz"), "w") as f:
+                f.write(f"int header{h};\n")
+        sources = []
+        for u in range(units):
+            path = os.path.join(src, f"unit{u}.hz")
+            with open(path, "w") as f:
+                f.write(f'#include "h{u % HEADERS}.hz"\n')
+                f.write("".join(FUNCTION.format(n=u * 5 + n) for n in range(5)))
+            sources.append(path)
+
+        def build(label):
+            cache = BuildCache(os.path.join(tmp, "cache"), include_paths=[inc])
+            start = time.perf_counter()
+            results = cache.build(sources)
+            elapsed = time.perf_counter() - start
+            compiled = sum(r.status == "compiled" for r in results.values())
+            print(f"{label:>14}: {elapsed * 1000:9.1f} ms   compiled {compiled}")
+
+        print(f"{units} units, {HEADERS} shared headers")
+        build("cold")
+        build("no-op")
+        with open(os.path.join(inc, "h0.hz"), "a") as f:
+            f.write("int extra;\n")
+        build("header edit")
+        build("no-op")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
@@ -0,0 +1,75 @@
+# ControlFlowGraph construction time for a function with one `cases`-way
+# switch and for one with `gotos` gotos (each jumping to one of a handful
+# of labels), with CFGNode's id-set edge dedup against the list
+# membership test it replaced (kept here for comparison), which compared
+# nodes with the dataclass __eq__.
+#
+#   python benchmarks/bench_cfg.py [cases] [gotos]
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from hintzCompiler.compiler import compile_source
+from hintzCompiler.src import cfg
+from hintzCompiler.src.ir_nodes import IRNode
+
+
+@dataclass
+class ListCFGNode:
+    id: int
+    stmt: IRNode
+    successors: List["ListCFGNode"] = field(default_factory=list)
+    compositeNodeExit: Optional["ListCFGNode"] = None
+    compositeNodeEntry: Optional["ListCFGNode"] = None
+
+    def add_successor(self, succ):
+        if succ not in self.successors:
+            self.successors.append(succ)
+
+    __str__ = cfg.CFGNode.__str__
+
+
+def switch_function(cases):
+    arms = "".join(f"case {n}: a = a + {n}; break;\n" for n in range(cases))
+    return f"int f(int a) {{\nswitch (a) {{\n{arms}default: a = 0; break;\n}}\nreturn a;\n}}\n"
+
+
+def goto_function(gotos, labels=8):
+    body = []
+    for n in range(gotos):
+        body.append(f"if (a > {n}) {{ goto l{n % labels}; }}\n")
+        if n % (gotos // labels or 1) == 0 and n // (gotos // labels or 1) < labels:
+            body.append(f"l{n // (gotos // labels or 1)}:\n")
+    return "int f(int a) {\n" + "".join(body) + "return a;\n}\n"
+
+
+def build(function, node_cls):
+    saved = cfg.CFGNode
+    cfg.CFGNode = node_cls
+    try:
+        start = time.perf_counter()
+        graph = cfg.ControlFlowGraph(function)
+        return graph, time.perf_counter() - start
+    finally:
+        cfg.CFGNode = saved
+
+
+def run(cases, gotos):
+    for label, code in ((f"{cases}-case switch", switch_function(cases)),
+                        (f"{gotos} gotos", goto_function(gotos))):
+        function = compile_source(code).declarations[0]
+        old, old_time = build(function, ListCFGNode)
+        new, new_time = build(function, cfg.CFGNode)
+        assert str(old) == str(new)
+        edges = sum(len(node.successors) for node in new.nodes)
+        print(f"{label}: {len(new.nodes)} nodes, {edges} edges")
+        print(f"  list membership {old_time:7.3f} s   id sets {new_time:7.3f} s   ({old_time / new_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 5000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 10000)
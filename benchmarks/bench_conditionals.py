@@ -0,0 +1,53 @@
+# Compile time (preprocess, parse, IR) of one source whose functions are
+# each wrapped in an #if, as the share of code left enabled goes from all
+# of it to none. Excluded regions are skipped by the preprocessor, so time
+# should fall roughly in proportion.
+#
+#   python benchmarks/bench_conditionals.py [functions]
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from bench_inline_transform import FUNCTION
+from hintzCompiler.compiler import compile_file
+from hintzCompiler.preprocessor import include_cache
+
+VARIANTS = 4
+
+
+def write_source(path, functions):
+    with open(path, "w") as f:
+        for n in range(functions):
+            # Enabled when n % VARIANTS < KEEP.
+            f.write(f"#if {n % VARIANTS} < KEEP\n{FUNCTION.format(n=n)}#endif\n")
+
+
+def best_of(fn, runs=3):
+    best = None
+    for _ in range(runs):
+        include_cache.clear()
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run(functions):
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "variants.hz")
+        write_source(source, functions)
+        compile_file(source, macros={"KEEP": "0"})  # build the parser outside the timings
+        print(f"{functions} functions, each behind an #if")
+        full = None
+        for keep in range(VARIANTS, -1, -1):
+            elapsed = best_of(lambda: compile_file(source, macros={"KEEP": str(keep)}))
+            full = full or elapsed
+            print(f"{keep * 100 // VARIANTS:>4}% enabled: {elapsed * 1000:8.1f} ms   {elapsed / full:6.1%} of full")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
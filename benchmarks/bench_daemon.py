@@ -0,0 +1,45 @@
+# Per-invocation latency of `hintz file.hz` versus the thin client talking to
+# a warm `hintz --serve` daemon, each run as a fresh process the way editor
+# integrations and hooks call it.
+#
+#   python benchmarks/bench_daemon.py [runs]
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+SAMPLE = os.path.join(ROOT, "samples", "exampleOfIncludes.hz")
+
+
+def median_wall_clock(cmd, runs):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(cmd, cwd=ROOT, stdout=subprocess.DEVNULL, check=True)
+        times.append(time.perf_counter() - start)
+    times.sort()
+    return times[len(times) // 2]
+
+
+def run(runs):
+    with tempfile.TemporaryDirectory() as tmp:
+        sock = os.path.join(tmp, "hintz.sock")
+        daemon = subprocess.Popen([sys.executable, "-m", "hintzCompiler.compiler", "--serve", "--socket", sock],
+                                  cwd=ROOT, stdout=subprocess.PIPE)
+        daemon.stdout.readline()  # "listening" banner
+        try:
+            cli = median_wall_clock([sys.executable, "-m", "hintzCompiler.compiler", SAMPLE], runs)
+            client = median_wall_clock([sys.executable, "-m", "hintzCompiler.client", "--socket", sock, SAMPLE], runs)
+        finally:
+            daemon.terminate()
+            daemon.wait()
+
+    print(f"median of {runs} runs")
+    print(f"{'hintz':>14}: {cli * 1000:7.1f} ms")
+    print(f"{'hintz-client':>14}: {client * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 15)
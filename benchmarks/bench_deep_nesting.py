@@ -0,0 +1,62 @@
+# Time and peak memory to compile deeply nested input, in both front-end
+# modes (inline: callbacks during LALR reductions; tree: parse tree, then
+# IRTransformer.transform as --debug does), and for repr() and == on the
+# result: a long `a + a + ...` chain (a left-deep BinaryOp chain) and
+# if/for statements nested inside each other.
+#
+#   python benchmarks/bench_deep_nesting.py [terms] [levels]
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from bench_inline_transform import inline_mode, tree_mode
+
+
+def long_expression(terms):
+    return "int f(int a) { a = " + " + ".join(["a"] * terms) + "; return a; }\n"
+
+
+def nested(levels, head):
+    return "int f(int a) {\n" + head * levels + "a = 1;\n" + "}\n" * levels + "return a; }\n"
+
+
+def measure(fn):
+    gc.collect()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+
+    gc.collect()
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def run(terms, levels):
+    inputs = (
+        (f"{terms}-term expression", long_expression(terms)),
+        (f"{levels} nested ifs", nested(levels, "if (a) {\n")),
+        (f"{levels} nested fors", nested(levels, "for (a = 0; a < 1; a++) {\n")),
+    )
+    for label, code in inputs:
+        print(label)
+        ir, elapsed, peak = measure(lambda: inline_mode(code))
+        print(f"  {'inline':>7}: {elapsed:6.2f} s   peak {peak / 2**20:7.1f} MiB")
+        other, elapsed, peak = measure(lambda: tree_mode(code))
+        print(f"  {'tree':>7}: {elapsed:6.2f} s   peak {peak / 2**20:7.1f} MiB")
+        text, elapsed, peak = measure(lambda: repr(ir))
+        print(f"  {'repr':>7}: {elapsed:6.2f} s   peak {peak / 2**20:7.1f} MiB   ({len(text) / 2**20:.1f} MiB of text)")
+        equal, elapsed, peak = measure(lambda: ir == other)
+        assert equal
+        print(f"  {'==':>7}: {elapsed:6.2f} s   peak {peak / 2**20:7.1f} MiB")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 5000)
@@ -0,0 +1,96 @@
+# The object tree against FlatIR (src/flat_ir.py) for a generated program:
+# memory of each form (tracemalloc; strings are shared, so not counted),
+# two traversals (node count per kind, and every identifier name used),
+# building the CFG of every function, and the cost of converting.
+#
+#   python benchmarks/bench_flat_ir.py [lines]
+import gc
+import os
+import sys
+import time
+import tracemalloc
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from bench_inline_transform import generate
+from hintzCompiler.compiler import compile_source
+from hintzCompiler.src.cfg import ControlFlowGraph
+from hintzCompiler.src.flat_ir import KINDS, flatten, unflatten
+from hintzCompiler.src.ir_nodes import Function, Identifier, IRNode
+
+
+def best_of(fn, runs=5):
+    best = None
+    for _ in range(runs):
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def allocated(fn):
+    gc.collect()
+    tracemalloc.start()
+    result = fn()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def tree_nodes(ir):
+    stack = [ir]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, list):
+            stack.extend(reversed(value))
+        elif isinstance(value, IRNode):
+            yield value
+            stack.extend(reversed([getattr(value, name) for name in value.__dataclass_fields__]))
+
+
+def tree_kinds(ir):
+    return Counter(type(node) for node in tree_nodes(ir))
+
+
+def flat_kinds(flat):
+    return Counter(KINDS[kind] for kind in flat.kinds)
+
+
+def tree_names(ir):
+    return [node.name for node in tree_nodes(ir) if type(node) is Identifier]
+
+
+def flat_names(flat):
+    ident = KINDS.index(Identifier)
+    kinds, first, values, strings = flat.kinds, flat.first, flat.values, flat.strings
+    return [strings[values[first[i]]] for i in flat.walk() if kinds[i] == ident]
+
+
+def run(lines):
+    ir = compile_source(generate(lines))
+    flat = flatten(ir)
+    assert tree_kinds(ir) == flat_kinds(flat) and tree_names(ir) == flat_names(flat)
+    functions = [(function, flat.node(index)) for function, index in zip(ir.declarations, flat.children(0))
+                 if isinstance(function, Function)]
+
+    tree_size = allocated(lambda: unflatten(flat))
+    flat_size = allocated(lambda: flatten(ir))
+    print(f"{lines} lines, {len(flat)} IR nodes")
+    print(f"  memory: tree {tree_size / 2**20:7.1f} MiB   flat {flat_size / 2**20:7.1f} MiB"
+          f"   ({tree_size / len(flat):.1f} vs {flat_size / len(flat):.1f} bytes/node)")
+    for label, on_tree, on_flat in (
+            ("kinds", lambda: tree_kinds(ir), lambda: flat_kinds(flat)),
+            ("names", lambda: tree_names(ir), lambda: flat_names(flat)),
+            ("cfg", lambda: [ControlFlowGraph(f) for f, _ in functions],
+             lambda: [ControlFlowGraph(f) for _, f in functions])):
+        tree_time, flat_time = best_of(on_tree), best_of(on_flat)
+        print(f"{label:>8}: tree {tree_time * 1000:7.1f} ms   flat {flat_time * 1000:7.1f} ms   {tree_time / flat_time:5.1f}x")
+    print(f" flatten: {best_of(lambda: flatten(ir)) * 1000:7.1f} ms   unflatten: {best_of(lambda: unflatten(flat)) * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
@@ -0,0 +1,65 @@
+# Getting a Program back from a .hzir file (src/hzir.py) against
+# recompiling it from source, plus writing it and, for reference, the
+# pickle the build cache uses. Throughput is in MB/s of the file each one
+# reads (or writes) and in k IR nodes/s.
+#
+#   python benchmarks/bench_hzir.py [lines]
+import gc
+import io
+import os
+import pickle
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from bench_flat_ir import tree_nodes
+from bench_inline_transform import generate
+from hintzCompiler.compiler import compile_file
+from hintzCompiler.preprocessor import include_cache
+from hintzCompiler.src.hzir import read_program, write_program
+
+
+def best_of(fn, runs=5):
+    best = None
+    for _ in range(runs):
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run(lines):
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "main.hz")
+        with open(source, "w") as f:
+            f.write(generate(lines))
+        ir = compile_file(source)
+        nodes = sum(1 for _ in tree_nodes(ir))
+        out = io.BytesIO()
+        write_program(ir, out)
+        data = out.getvalue()
+        pickled = pickle.dumps(ir, pickle.HIGHEST_PROTOCOL)
+        assert read_program(io.BytesIO(data)) == ir
+
+        print(f"{lines} lines, {nodes} IR nodes; source {os.path.getsize(source) / 2**20:.1f} MiB, "
+              f".hzir {len(data) / 2**20:.2f} MiB, pickle {len(pickled) / 2**20:.2f} MiB")
+        timings = (
+            ("recompile", os.path.getsize(source), lambda: (include_cache.clear(), compile_file(source))),
+            ("hzir load", len(data), lambda: read_program(io.BytesIO(data))),
+            ("pickle load", len(pickled), lambda: pickle.loads(pickled)),
+            ("hzir write", len(data), lambda: write_program(ir, io.BytesIO())),
+        )
+        recompile = None
+        for label, size, fn in timings:
+            elapsed = best_of(fn)
+            recompile = recompile or elapsed
+            print(f"{label:>12}: {elapsed * 1000:8.1f} ms   {size / elapsed / 2**20:6.1f} MB/s   "
+                  f"{nodes / elapsed / 1000:7.1f} k nodes/s   {recompile / elapsed:5.1f}x recompile")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
@@ -0,0 +1,57 @@
+# Preprocessing many translation units that include overlapping sets of
+# guarded headers in one process: time and filesystem calls (stat / open)
+# per unit with a cold include cache and with a warm one.
+#
+#   python benchmarks/bench_includes.py [units] [headers]
+import os
+import sys
+import tempfile
+import time
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from hintzCompiler.preprocessor import IncludeCache, Preprocessor
+
+PER_UNIT = 20
+
+
+def write_tree(root, units, headers):
+    inc = os.path.join(root, "inc")
+    os.makedirs(inc)
+    for h in range(headers):
+        with open(os.path.join(inc, f"h{h}.hz"), "w") as f:
+            f.write(f"#ifndef H{h}_H\n#define H{h}_H\n")
+            if h:
+                f.write(f'#include "h{h - 1}.hz"\n')
+            f.write("".join(f"int h{h}_{i}[SIZE];\n" for i in range(50)))
+            f.write("#endif\n")
+    sources = []
+    for u in range(units):
+        path = os.path.join(root, f"unit{u}.hz")
+        with open(path, "w") as f:
+            f.write("#define SIZE 4\n")
+            f.write("".join(f'#include "h{(u + k) % headers}.hz"\n' for k in range(PER_UNIT)))
+            f.write(f"int main{u}() {{ return 0; }}\n")
+        sources.append(path)
+    return inc, sources
+
+
+def run(units, headers):
+    with tempfile.TemporaryDirectory() as tmp:
+        inc, sources = write_tree(tmp, units, headers)
+        cache = IncludeCache()
+        print(f"{units} units x {PER_UNIT} includes of {headers} guarded headers")
+        for label in ("cold", "warm"):
+            with patch("os.stat", wraps=os.stat) as stat, patch("builtins.open", wraps=open) as opened:
+                start = time.perf_counter()
+                for source in sources:
+                    Preprocessor(include_paths=[inc], include_cache=cache).preprocess(source)
+                elapsed = time.perf_counter() - start
+            print(f"{label:>5}: {elapsed * 1000:8.1f} ms   per unit: {stat.call_count / units:6.1f} stat, "
+                  f"{opened.call_count / units:5.1f} open")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    run(*(args + [200, 50][len(args):]))
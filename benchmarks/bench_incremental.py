@@ -0,0 +1,53 @@
+# Recompiling a 1000-function file after editing one function: full
+# compile_source versus IncrementalCompiler, for edited functions of
+# increasing size. Incremental time should track the edited function's size
+# rather than the file's.
+#
+#   python benchmarks/bench_incremental.py [functions]
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from hintzCompiler.compiler import compile_source
+from hintzCompiler.incremental import IncrementalCompiler
+
+
+def function(n, statements, value=0):
+    body = "".join(f"    x{n} = x{n} + {value + i};\n" for i in range(statements))
+    return f"int f{n}(int a{n}) {{\n    int x{n};\n{body}    return x{n};\n}}\n"
+
+
+def best(fn, repeats=5):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def run(count):
+    compiler = IncrementalCompiler()
+    print(f"{count} functions, edited function in the middle")
+    for size in (1, 10, 100, 1000):
+        functions = [function(n, 5) for n in range(count)]
+        functions[count // 2] = function(count // 2, size)
+        code = "".join(functions)
+        compiler.compile(code)
+
+        edits = iter(range(1, 10**6))
+
+        def incremental():
+            functions[count // 2] = function(count // 2, size, next(edits))
+            compiler.compile("".join(functions))
+
+        full = best(lambda: compile_source(code))
+        inc = best(incremental)
+        print(f"edited fn {size:5d} stmts: full {full * 1000:8.1f} ms   "
+              f"incremental {inc * 1000:7.1f} ms   reparsed {compiler.reparsed}")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
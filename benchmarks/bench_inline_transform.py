@@ -0,0 +1,75 @@
+# Time and peak memory of the two front-end modes on a generated input:
+# tree (parse tree first, then IRTransformer.transform, as used by --debug)
+# and inline (IRTransformer callbacks run during LALR reductions).
+#
+#   python benchmarks/bench_inline_transform.py [lines]
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from hintzCompiler.parser_cache import get_parser, get_ir_parser
+from hintzCompiler.src.transformer import IRTransformer
+
+FUNCTION = """int f{n}(int a{n}, int b{n}) {{
+    int x{n};
+    int m{n}[8];
+    x{n} = a{n} + b{n} * 2;
+    for (i = 0; i < 8; i++) {{
+        m{n}[i] = x{n} - i;
+    }}
+    if (x{n} > 10) {{
+        x{n} = x{n} / 2;
+    }}
+    return x{n};
+}}
+"""
+LINES_PER_FUNCTION = FUNCTION.count("\n")
+
+
+def generate(lines):
+    return "".join(FUNCTION.format(n=n) for n in range(lines // LINES_PER_FUNCTION))
+
+
+def tree_mode(code):
+    tree = get_parser().parse(code)
+    return IRTransformer().transform(tree)
+
+
+def inline_mode(code):
+    parser, transformer = get_ir_parser()
+    transformer.reset()
+    return parser.parse(code)
+
+
+def measure(fn, code):
+    gc.collect()
+    start = time.perf_counter()
+    fn(code)
+    elapsed = time.perf_counter() - start
+
+    gc.collect()
+    tracemalloc.start()
+    fn(code)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def run(lines):
+    code = generate(lines)
+    # Build both parsers up front so table construction is not timed.
+    get_parser()
+    get_ir_parser()
+
+    print(f"{code.count(chr(10))} lines, {len(code) / 1e6:.1f} MB of source")
+    for name, fn in (("tree", tree_mode), ("inline", inline_mode)):
+        elapsed, peak = measure(fn, code)
+        print(f"{name:>8}: {elapsed:7.2f} s   peak {peak / 2**20:8.1f} MiB")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
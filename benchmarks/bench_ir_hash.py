@@ -0,0 +1,113 @@
+# Structural hashing of the IR (IRNode.__hash__/__eq__) and hash-consing
+# in IRTransformer, on a generated program:
+#   - retained memory and node objects with and without hash_cons;
+#   - hashing a whole program, cold and once cached;
+#   - comparing two programs that differ only in their last statement,
+#     with a field-by-field deep comparison (kept here for reference)
+#     against == before and after both have been hashed;
+#   - finding the distinct expressions with a set.
+#
+#   python benchmarks/bench_ir_hash.py [lines]
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from bench_inline_transform import generate
+from hintzCompiler.compiler import compile_file
+from hintzCompiler.parser_cache import get_ir_parser
+from hintzCompiler.preprocessor import include_cache
+from hintzCompiler.src.ir_nodes import BinaryOp, Identifier, IRNode, Literal, UnaryOp
+from hintzCompiler.src.visitor import IRVisitor
+
+EXPRESSIONS = (BinaryOp, UnaryOp, Identifier, Literal)
+
+
+def deep_eq(a, b):
+    # What the generated dataclass __eq__ amounted to.
+    if isinstance(a, IRNode):
+        return a.__class__ is b.__class__ and all(deep_eq(getattr(a, f), getattr(b, f)) for f in a._fields)
+    if isinstance(a, list):
+        return type(b) is list and len(a) == len(b) and all(map(deep_eq, a, b))
+    return a == b
+
+
+class Collect(IRVisitor):
+
+    def __init__(self):
+        self.nodes = []
+
+    def visit_IRNode(self, node):
+        self.nodes.append(node)
+
+
+def nodes_of(ir):
+    collect = Collect()
+    collect.visit(ir)
+    return collect.nodes
+
+
+def retained(path, hash_cons):
+    gc.collect()
+    tracemalloc.start()
+    ir = compile_file(path, hash_cons=hash_cons)
+    include_cache.clear()
+    get_ir_parser()[1].reset()  # drop the symbol table and the hash-cons table
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return ir, size
+
+
+def timed(fn):
+    gc.collect()
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def run(lines):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "main.hz")
+        code = generate(lines)
+        with open(path, "w") as f:
+            f.write(code)
+        changed = os.path.join(tmp, "changed.hz")
+        with open(changed, "w") as f:
+            f.write(code[:code.rindex("return")] + "return 0;\n}\n")
+        compile_file(path)  # build the parser and lexer outside the trace
+
+        print(f"{lines} lines")
+        for hash_cons in (False, True):
+            ir, size = retained(path, hash_cons)
+            nodes = nodes_of(ir)
+            objects = len({id(n) for n in nodes})
+            print(f"hash_cons={hash_cons!s:5}: retained {size / 2**20:6.1f} MiB   "
+                  f"{len(nodes)} nodes in the tree, {objects} node objects")
+
+        ir, other = compile_file(path), compile_file(changed)
+        cold, _ = timed(lambda: hash(ir))
+        warm, _ = timed(lambda: hash(ir))
+        print(f"hash program: cold {cold * 1000:8.1f} ms   cached {warm * 1e6:6.1f} us")
+
+        ir, other = compile_file(path), compile_file(changed)
+        old, result = timed(lambda: deep_eq(ir, other))
+        assert not result
+        cold, result = timed(lambda: ir == other)
+        assert not result
+        hash(ir), hash(other)
+        warm, _ = timed(lambda: ir == other)
+        print(f"unequal programs: deep compare {old * 1000:8.1f} ms   == {cold * 1000:8.1f} ms   "
+              f"== once hashed {warm * 1e6:6.1f} us")
+
+        expressions = [n for n in nodes_of(ir) if type(n) in EXPRESSIONS]
+        elapsed, distinct = timed(lambda: set(expressions))
+        print(f"distinct expressions: {len(distinct)} of {len(expressions)} in {elapsed * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
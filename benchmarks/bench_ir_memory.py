@@ -0,0 +1,64 @@
+# Bytes per IR node for a generated program, measured with tracemalloc:
+# "dict" rebuilds the tree from plain @dataclass copies of the node classes
+# (one __dict__ per node, the layout before ir_node), "slots" from the
+# node classes themselves. Both copies share the strings and tokens of the
+# compiled IR, so only the nodes and their lists are counted.
+#
+#   python benchmarks/bench_ir_memory.py [lines]
+import gc
+import os
+import sys
+import tracemalloc
+from dataclasses import dataclass, fields
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from bench_inline_transform import generate
+from hintzCompiler.compiler import compile_source
+from hintzCompiler.src.ir_nodes import IRNode
+
+
+def plain(cls):
+    return dataclass(type(cls.__name__, (), {"__annotations__": dict(cls.__annotations__)}))
+
+
+def rebuild(node, classes):
+    if isinstance(node, list):
+        return [rebuild(v, classes) for v in node]
+    if isinstance(node, IRNode):
+        return classes[type(node)](*[rebuild(getattr(node, f.name), classes) for f in fields(node)])
+    return node
+
+
+def count(node):
+    if isinstance(node, list):
+        return sum(count(v) for v in node)
+    if isinstance(node, IRNode):
+        return 1 + sum(count(getattr(node, f.name)) for f in fields(node))
+    return 0
+
+
+def measure(ir, classes):
+    gc.collect()
+    tracemalloc.start()
+    copy = rebuild(ir, classes)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del copy
+    return size
+
+
+def run(lines):
+    ir = compile_source(generate(lines))
+    nodes = count(ir)
+    print(f"{lines} lines, {nodes} IR nodes")
+    node_classes = IRNode.__subclasses__()
+    before = measure(ir, {cls: plain(cls) for cls in node_classes})
+    after = measure(ir, {cls: cls for cls in node_classes})
+    for label, size in (("dict", before), ("slots", after)):
+        print(f"{label:>6}: {size / 2**20:8.1f} MiB   {size / nodes:6.1f} bytes/node")
+    print(f"{1 - after / before:.0%} smaller")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
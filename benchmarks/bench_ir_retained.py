@@ -0,0 +1,67 @@
+# Memory still held by a compiled program once compile_file has returned
+# and the caches it fills are cleared: just the IR and whatever it keeps
+# alive. Also counts the lark Tokens reachable from the IR and how many
+# separate string objects it holds per distinct name or operator.
+#
+#   python benchmarks/bench_ir_retained.py [lines]
+import gc
+import os
+import sys
+import tempfile
+import tracemalloc
+from dataclasses import fields
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from bench_inline_transform import generate
+from hintzCompiler.compiler import compile_file
+from hintzCompiler.lark_runtime import Token
+from hintzCompiler.parser_cache import get_ir_parser
+from hintzCompiler.preprocessor import include_cache
+from hintzCompiler.src.ir_nodes import IRNode
+
+
+def walk(ir):
+    stack = [ir]
+    while stack:
+        value = stack.pop()
+        yield value
+        if isinstance(value, list):
+            stack.extend(value)
+        elif isinstance(value, IRNode):
+            stack.extend(getattr(value, f.name) for f in fields(value))
+
+
+def retained(path):
+    gc.collect()
+    tracemalloc.start()
+    ir = compile_file(path)
+    include_cache.clear()
+    get_ir_parser()[1].reset()  # drop the transformer's symbol table
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return ir, size
+
+
+def run(lines):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "main.hz")
+        with open(path, "w") as f:
+            f.write(generate(lines))
+        compile_file(path)  # build the parser and lexer outside the trace
+        ir, size = retained(path)
+
+    values = list(walk(ir))
+    nodes = sum(isinstance(v, IRNode) for v in values)
+    tokens = sum(isinstance(v, Token) for v in values)
+    strings = [v for v in values if isinstance(v, str)]
+    objects = len({id(s) for s in strings})
+    print(f"{lines} lines, {nodes} IR nodes")
+    print(f"retained: {size / 2**20:8.1f} MiB   {size / nodes:6.1f} bytes/node")
+    print(f"  tokens: {tokens}")
+    print(f" strings: {len(strings)} references, {objects} objects, {len(set(strings))} distinct")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
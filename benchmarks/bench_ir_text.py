@@ -0,0 +1,72 @@
+# MB/s of the text IR dump for a generated program: the old recursive
+# dump (one print per line, kept here for comparison) against IRNode.write
+# to a file and IRNode.to_string.
+#
+#   python benchmarks/bench_ir_text.py [lines]
+import contextlib
+import gc
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from bench_inline_transform import generate
+from hintzCompiler.compiler import compile_source
+from hintzCompiler.src.ir_nodes import IRNode
+
+
+def print_dump(node, indent=0):
+    pad = '  ' * indent
+    print(f"{pad}{node.__class__.__name__}:")
+    for field in node.__dataclass_fields__:
+        value = getattr(node, field)
+        if isinstance(value, list):
+            print(f"{pad}  {field}: [")
+            for v in value:
+                if isinstance(v, IRNode):
+                    print_dump(v, indent + 2)
+                else:
+                    print(f"{pad}    {v}")
+            print(f"{pad}  ]")
+        elif isinstance(value, IRNode):
+            print(f"{pad}  {field}:")
+            print_dump(value, indent + 2)
+        else:
+            print(f"{pad}  {field}: {value}")
+
+
+def best_of(fn, runs=3):
+    best = None
+    for _ in range(runs):
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run(lines):
+    ir = compile_source(generate(lines))
+    size = len(ir.to_string().encode())
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "out.ir")
+
+        def old():
+            with open(path, "w") as f, contextlib.redirect_stdout(f):
+                print_dump(ir)
+
+        def write():
+            with open(path, "w") as f:
+                ir.write(f)
+
+        print(f"{lines} lines, {size / 2**20:.1f} MiB of IR text")
+        for label, fn in (("print dump", old), ("write", write), ("to_string", ir.to_string)):
+            elapsed = best_of(fn)
+            print(f"{label:>11}: {elapsed * 1000:8.1f} ms   {size / elapsed / 2**20:6.1f} MB/s")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
@@ -0,0 +1,63 @@
+# Whole-program compile_source versus streaming iter_compile on a generated
+# input, building a CFG for every function in both cases: total time, time
+# until the first CFG exists, and peak traced memory.
+#
+#   python benchmarks/bench_iter_compile.py [lines]
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from bench_inline_transform import generate
+from hintzCompiler.compiler import compile_source, iter_compile
+from hintzCompiler.src.cfg import ControlFlowGraph
+from hintzCompiler.src.ir_nodes import Function
+
+
+def whole(code):
+    for decl in compile_source(code).declarations:
+        if isinstance(decl, Function):
+            yield ControlFlowGraph(decl)
+
+
+def streaming(code):
+    for decl in iter_compile(code):
+        if isinstance(decl, Function):
+            yield ControlFlowGraph(decl)
+
+
+def measure(fn, code):
+    gc.collect()
+    start = time.perf_counter()
+    first = None
+    for _ in fn(code):
+        if first is None:
+            first = time.perf_counter() - start
+    total = time.perf_counter() - start
+
+    gc.collect()
+    tracemalloc.start()
+    for _ in fn(code):
+        pass
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return first, total, peak
+
+
+def run(lines):
+    code = generate(lines)
+    list(iter_compile("int warm;"))
+    compile_source("int warm;")
+
+    print(f"{code.count(chr(10))} lines")
+    for name, fn in (("whole", whole), ("streaming", streaming)):
+        first, total, peak = measure(fn, code)
+        print(f"{name:>10}: first CFG {first * 1000:8.1f} ms   total {total:6.2f} s   "
+              f"peak {peak / 2**20:7.1f} MiB")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
@@ -0,0 +1,39 @@
+# Preprocessing time for generated sources as the number of lines and the
+# number of #defines grow. Time should scale with lines, not lines x macros.
+#
+#   python benchmarks/bench_macros.py
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from hintzCompiler.preprocessor import Preprocessor
+
+LINE = '    value{i} = alpha * LIMIT_{m} + beta - gamma("label {i}", delta);\n'
+
+
+def generate(path, lines, macros):
+    with open(path, "w") as f:
+        for m in range(macros):
+            f.write(f"#define LIMIT_{m} {m}\n")
+        for i in range(lines):
+            f.write(LINE.format(i=i, m=i % macros))
+
+
+def run():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "main.hz")
+        print(f"{'lines':>8} {'macros':>7} {'ms':>9} {'us/line':>8}")
+        for lines in (10000, 40000):
+            for macros in (10, 100, 500):
+                generate(path, lines, macros)
+                start = time.perf_counter()
+                Preprocessor().preprocess(path)
+                elapsed = time.perf_counter() - start
+                print(f"{lines:8d} {macros:7d} {elapsed * 1000:9.1f} {elapsed / lines * 1e6:8.2f}")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,46 @@
+# Compile latency for samples/*.hz with no cached tables (cold), with tables
+# loaded from the on-disk cache (warm-disk) and with the in-process parser
+# (warm-memory).
+#
+#   python benchmarks/bench_parser_cache.py [repeats]
+import glob
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from hintzCompiler import parser_cache
+from hintzCompiler.compiler import compile_file
+
+SAMPLES = sorted(glob.glob(os.path.join(os.path.dirname(__file__), "..", "samples", "*.hz")))
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def run(repeats):
+    results = {"cold": [], "warm-disk": [], "warm-memory": []}
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["HINTZ_CACHE_DIR"] = tmp
+        for path in SAMPLES:
+            for _ in range(repeats):
+                parser_cache.clear_parser_cache(disk=True)
+                results["cold"].append(timed(lambda: compile_file(path)))
+                parser_cache.clear_parser_cache()
+                results["warm-disk"].append(timed(lambda: compile_file(path)))
+                results["warm-memory"].append(timed(lambda: compile_file(path)))
+
+    print(f"{len(SAMPLES)} samples x {repeats} repeats")
+    for mode, times in results.items():
+        times.sort()
+        print(f"{mode:>12}: median {times[len(times) // 2] * 1000:8.2f} ms   "
+              f"min {times[0] * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -0,0 +1,66 @@
+# Preprocessing a deeply nested include chain: wall time and peak traced
+# memory (tracemalloc, measured in a separate pass) for preprocess() and for
+# consuming iter_lines() without joining, with a cold include cache and with
+# a warm one.
+#
+#   python benchmarks/bench_preprocess_stream.py [depth] [lines_per_header]
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from hintzCompiler.preprocessor import IncludeCache, Preprocessor
+
+
+def write_chain(root, depth, lines):
+    # h0 includes h1 includes ... h<depth-1>; each header is guarded.
+    for h in range(depth):
+        with open(os.path.join(root, f"h{h}.hz"), "w") as f:
+            f.write(f"#ifndef H{h}_H\n#define H{h}_H\n")
+            if h + 1 < depth:
+                f.write(f'#include "h{h + 1}.hz"\n')
+            f.write("".join(f"int h{h}_{i}[SIZE];\n" for i in range(lines)))
+            f.write("#endif\n")
+    source = os.path.join(root, "main.hz")
+    with open(source, "w") as f:
+        f.write('#define SIZE 4\n#include "h0.hz"\nint main() { return 0; }\n')
+    return source
+
+
+def timed(fn):
+    start = time.perf_counter()
+    size = fn()
+    return time.perf_counter() - start, size
+
+
+def traced(fn):
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def run(depth, lines):
+    with tempfile.TemporaryDirectory() as tmp:
+        source = write_chain(tmp, depth, lines)
+        modes = {
+            "preprocess": lambda p: len(p.preprocess(source)),
+            "iter_lines": lambda p: sum(len(line) + 1 for line in p.iter_lines(source)),
+        }
+        print(f"include chain {depth} deep, {lines} lines per header")
+        for label, fn in modes.items():
+            caches = IncludeCache(), IncludeCache()
+            for state in ("cold", "warm"):
+                elapsed, size = timed(lambda: fn(Preprocessor(include_paths=[tmp], include_cache=caches[0])))
+                peak = traced(lambda: fn(Preprocessor(include_paths=[tmp], include_cache=caches[1])))
+                print(f"{label:>10} {state}: {elapsed * 1000:8.1f} ms   peak {peak / 2**20:7.2f} MiB"
+                      f"   output {size / 2**20:6.2f} MiB")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    run(*(args + [200, 500][len(args):]))
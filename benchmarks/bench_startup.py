@@ -0,0 +1,55 @@
+# Wall-clock time of `hintz <file>` in a fresh interpreter, with the
+# generated standalone parser (python -m hintzCompiler.gen_parser) and with
+# runtime grammar construction from the warm on-disk table cache. For a
+# per-module breakdown run:
+#
+#   python -X importtime -m hintzCompiler.compiler samples/test_sample.hz
+#
+#   python benchmarks/bench_startup.py [runs]
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from hintzCompiler.gen_parser import generate
+from hintzCompiler.lark_runtime import STANDALONE_PATH
+
+SAMPLE = os.path.join(ROOT, "samples", "test_sample.hz")
+
+
+def wall_clock(cmd, runs):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(cmd, cwd=ROOT, stdout=subprocess.DEVNULL, check=True)
+        times.append(time.perf_counter() - start)
+    times.sort()
+    return times[len(times) // 2]
+
+
+def run(runs):
+    had_module = os.path.exists(STANDALONE_PATH)
+    if had_module:
+        os.remove(STANDALONE_PATH)
+    try:
+        hintz = [sys.executable, "-m", "hintzCompiler.compiler", SAMPLE]
+        baseline = wall_clock([sys.executable, "-c", "pass"], runs)
+        wall_clock(hintz, 1)  # warm the disk table cache
+        runtime = wall_clock(hintz, runs)
+        generate()
+        standalone = wall_clock(hintz, runs)
+    finally:
+        if not had_module and os.path.exists(STANDALONE_PATH):
+            os.remove(STANDALONE_PATH)
+
+    print(f"median of {runs} runs")
+    print(f"{'python -c pass':>16}: {baseline * 1000:7.1f} ms")
+    print(f"{'runtime grammar':>16}: {runtime * 1000:7.1f} ms")
+    print(f"{'standalone':>16}: {standalone * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 15)
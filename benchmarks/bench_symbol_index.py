@@ -0,0 +1,77 @@
+# Symbol queries over a generated project of `files` translation units: the
+# cost of building the SymbolIndex, of a no-op and a one-file update, of
+# reopening it from disk, and per-query times for name lookups, prefix
+# queries and "structs with field" queries.
+#
+#   python benchmarks/bench_symbol_index.py [files]
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from hintzCompiler.symbol_index import SymbolIndex
+
+FIELDS = ["x", "y", "z", "w", "len", "cap", "id", "next"]
+
+
+def unit(n, rng):
+    parts = []
+    for s in range(2):
+        fields = rng.sample(FIELDS, 3)
+        parts.append(f"struct S{n}_{s} {{ " + " ".join(f"int {f};" for f in fields) + " };\n")
+    parts.append(f"float table{n}[{rng.randint(1, 64)}];\n")
+    for f in range(8):
+        parts.append(f"int fn{n}_{f}(int a, float b) {{ a = a + {f}; return a; }}\n")
+    return "".join(parts)
+
+
+def per_query(fn, args):
+    start = time.perf_counter()
+    for arg in args:
+        fn(arg)
+    return (time.perf_counter() - start) / len(args)
+
+
+def run(files):
+    rng = random.Random(1)
+    with tempfile.TemporaryDirectory() as tmp:
+        sources = []
+        for n in range(files):
+            path = os.path.join(tmp, f"unit{n}.hz")
+            with open(path, "w") as f:
+                f.write(unit(n, rng))
+            sources.append(path)
+        directory = os.path.join(tmp, "index")
+
+        start = time.perf_counter()
+        index = SymbolIndex(directory, include_paths=[])
+        index.update(sources)
+        print(f"{files} files, {len(index.names_with_prefix(''))} names")
+        print(f"  initial build:   {time.perf_counter() - start:8.3f} s")
+        start = time.perf_counter()
+        index.update(sources)
+        print(f"  no-op update:    {time.perf_counter() - start:8.3f} s")
+        with open(sources[0], "a") as f:
+            f.write("int extra(int a) { return a; }\n")
+        start = time.perf_counter()
+        index.update(sources)
+        print(f"  one file edited: {time.perf_counter() - start:8.3f} s")
+        start = time.perf_counter()
+        index = SymbolIndex(directory, include_paths=[])
+        print(f"  reopen:          {time.perf_counter() - start:8.3f} s")
+
+        names = [f"fn{rng.randrange(files)}_{rng.randrange(8)}" for _ in range(10000)]
+        prefixes = [f"fn{rng.randrange(files)}" for _ in range(10000)]
+        fields = [rng.choice(FIELDS) for _ in range(1000)]
+        assert all(index.lookup(name) for name in names[:100])
+        print(f"  lookup:          {per_query(index.lookup, names) * 1e6:8.2f} us")
+        print(f"  prefix:          {per_query(index.names_with_prefix, prefixes) * 1e6:8.2f} us")
+        print(f"  field:           {per_query(index.structs_with_field, fields) * 1e6:8.2f} us"
+              f"  ({len(index.structs_with_field(fields[0]))} structs per field)")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
@@ -0,0 +1,98 @@
+# Symbol lookups from the innermost of `depth` nested scopes, for globals
+# and for the innermost scope's own locals, with the flattened binding
+# stacks in ScopedSymbolTableManager against the parent-chain walk it
+# replaced (kept here for comparison). Also the cost of a push_scope /
+# define / pop_scope round trip.
+#
+#   python benchmarks/bench_symbol_table.py [symbols ...]
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from hintzCompiler.src.symbol_table import ScopedSymbolTableManager, Symbol
+
+DEPTHS = (1, 10, 100, 500)
+
+
+class ChainTable:
+
+    def __init__(self, parent=None):
+        self.symbols = {}
+        self.parent = parent
+
+    def define(self, symbol):
+        if symbol.name in self.symbols:
+            raise RuntimeError(f"Symbol '{symbol.name}' already declared.")
+        self.symbols[symbol.name] = symbol
+
+    def lookup(self, name):
+        return self.symbols.get(name) or (self.parent.lookup(name) if self.parent else None)
+
+
+class ChainManager:
+
+    def __init__(self):
+        self.global_scope = ChainTable()
+        self.current_scope = self.global_scope
+
+    def push_scope(self):
+        self.current_scope = ChainTable(parent=self.current_scope)
+
+    def pop_scope(self):
+        if self.current_scope.parent is None:
+            raise RuntimeError("Can't pop the global scope.")
+        self.current_scope = self.current_scope.parent
+
+
+def build(manager_cls, symbols, depth):
+    manager = manager_cls()
+    for n in range(symbols):
+        manager.global_scope.define(Symbol(f"g{n}", "int"))
+    for d in range(depth):
+        manager.push_scope()
+        for n in range(4):
+            manager.current_scope.define(Symbol(f"l{d}_{n}", "int"))
+    return manager
+
+
+def per_lookup(manager, names):
+    lookup = manager.current_scope.lookup
+    start = time.perf_counter()
+    for name in names:
+        lookup(name)
+    return (time.perf_counter() - start) / len(names)
+
+
+def round_trip(manager_cls, symbols):
+    manager = manager_cls()
+    batch = [Symbol(f"l{n}", "int") for n in range(symbols)]
+    start = time.perf_counter()
+    for _ in range(10):
+        manager.push_scope()
+        for symbol in batch:
+            manager.current_scope.define(symbol)
+        manager.pop_scope()
+    return (time.perf_counter() - start) / (10 * symbols)
+
+
+def run(symbol_counts):
+    for symbols in symbol_counts:
+        globals_ = [f"g{n}" for n in range(symbols)]
+        print(f"{symbols} globals")
+        for depth in DEPTHS:
+            locals_ = [f"l{depth - 1}_{n}" for n in range(4)] * (symbols // 4 or 1)
+            timings = []
+            for manager_cls in (ChainManager, ScopedSymbolTableManager):
+                manager = build(manager_cls, symbols, depth)
+                timings.append((per_lookup(manager, globals_), per_lookup(manager, locals_)))
+            (chain_g, chain_l), (flat_g, flat_l) = timings
+            print(f"  depth {depth:4}: globals chain {chain_g * 1e9:8.0f} ns  flat {flat_g * 1e9:5.0f} ns"
+                  f"  ({chain_g / flat_g:5.1f}x)   locals chain {chain_l * 1e9:4.0f} ns  flat {flat_l * 1e9:4.0f} ns")
+        chain, flat = round_trip(ChainManager, symbols), round_trip(ScopedSymbolTableManager, symbols)
+        print(f"  define + pop per symbol: chain {chain * 1e9:4.0f} ns  flat {flat * 1e9:4.0f} ns")
+
+
+if __name__ == "__main__":
+    run([int(n) for n in sys.argv[1:]] or [100, 10000])
@@ -0,0 +1,65 @@
+# Tokens per second through the front end, two ways: preprocess() to text
+# and let lark's lexer scan it again (two-pass), or Preprocessor.iter_tokens
+# straight into the parser (fused). Measured for lexing alone and for the
+# whole compile, with a cold and a warm include cache.
+#
+#   python benchmarks/bench_token_handoff.py [lines]
+import gc
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from bench_inline_transform import generate
+from hintzCompiler.compiler import compile_source, compile_tokens
+from hintzCompiler.parser_cache import get_lexer, get_parser
+from hintzCompiler.preprocessor import IncludeCache, Preprocessor
+
+
+def best_of(fn, runs=5):
+    return min(timed(fn) for _ in range(runs))
+
+
+def timed(fn):
+    gc.collect()  # don't charge one mode for the garbage another left behind
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def run(lines):
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "main.hz")
+        with open(os.path.join(tmp, "defs.hz"), "w") as f:
+            f.write("#ifndef DEFS_H\n#define DEFS_H\n#define WIDTH 8\n#endif\n")
+        with open(source, "w") as f:
+            f.write('#include "defs.hz"\n' + generate(lines).replace("[8]", "[WIDTH]"))
+
+        parser, lexer = get_parser(), get_lexer()
+        cache = IncludeCache()
+
+        def preprocessor():
+            return Preprocessor(include_paths=[tmp], include_cache=cache)
+
+        count = sum(1 for _ in preprocessor().iter_tokens(source, lexer))
+        modes = {
+            "lex two-pass": lambda: list(parser.lex(preprocessor().preprocess(source))),
+            "lex fused": lambda: list(preprocessor().iter_tokens(source, lexer)),
+            "compile two-pass": lambda: compile_source(preprocessor().preprocess(source)),
+            "compile fused": lambda: compile_tokens(preprocessor().iter_tokens(source, lexer)),
+        }
+        print(f"{lines} lines, {count} tokens")
+        for label, fn in modes.items():
+            for state in ("cold", "warm"):
+                if state == "cold":
+                    elapsed = best_of(lambda: (cache.clear(), fn()))
+                else:
+                    fn()
+                    elapsed = best_of(fn)
+                print(f"{label:>16} {state}: {elapsed * 1000:8.1f} ms   {count / elapsed / 1000:8.1f} k tokens/s")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
@@ -0,0 +1,114 @@
+# Type-checking throughput on a generated program of `functions` functions
+# over a few structs and matrices, next to the time to parse it; then the
+# cost of answering "offset of field f in struct S" from the checker's
+# precomputed layout against re-deriving it from Symbol.attributes every
+# time (the fields dict, with sizes and alignment worked out on the spot).
+#
+#   python benchmarks/bench_type_checker.py [functions]
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from hintzCompiler.compiler import iter_compile
+from hintzCompiler.src.ir_nodes import Program
+from hintzCompiler.src.symbol_table import ScopedSymbolTableManager
+from hintzCompiler.src.type_checker import SCALAR_SIZES, TypeChecker
+from hintzCompiler.src.visitor import IRVisitor
+
+HEADER = """
+struct Vec { float x; float y; float z; };
+struct Body { int id; struct Vec pos; struct Vec vel; double mass; char tag; };
+struct Body bodies[64];
+float grid[256];
+"""
+
+
+def function(n, rng):
+    # Locals get unique names: the transformer defines them globally.
+    k, t = f"k{n}", f"t{n}"
+    lines = [f"int step{n}(int i, float dt) {{", f"  int {k};", f"  float {t};"]
+    for _ in range(12):
+        field = rng.choice("xyz")
+        lines.append(f"  bodies[i].pos.{field} = bodies[i].pos.{field} + bodies[i].vel.{field} * dt;")
+        lines.append(f"  {t} = grid[{k} % 256] * 2 + bodies[{k}].mass;")
+        lines.append(f"  if ({t} > 1 && {k} != i) {{ {k} = {k} + 1; }}")
+    lines.append(f"  return step{max(n - 1, 0)}({k}, {t});")
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+class Counter(IRVisitor):
+
+    def __init__(self):
+        self.nodes = 0
+
+    def visit_IRNode(self, node):
+        self.nodes += 1
+
+
+def derived_offset(struct_symbols, struct, field):
+    # What a consumer without layouts does: walk the fields dict and work
+    # sizes and alignment out again, recursing into nested structs.
+    def size_align(type_):
+        if type_ in SCALAR_SIZES:
+            return SCALAR_SIZES[type_], SCALAR_SIZES[type_]
+        offset, align = 0, 1
+        for t in struct_symbols[type_[7:]].attributes["fields"].values():
+            size, a = size_align(t)
+            offset = -(-offset // a) * a + size
+            align = max(align, a)
+        return -(-offset // align) * align, align
+
+    offset = 0
+    for name, type_ in struct_symbols[struct].attributes["fields"].items():
+        size, align = size_align(type_)
+        offset = -(-offset // align) * align
+        if name == field:
+            return offset
+        offset += size
+
+
+def run(functions):
+    rng = random.Random(3)
+    code = HEADER + "".join(function(n, rng) for n in range(functions))
+
+    manager = ScopedSymbolTableManager()
+    start = time.perf_counter()
+    program = Program(list(iter_compile(code, symtab_manager=manager)))
+    parse = time.perf_counter() - start
+    counter = Counter()
+    counter.visit(program)
+
+    best = None
+    for _ in range(3):
+        start = time.perf_counter()
+        checker = TypeChecker(manager.global_scope)
+        errors = checker.check(program)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    assert not errors, errors[:5]
+    print(f"{functions} functions, {counter.nodes} nodes, {len(checker.types)} typed expressions")
+    print(f"  parse:      {parse:7.3f} s")
+    print(f"  type check: {best:7.3f} s   ({counter.nodes / best / 1e6:.2f} M nodes/s)")
+
+    structs = {name: symbol for name, symbol in manager.global_scope.symbols.items() if symbol.type == "struct"}
+    queries = [("Body", rng.choice(["id", "pos", "vel", "mass", "tag"])) for _ in range(100000)]
+    start = time.perf_counter()
+    for struct, field in queries:
+        derived_offset(structs, struct, field)
+    derived = (time.perf_counter() - start) / len(queries)
+    layouts = checker.struct_layouts
+    start = time.perf_counter()
+    for struct, field in queries:
+        layouts["struct " + struct].fields[field].offset
+    precomputed = (time.perf_counter() - start) / len(queries)
+    assert all(derived_offset(structs, s, f) == layouts["struct " + s].fields[f].offset for s, f in queries[:100])
+    print(f"  field offset: derived {derived * 1e9:6.0f} ns   layout {precomputed * 1e9:4.0f} ns"
+          f"   ({derived / precomputed:.0f}x)")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -0,0 +1,104 @@
+# IRVisitor / IRRewriter (src/visitor.py) against the naive recursive
+# walk over dataclasses.fields(): counting nodes per class and renaming
+# every identifier, on a generated program and on one deeply nested
+# expression (where the recursive walk runs out of stack).
+#
+#   python benchmarks/bench_visitor.py [lines] [depth]
+import gc
+import os
+import sys
+import time
+from collections import Counter
+from dataclasses import fields, replace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from bench_inline_transform import generate
+from hintzCompiler.compiler import compile_source
+from hintzCompiler.src.ir_nodes import Identifier, IRNode, UnaryOp
+from hintzCompiler.src.visitor import IRRewriter, IRVisitor
+
+
+def best_of(fn, runs=5):
+    best = None
+    for _ in range(runs):
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def recursive_count(value, counts):
+    if isinstance(value, list):
+        for v in value:
+            recursive_count(v, counts)
+    elif isinstance(value, IRNode):
+        counts[type(value)] += 1
+        for f in fields(value):
+            recursive_count(getattr(value, f.name), counts)
+    return counts
+
+
+def recursive_rename(value):
+    if isinstance(value, list):
+        return [recursive_rename(v) for v in value]
+    if isinstance(value, Identifier):
+        return Identifier(value.name + "_")
+    if isinstance(value, IRNode):
+        return replace(value, **{f.name: recursive_rename(getattr(value, f.name)) for f in fields(value)})
+    return value
+
+
+class Count(IRVisitor):
+
+    def __init__(self):
+        self.counts = Counter()
+
+    def visit_IRNode(self, node):
+        self.counts[type(node)] += 1
+
+
+class Rename(IRRewriter):
+
+    def rewrite_Identifier(self, node):
+        return Identifier(node.name + "_")
+
+
+def count(ir):
+    visitor = Count()
+    visitor.visit(ir)
+    return visitor.counts
+
+
+def compare(label, tree, nodes):
+    for task, recursive, framework in (
+            ("count", lambda: recursive_count(tree, Counter()), lambda: count(tree)),
+            ("rename", lambda: recursive_rename(tree), lambda: Rename().rewrite(tree))):
+        try:
+            recursive_time = f"{best_of(recursive) * 1000:8.1f} ms"
+        except RecursionError:
+            recursive_time = "RecursionError"
+        framework_time = best_of(framework)
+        print(f"{label:>10} {task:>6}: recursive {recursive_time:>14}   visitor {framework_time * 1000:8.1f} ms"
+              f"   {nodes / framework_time / 1000:7.0f} k nodes/s")
+
+
+def run(lines, depth):
+    ir = compile_source(generate(lines))
+    nodes = sum(count(ir).values())
+    assert recursive_count(ir, Counter()) == count(ir)
+    assert recursive_rename(ir) == Rename().rewrite(ir)
+    print(f"{lines} lines, {nodes} IR nodes; expression {depth} deep")
+    compare("program", ir, nodes)
+
+    deep = Identifier("x")
+    for _ in range(depth):
+        deep = UnaryOp("-", deep)
+    compare("deep", deep, depth + 1)
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 50000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 100000)
@@ -0,0 +1,107 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from hintzCompiler.compiler import compile_file
+from hintzCompiler.parser_cache import get_ir_parser
+from hintzCompiler.src.cfg import ControlFlowGraph
+from hintzCompiler.src.ir_nodes import Function
+
+
+@dataclass
+class BatchResult:
+    source: str
+    ok: bool
+    seconds: float
+    outputs: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+
+
+def read_manifest(path):
+    # One source per line; blank lines and `#` comments are skipped, and
+    # relative paths are taken relative to the manifest.
+    base = os.path.dirname(os.path.abspath(path))
+    sources = []
+    with open(path) as f:
+        for line in f:
+            line = line.split("#", 1)[0].strip()
+            if line:
+                sources.append(os.path.join(base, line))
+    return sources
+
+
+def output_stem(source, root, out_dir):
+    # Mirror the layout under the sources' common directory so that
+    # a/util.hz and b/util.hz do not overwrite each other.
+    relative = os.path.relpath(os.path.abspath(source), root)
+    return os.path.join(out_dir, os.path.splitext(relative)[0])
+
+
+def ir_text(ir):
+    return ir.to_string()
+
+
+def compile_one(source, stem, cfg=False, macros=None):
+    start = time.perf_counter()
+    outputs = []
+    try:
+        ir = compile_file(source, macros=macros)
+        os.makedirs(os.path.dirname(stem) or ".", exist_ok=True)
+        outputs.append(stem + ".ir")
+        with open(outputs[-1], "w") as f:
+            f.write("=== IR DUMP ===\n")
+            ir.write(f)
+        if cfg:
+            outputs.append(stem + ".cfg")
+            with open(outputs[-1], "w") as f:
+                for decl in ir.declarations:
+                    if isinstance(decl, Function):
+                        f.write(str(ControlFlowGraph(decl)))
+    except Exception as e:
+        return BatchResult(source, False, time.perf_counter() - start, outputs, f"{type(e).__name__}: {e}")
+    return BatchResult(source, True, time.perf_counter() - start, outputs)
+
+
+def _warm_worker():
+    # Build the parser once per worker instead of inside the first job.
+    get_ir_parser()
+
+
+def compile_batch(sources, out_dir, jobs=1, cfg=False, on_result=None, macros=None):
+    if not sources:
+        return []
+    root = os.path.commonpath([os.path.dirname(os.path.abspath(s)) for s in sources])
+    stems = [output_stem(s, root, out_dir) for s in sources]
+
+    results = []
+    if jobs <= 1:
+        for source, stem in zip(sources, stems):
+            results.append(compile_one(source, stem, cfg, macros))
+            if on_result:
+                on_result(results[-1])
+        return results
+
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_warm_worker) as pool:
+        # Small chunks keep workers busy when file sizes are uneven.
+        chunksize = max(1, len(sources) // (jobs * 8))
+        n = len(sources)
+        for result in pool.map(compile_one, sources, stems, [cfg] * n, [macros] * n, chunksize=chunksize):
+            results.append(result)
+            if on_result:
+                on_result(result)
+    return results
+
+
+def report(result):
+    if result.ok:
+        print(f"✅ {result.source} ({result.seconds * 1000:.1f} ms)")
+    else:
+        print(f"❌ {result.source}: {result.error}")
+
+
+def summarize(results, seconds):
+    failed = sum(not r.ok for r in results)
+    print(f"=== {len(results) - failed} compiled, {failed} failed in {seconds:.2f} s ===")
+    return failed
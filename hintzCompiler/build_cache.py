@@ -0,0 +1,165 @@
+import hashlib
+import json
+import os
+import pickle
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from hintzCompiler.compiler import INCLUDE_DIR, compile_source
+from hintzCompiler.lark_runtime import read_grammar, standalone_digest
+from hintzCompiler.parser_cache import cache_dir
+from hintzCompiler.preprocessor import Preprocessor
+
+# Bump when the pickled IR or the index layout changes; grammar edits are covered by the
+# grammar digest in every key.
+CACHE_VERSION = 7
+DEFAULT_MAX_BYTES = 256 * 2**20
+
+
+@dataclass
+class BuildResult:
+    source: str
+    # "fresh": no dependency changed since the last build, nothing was read.
+    # "hit": inputs changed but the preprocessed text was already cached.
+    # "compiled": parsed and stored.
+    # "failed": could not be preprocessed or parsed; see `error`.
+    status: str
+    key: Optional[str]
+    dependencies: List[str] = field(default_factory=list)
+    _cache: Optional["BuildCache"] = field(default=None, repr=False)
+    error: Optional[str] = None
+
+    def load(self):
+        # IR is only unpickled on demand, so a no-op rebuild stays a stat
+        # per dependency.
+        return self._cache.load(self.key)
+
+
+class BuildCache:
+    # On-disk cache of compiled Program IR for a tree of translation units.
+    #
+    # objects/<key>.pickle holds the IR, keyed by a hash of the preprocessed
+    # text, the macros in effect and the grammar. index.json remembers, per
+    # unit, its key, the (mtime_ns, size) of every file it read and the path
+    # every #include resolved to, so an unchanged unit is recognised without
+    # opening any file.
+
+    def __init__(self, directory=None, include_paths=None, macros=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory or os.path.join(cache_dir(), "build")
+        self.objects = os.path.join(self.directory, "objects")
+        self.index_path = os.path.join(self.directory, "index.json")
+        self.include_paths = include_paths if include_paths is not None else [INCLUDE_DIR]
+        self.macros = dict(macros) if macros else {}
+        self.max_bytes = max_bytes
+        self._salt = "\0".join([str(CACHE_VERSION), standalone_digest(read_grammar()),
+                                json.dumps(self.macros, sort_keys=True)])
+        os.makedirs(self.objects, exist_ok=True)
+        self._index = self._read_index()
+
+    def _read_index(self):
+        try:
+            with open(self.index_path) as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        # Units built with other macros or another grammar are all stale.
+        return index.get("units", {}) if index.get("salt") == self._salt else {}
+
+    def _write_index(self):
+        tmp = self.index_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"salt": self._salt, "units": self._index}, f)
+        os.replace(tmp, self.index_path)
+
+    def _object_path(self, key):
+        return os.path.join(self.objects, key + ".pickle")
+
+    def build(self, sources) -> Dict[str, BuildResult]:
+        stats = {}  # shared headers are stat'ed once per build
+
+        def stat(path):
+            if path not in stats:
+                try:
+                    st = os.stat(path)
+                    stats[path] = [st.st_mtime_ns, st.st_size]
+                except OSError:
+                    stats[path] = None
+            return stats[path]
+
+        # Resolves #include names again, once per build, so a header added
+        # earlier on the search path is noticed.
+        resolver = Preprocessor(include_paths=self.include_paths)
+        results = {}
+        stored = False
+        for source in sources:
+            source = os.path.abspath(source)
+            entry = self._index.get(source)
+            if (entry and os.path.exists(self._object_path(entry["key"]))
+                    and all(stat(path) == [mtime, size] for path, mtime, size in entry["deps"])
+                    and resolver.resolves(entry["includes"])):
+                results[source] = BuildResult(source, "fresh", entry["key"], [d[0] for d in entry["deps"]], self)
+                continue
+
+            try:
+                preprocessor = Preprocessor(include_paths=self.include_paths, macros=self.macros)
+                code = preprocessor.preprocess(source)
+                key = hashlib.sha256("\0".join([self._salt, code]).encode("utf8")).hexdigest()
+                path = self._object_path(key)
+                if os.path.exists(path):
+                    status = "hit"
+                    os.utime(path)  # recently used, for eviction
+                else:
+                    status = "compiled"
+                    self._store(path, compile_source(code))
+                    stored = True
+            except Exception as e:
+                # Forgotten, so the next build tries it again.
+                self._index.pop(source, None)
+                results[source] = BuildResult(source, "failed", None, error=f"{type(e).__name__}: {e}")
+                continue
+
+            deps = [os.path.abspath(path) for path in preprocessor.dependencies]
+            self._index[source] = {"key": key, "deps": [[dep] + (stat(dep) or [0, -1]) for dep in deps],
+                                   "includes": preprocessor.includes}
+            results[source] = BuildResult(source, status, key, deps, self)
+
+        if stored:
+            self.evict()
+        if any(r.status != "fresh" for r in results.values()):
+            self._write_index()
+        return results
+
+    def _store(self, path, program):
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(program, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+    def load(self, key):
+        with open(self._object_path(key), "rb") as f:
+            return pickle.load(f)
+
+    def evict(self):
+        # Drop least recently used objects until the store fits max_bytes.
+        entries = []
+        total = 0
+        with os.scandir(self.objects) as it:
+            for entry in it:
+                if entry.name.endswith(".pickle"):
+                    st = entry.stat()
+                    entries.append((st.st_mtime_ns, st.st_size, entry.path))
+                    total += st.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+        return total
+
+    def clear(self):
+        for name in os.listdir(self.objects):
+            os.remove(os.path.join(self.objects, name))
+        self._index = {}
+        if os.path.exists(self.index_path):
+            os.remove(self.index_path)
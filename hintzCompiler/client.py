@@ -0,0 +1,57 @@
+# Thin client for the `hintz --serve` daemon. Only uses the standard library
+# so that it starts in interpreter time, without importing lark or the
+# compiler.
+import argparse
+import json
+import os
+import socket
+import sys
+import tempfile
+
+OPS = ("compile", "ir", "cfg")
+
+
+def default_socket_path():
+    base = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    return os.path.join(base, f"hintz-{os.getuid()}.sock")
+
+
+def request(op, source, socket_path=None, timeout=None, cwd=None):
+    # One newline-terminated JSON object each way per connection. The cwd
+    # goes along so '.' in the include path means what it would for `hintz`.
+    message = {"op": op, "source": os.path.abspath(os.path.join(cwd or "", source)), "cwd": cwd or os.getcwd()}
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(socket_path or default_socket_path())
+        sock.sendall(json.dumps(message).encode("utf8") + b"\n")
+        with sock.makefile("rb") as f:
+            line = f.readline()
+    if not line:
+        raise ConnectionError("hintz daemon closed the connection without replying")
+    return json.loads(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hintz Compiler daemon client")
+    parser.add_argument("sources", nargs="+", help="Path(s) to .hz source files")
+    parser.add_argument("--op", choices=OPS, default="ir", help="What to ask the daemon for")
+    parser.add_argument("--socket", help="Daemon socket (default: %(default)s)", default=default_socket_path())
+    args = parser.parse_args()
+
+    failed = False
+    for source in args.sources:
+        try:
+            reply = request(args.op, source, args.socket)
+        except OSError as e:
+            print(f"❌ Cannot reach hintz daemon at {args.socket}: {e}")
+            sys.exit(2)
+        if reply["ok"]:
+            sys.stdout.write(reply["output"])
+        else:
+            print(f"❌ Compilation failed: {source}: {reply['error']}")
+            failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
 import sys
+import time
 import argparse
-from lark import Lark
+from hintzCompiler.lark_runtime import write_pretty
+from hintzCompiler.parser_cache import get_parser, get_ir_parser, get_lexer, stream_parser
 from hintzCompiler.src.transformer import IRTransformer
 from hintzCompiler.preprocessor import Preprocessor
 from hintzCompiler.src.cfg import ControlFlowGraph
@@ -10,22 +12,26 @@ from typing import cast
 import os
 
 
-def compile_source(code: str, debug=False):
+INCLUDE_DIR = os.path.join(os.path.dirname(__file__), "..", "includes")
 
-    grammar_path = os.path.join(os.path.dirname(__file__), "grammar", "c89.lark")
-    with open(grammar_path) as f:
-        grammar = f.read()
 
-    parser = Lark(grammar, parser="lalr", start="start")
-    
-    tree = parser.parse(code)
+def compile_source(code: str, debug=False, hash_cons=False):
 
     if debug:
-        print("=== PARSE TREE ===")
-        print(tree.pretty())
+        tree = get_parser().parse(code)
 
-    transformer = IRTransformer()
-    ir = transformer.transform(tree)
+        print("=== PARSE TREE ===")
+        write_pretty(tree, sys.stdout)
+        print()
+
+        transformer = IRTransformer(hash_cons=hash_cons)
+        ir = transformer.transform(tree)
+    else:
+        # IRTransformer callbacks run as the LALR parser reduces, so no
+        # parse tree is ever built.
+        parser, transformer = get_ir_parser()
+        transformer.reset(hash_cons=hash_cons)
+        ir = parser.parse(code)
 
     if debug:
         print("=== SYMBOL TABLE ===")
@@ -34,31 +40,92 @@ def compile_source(code: str, debug=False):
     return ir
 
 
-def compile_file(path: str, debug=False):
+def compile_tokens(tokens, hash_cons=False):
+    # Like compile_source, for tokens that are already lexed (see
+    # Preprocessor.iter_tokens); they go straight into the LALR parser.
+    parser, transformer = get_ir_parser()
+    transformer.reset(hash_cons=hash_cons)
+    interactive = parser.parse_interactive()
+    feed = interactive.parser_state.feed_token
+    token = None
+    for token in tokens:
+        feed(token)
+    return interactive.feed_eof(token)
+
+
+def iter_compile(code: str, symtab_manager=None):
+    # Yields each top-level Function/Variable as soon as it is reduced, so
+    # callers can build CFGs or write output while parsing continues. Symbols
+    # are defined in `symtab_manager` (a fresh one if omitted) as they are
+    # parsed; struct definitions only show up there.
+    with stream_parser() as (parser, transformer):
+        transformer.reset(symtab_manager)
+        interactive = parser.parse_interactive(code)
+        for _ in interactive.iter_parse():
+            if transformer.ready:
+                yield from transformer.drain()
+        interactive.feed_eof()
+        yield from transformer.drain()
+
+
+def compile_file(path: str, debug=False, macros=None, hash_cons=False):
     if not path.endswith(".hz"):
         raise ValueError(f"❌ Only .hz files are supported: {path}")
-    fullIncludePath = os.path.join(os.path.dirname(__file__), "..", "includes") 
-    preprocessor = Preprocessor(include_paths=[fullIncludePath])
-    code = preprocessor.preprocess(path)
-    return compile_source(code, debug=debug)
+    preprocessor = Preprocessor(include_paths=[INCLUDE_DIR], macros=macros)
+    if debug:
+        return compile_source(preprocessor.preprocess(path), debug=True, hash_cons=hash_cons)
+    return compile_tokens(preprocessor.iter_tokens(path, get_lexer()), hash_cons=hash_cons)
+
+
+def parse_defines(defines):
+    # -D NAME[=VALUE], as for a C compiler.
+    macros = {}
+    for define in defines:
+        name, eq, value = define.partition("=")
+        macros[name] = value if eq else "1"
+    return macros
 
 
 def main():
     parser = argparse.ArgumentParser(description="Hintz Compiler")
-    parser.add_argument("source", help="Path to .hz source file")
-    parser.add_argument("-s", "--save-ir", help="Path to write IR output")
+    parser.add_argument("sources", nargs="*", help="Path(s) to .hz source files")
+    parser.add_argument("-s", "--save-ir", help="Path to write IR output (binary if it ends in .hzir)")
     parser.add_argument("-n", "--debug", action="store_true", help="Dump parse tree and symbol table")
     parser.add_argument("--cfg", help="Dump control flow graph HTML", action="store_true")
-    
+    parser.add_argument("-D", dest="defines", action="append", default=[], metavar="NAME[=VALUE]",
+                        help="Define a macro for #if/#ifdef (VALUE defaults to 1)")
+    parser.add_argument("-m", "--manifest", help="File listing .hz sources, one per line")
+    parser.add_argument("-o", "--out-dir", help="Batch mode: write <name>.ir (and <name>.cfg with --cfg) here")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1, help="Batch mode worker processes")
+    parser.add_argument("--serve", action="store_true", help="Run the warm compile daemon (see hintz-client)")
+    parser.add_argument("--socket", help="Daemon Unix socket path")
+    parser.add_argument("--workers", type=int, default=4, help="Daemon worker threads")
+    parser.add_argument("--idle-timeout", type=float, help="Daemon exits after this many idle seconds")
+
     args = parser.parse_args()
+    args.macros = parse_defines(args.defines)
+
+    if args.serve:
+        sys.exit(serve_main(args))
+
+    if args.manifest or args.out_dir or len(args.sources) > 1:
+        sys.exit(batch_main(parser, args))
+    if not args.sources:
+        parser.error("a source file or --manifest is required")
 
     try:
-        ir = compile_file(args.source, debug=args.debug)
+        ir = compile_file(args.sources[0], debug=args.debug, macros=args.macros)
+
+        if args.save_ir and args.save_ir.endswith(".hzir"):
+            from hintzCompiler.src.hzir import write_program
 
-        if args.save_ir:
+            with open(args.save_ir, "wb") as f:
+                write_program(ir, f)
+            print(f"✅ IR written to {args.save_ir}")
+        elif args.save_ir:
             with open(args.save_ir, "w") as f:
                 f.write("=== IR DUMP ===\n")
-                f.write(ir.to_string())
+                ir.write(f)
             print(f"✅ IR written to {args.save_ir}")
         else:
             print("=== IR DUMP ===")
@@ -82,5 +149,39 @@ def main():
         print(f"❌ Compilation failed: {e}")
         sys.exit(1)
 
+def batch_main(parser, args):
+    # Imported here: batch pulls in multiprocessing, which single-file runs
+    # don't need.
+    from hintzCompiler import batch
+
+    if not args.out_dir:
+        parser.error("compiling several sources requires --out-dir")
+    if args.save_ir or args.debug:
+        parser.error("-s/--save-ir and --debug only apply to a single source")
+
+    sources = list(args.sources)
+    if args.manifest:
+        sources.extend(batch.read_manifest(args.manifest))
+
+    start = time.perf_counter()
+    results = batch.compile_batch(sources, args.out_dir, jobs=args.jobs, cfg=args.cfg,
+                                  on_result=batch.report, macros=args.macros)
+    failed = batch.summarize(results, time.perf_counter() - start)
+    return 1 if failed else 0
+
+def serve_main(args):
+    from hintzCompiler.client import default_socket_path
+    from hintzCompiler.daemon import CompileServer
+
+    socket_path = args.socket or default_socket_path()
+    server = CompileServer(socket_path, workers=args.workers, idle_timeout=args.idle_timeout,
+                           macros=args.macros)
+    print(f"✅ hintz daemon listening on {socket_path}")
+    try:
+        server.serve()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
 if __name__ == "__main__":
     main()
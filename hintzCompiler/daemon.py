@@ -0,0 +1,152 @@
+import json
+import os
+import socket
+import socketserver
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from hintzCompiler.batch import ir_text
+from hintzCompiler.client import OPS
+from hintzCompiler.compiler import INCLUDE_DIR, compile_source
+from hintzCompiler.parser_cache import get_ir_parser
+from hintzCompiler.preprocessor import Preprocessor
+from hintzCompiler.src.cfg import ControlFlowGraph
+from hintzCompiler.src.ir_nodes import Function
+
+
+class CompileHandler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        line = self.rfile.readline()
+        if not line:
+            return
+        try:
+            message = json.loads(line)
+            if message.get("op") not in OPS:
+                raise ValueError(f"unknown op {message.get('op')!r}")
+            reply = {"ok": True, "output": self.server.run(message["op"], message["source"], message.get("cwd"))}
+        except Exception as e:
+            reply = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+        self.wfile.write(json.dumps(reply).encode("utf8") + b"\n")
+
+
+class CompileServer(socketserver.UnixStreamServer):
+    # Warm compile daemon behind `hintz --serve`.
+    #
+    # Requests run on a bounded thread pool; the accept loop blocks while
+    # every worker is busy, so excess clients wait in the socket backlog.
+    # Each worker thread keeps its own warm parser (parser_cache), and the
+    # IR of recently compiled sources is kept in an LRU keyed by path and
+    # revalidated by stat'ing every file the source read and resolving its
+    # #include names again, from the client's cwd. With idle_timeout
+    # set, the daemon exits after that many seconds without requests.
+
+    def __init__(self, socket_path, workers=4, idle_timeout=None, cache_size=256, macros=None):
+        self.socket_path = socket_path
+        self.macros = dict(macros) if macros else {}
+        self.timeout = idle_timeout
+        self.cache_size = cache_size
+        self.compiles = 0  # sources actually compiled, for tests and stats
+        self._pool = ThreadPoolExecutor(max_workers=workers, initializer=get_ir_parser)
+        self._slots = threading.BoundedSemaphore(workers)
+        self._active = 0
+        self._idle = False
+        self._lock = threading.Lock()
+        self._ir_cache = OrderedDict()
+        _remove_stale_socket(socket_path)
+        super().__init__(socket_path, CompileHandler)
+
+    def process_request(self, request, client_address):
+        self._slots.acquire()
+        with self._lock:
+            self._active += 1
+        self._pool.submit(self._process, request, client_address)
+
+    def _process(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            with self._lock:
+                self._active -= 1
+            self._slots.release()
+
+    def handle_timeout(self):
+        with self._lock:
+            self._idle = self._active == 0
+
+    def serve(self):
+        try:
+            while not self._idle:
+                self.handle_request()
+        finally:
+            self.close()
+
+    def close(self):
+        self._pool.shutdown(wait=True)
+        self.server_close()
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+    def run(self, op, source, cwd=None):
+        entry = self._compile(source, cwd)
+        if op not in entry["outputs"]:
+            ir = entry["ir"]
+            if op == "ir":
+                output = "=== IR DUMP ===\n" + ir_text(ir)
+            elif op == "cfg":
+                output = "".join(str(ControlFlowGraph(d)) for d in ir.declarations if isinstance(d, Function))
+            else:
+                output = f"✅ {source}: {len(ir.declarations)} declarations\n"
+            entry["outputs"][op] = output
+        return entry["outputs"][op]
+
+    def _compile(self, source, cwd=None):
+        source = os.path.abspath(os.path.join(cwd or "", source))
+        preprocessor = Preprocessor(include_paths=[INCLUDE_DIR], macros=self.macros, cwd=cwd)
+        with self._lock:
+            entry = self._ir_cache.get(source)
+            if entry is not None:
+                self._ir_cache.move_to_end(source)
+        if (entry is not None and all(_stat(path) == st for path, st in entry["deps"])
+                and preprocessor.resolves(entry["includes"])):
+            return entry
+
+        if not source.endswith(".hz"):
+            raise ValueError(f"Only .hz files are supported: {source}")
+        code = preprocessor.preprocess(source)
+        # Stat before compiling: an edit made during the compile then shows
+        # up as a mismatch on the next request instead of being missed.
+        deps = [(path, _stat(path)) for path in preprocessor.dependencies]
+        entry = {"deps": deps, "includes": preprocessor.includes, "ir": compile_source(code), "outputs": {}}
+        with self._lock:
+            self.compiles += 1
+            self._ir_cache[source] = entry
+            while len(self._ir_cache) > self.cache_size:
+                self._ir_cache.popitem(last=False)
+        return entry
+
+
+def _stat(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _remove_stale_socket(path):
+    # A socket file left by a crashed daemon refuses connections; a live
+    # daemon accepts them, and then starting a second one is an error.
+    if not os.path.exists(path):
+        return
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(path)
+        except OSError:
+            os.remove(path)
+            return
+    raise RuntimeError(f"A hintz daemon is already listening on {path}")
@@ -0,0 +1,42 @@
+# Build step: generate a self-contained parser module from grammar/c89.lark.
+#
+#   python -m hintzCompiler.gen_parser [output]
+#
+# lark_runtime picks the module up automatically while its digest matches
+# the grammar, and falls back to runtime grammar construction otherwise.
+import os
+import py_compile
+import sys
+
+from lark import Lark
+from lark.tools.standalone import gen_standalone
+
+from hintzCompiler.lark_runtime import STANDALONE_PATH, read_grammar, standalone_digest
+
+
+def generate(path=STANDALONE_PATH, grammar: str = None):
+    if grammar is None:
+        grammar = read_grammar()
+    parser = Lark(grammar, parser="lalr", start="start")
+
+    # Write to a temporary file first so a concurrent import never sees a
+    # half-written module.
+    tmp = path + ".tmp"
+    with open(tmp, "w") as out:
+        out.write(f'GRAMMAR_DIGEST = "{standalone_digest(grammar)}"\n')
+        gen_standalone(parser, out=out, compress=True)
+    os.replace(tmp, path)
+    # Byte-compile now: the module is large, and compiling it from source on
+    # every start (e.g. under PYTHONDONTWRITEBYTECODE) would cost more than
+    # it saves.
+    py_compile.compile(path)
+    return path
+
+
+def main():
+    path = generate(*sys.argv[1:2])
+    print(f"✅ Parser written to {path}")
+
+
+if __name__ == "__main__":
+    main()
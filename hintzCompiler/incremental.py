@@ -0,0 +1,107 @@
+import hashlib
+import re
+from collections import Counter
+
+from hintzCompiler.compiler import iter_compile
+from hintzCompiler.preprocessor import Preprocessor
+from hintzCompiler.src.ir_nodes import Program
+from hintzCompiler.src.symbol_table import ScopedSymbolTableManager
+
+# Only braces, semicolons and string literals (which may contain either)
+# matter for finding where a top-level item ends.
+_BOUNDARY = re.compile(r'"[^"]*"|[{};]')
+_NEXT_NON_SPACE = re.compile(r'\s*(\S?)')
+
+
+def split_top_level(code: str):
+    # Cut after every `;` at brace depth 0 (declaration, struct_def) and
+    # after every `}` that returns to depth 0 unless a `;` follows it
+    # (function_def). Whatever trails the last item is kept as a chunk too,
+    # so it still reaches the parser and reports its own errors.
+    chunks = []
+    start = 0
+    depth = 0
+    for match in _BOUNDARY.finditer(code):
+        ch = match.group()
+        if ch == "{":
+            depth += 1
+            continue
+        if ch == "}":
+            depth -= 1
+            if depth or _NEXT_NON_SPACE.match(code, match.end()).group(1) == ";":
+                continue
+        elif ch != ";" or depth:
+            continue
+        chunks.append(code[start:match.end()])
+        start = match.end()
+    if code[start:].strip():
+        chunks.append(code[start:])
+    return chunks
+
+
+def fingerprint(chunk: str) -> bytes:
+    return hashlib.blake2b(chunk.strip().encode("utf8"), digest_size=16).digest()
+
+
+class IncrementalCompiler:
+    # Keeps the IR and global symbols of every top-level item from the last
+    # compile, keyed by a fingerprint of its text. A recompile only parses
+    # items whose text changed, splices them into `program` and patches the
+    # global symbol table with the symbols they add or drop.
+
+    def __init__(self, include_paths=None):
+        self.include_paths = include_paths
+        self.program = Program(declarations=[])
+        self.symtab_manager = ScopedSymbolTableManager()
+        self.reparsed = 0  # chunks parsed by the most recent compile
+        self._chunks = {}  # fingerprint -> (declarations, symbols)
+        self._order = []
+
+    def get_global_symbol_table(self):
+        return self.symtab_manager.global_scope
+
+    def compile_file(self, path: str) -> Program:
+        preprocessor = Preprocessor(include_paths=self.include_paths)
+        return self.compile(preprocessor.preprocess(path))
+
+    def compile(self, code: str) -> Program:
+        texts = split_top_level(code)
+        order = [fingerprint(text) for text in texts]
+
+        # Parse every changed chunk before touching any state, so a syntax
+        # error leaves the previous result intact.
+        parsed = {}
+        for key, text in zip(order, texts):
+            if key not in self._chunks and key not in parsed:
+                parsed[key] = self._compile_chunk(text)
+
+        removed = Counter(self._order) - Counter(order)
+        added = Counter(order) - Counter(self._order)
+        chunks = {**self._chunks, **parsed}
+        try:
+            global_scope = self.symtab_manager.global_scope
+            for key, count in removed.items():
+                for symbol in chunks[key][1] * count:
+                    global_scope.remove(symbol.name)
+            for key, count in added.items():
+                for symbol in chunks[key][1] * count:
+                    global_scope.define(symbol)
+        except RuntimeError:
+            # A redefinition leaves the table half patched; start over on
+            # the next compile rather than reason about what is left.
+            self.__init__(self.include_paths)
+            raise
+
+        self._chunks = {key: chunks[key] for key in order}
+        self._order = order
+        self.reparsed = len(parsed)
+        self.program.declarations[:] = [decl for key in order for decl in chunks[key][0]]
+        # The spliced declarations keep their cached hashes; the Program's
+        # own, if anything asked for it, covers the old list.
+        self.program._hash = None
+        return self.program
+
+    def _compile_chunk(self, text):
+        manager = ScopedSymbolTableManager()
+        declarations = list(iter_compile(text, symtab_manager=manager))
+        return declarations, list(manager.global_scope.symbols.values())
@@ -0,0 +1,65 @@
+import hashlib
+import os
+
+GRAMMAR_PATH = os.path.join(os.path.dirname(__file__), "grammar", "c89.lark")
+# Written by `python -m hintzCompiler.gen_parser`; not checked in.
+STANDALONE_PATH = os.path.join(os.path.dirname(__file__), "c89_parser.py")
+
+
+def read_grammar(path=GRAMMAR_PATH):
+    with open(path) as f:
+        return f.read()
+
+
+def standalone_digest(grammar: str) -> str:
+    # The generated module embeds its own copy of the lark runtime, so only
+    # the grammar text decides whether it is still usable.
+    return hashlib.sha256(grammar.encode("utf8")).hexdigest()
+
+
+def _load_standalone():
+    # Check the digest on the first line before importing, so a stale module
+    # costs one readline rather than a full import.
+    try:
+        with open(STANDALONE_PATH) as f:
+            header = f.readline()
+    except OSError:
+        return None
+    if header.strip() != f'GRAMMAR_DIGEST = "{standalone_digest(read_grammar())}"':
+        return None
+    from hintzCompiler import c89_parser
+    return c89_parser
+
+
+# The front end must use one set of lark classes throughout: the transformer
+# checks isinstance(..., Token) on whatever the parser hands it. When the
+# generated parser is current, its embedded classes are used and lark itself
+# is never imported.
+standalone = _load_standalone()
+
+if standalone is not None:
+    from hintzCompiler.c89_parser import Token, Transformer, Tree
+else:
+    from lark import Token, Transformer, Tree
+
+
+def write_pretty(tree, f, indent_str="  "):
+    # Writes the text of Tree.pretty() to f, in chunks and without
+    # recursion, so a parse tree of any depth can be printed.
+    out = []
+    stack = [(tree, 0)]
+    while stack:
+        item, level = stack.pop()
+        if not isinstance(item, Tree):
+            out.append(f"{indent_str * level}{item}\n")
+        else:
+            out.append(f"{indent_str * level}{item.data}")
+            if len(item.children) == 1 and not isinstance(item.children[0], Tree):
+                out.append(f"\t{item.children[0]}\n")
+            else:
+                out.append("\n")
+                stack.extend((child, level + 1) for child in reversed(item.children))
+        if len(out) >= 4096:
+            f.write("".join(out))
+            out.clear()
+    f.write("".join(out))
@@ -0,0 +1,106 @@
+import re
+
+from hintzCompiler.lark_runtime import Token
+
+_WORD = re.compile(r'\w+')
+
+
+class SourceToken(Token):
+    # A lark Token that also records the file it came from; `line` and
+    # `column` are positions in that file, not in the preprocessed text.
+    __slots__ = ("file",)
+
+
+def make_token(kind, value, file, line, column):
+    token = str.__new__(SourceToken, value)
+    token.type = kind
+    token.value = value
+    token.file = file
+    token.line = token.end_line = line
+    token.column = column
+    token.end_column = column + len(value)
+    token.start_pos = token.end_pos = None
+    return token
+
+
+class Lexer:
+    # Tokenizes one line at a time with a single regex built from the
+    # parser's own terminals, so it stays in step with grammar/c89.lark.
+    # Keywords are only recognized as whole words (`integer` is an IDENT).
+
+    def __init__(self, terminals, ignore=()):
+        words = {}
+        strings = []
+        patterns = []
+        for terminal in terminals:
+            if terminal.name in ignore:
+                continue
+            pattern = terminal.pattern
+            if pattern.type == "str" and _WORD.fullmatch(pattern.value):
+                words[pattern.value] = terminal.name
+            elif pattern.type == "str":
+                strings.append(terminal)
+            else:
+                patterns.append(terminal)
+        patterns.sort(key=lambda terminal: -terminal.priority)
+
+        # Regex terminals that can match a keyword (IDENT) are re-typed by
+        # looking the matched word up; anything else is tried as a string.
+        self.keywords = {}
+        self.word_kinds = set()
+        for terminal in patterns:
+            regex = re.compile(terminal.pattern.to_regexp())
+            for word, name in words.items():
+                if regex.fullmatch(word):
+                    self.keywords[word] = name
+                    self.word_kinds.add(terminal.name)
+        strings.extend(t for t in terminals if t.pattern.type == "str" and t.pattern.value in words
+                       and t.pattern.value not in self.keywords)
+        strings.sort(key=lambda terminal: -len(terminal.pattern.value))
+
+        alternatives = [f"(?P<{t.name}>{t.pattern.to_regexp()})" for t in patterns]
+        alternatives += [f"(?P<{t.name}>{re.escape(t.pattern.value)})" for t in strings]
+        # Whitespace is skipped by finditer; any other stray character is an error.
+        alternatives.append(r"(?P<_error>\S)")
+        self.pattern = re.compile("|".join(alternatives))
+
+    @classmethod
+    def for_parser(cls, parser):
+        return cls(parser.terminals, parser.lexer_conf.ignore)
+
+    def kinds(self, text):
+        # (type, value, column) for each token of a line, macros not expanded.
+        keywords = self.keywords
+        word_kinds = self.word_kinds
+        for match in self.pattern.finditer(text):
+            kind = match.lastgroup
+            value = match.group()
+            if kind in word_kinds:
+                kind = keywords.get(value, kind)
+            elif kind == "_error":
+                raise SyntaxError(f"unexpected character {value!r}")
+            yield kind, value, match.start() + 1
+
+    def tokens(self, text, file, line, spans=None):
+        # `spans` gives the (start, end, source start, source end) of macro
+        # expansions in `text`: tokens from an expansion take the macro's
+        # column, the rest are shifted back to their column in the source.
+        shift = 0
+        if spans:
+            spans = iter(zip(*[iter(spans)] * 4))
+            span = next(spans, None)
+        tokens = []
+        try:
+            for kind, value, column in self.kinds(text):
+                if spans:
+                    while span is not None and column > span[1]:
+                        shift = span[3] - span[1]
+                        span = next(spans, None)
+                    if span is not None and column > span[0]:
+                        column = span[2] + 1
+                    else:
+                        column += shift
+                tokens.append(make_token(kind, value, file, line, column))
+        except SyntaxError as e:
+            raise SyntaxError(f"{file}:{line}: {e}") from None
+        return tokens
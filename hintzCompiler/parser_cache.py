@@ -0,0 +1,114 @@
+import hashlib
+import os
+import sys
+import threading
+from contextlib import contextmanager
+
+from hintzCompiler.lark_runtime import read_grammar, standalone
+from hintzCompiler.lexer import Lexer
+from hintzCompiler.src.transformer import IRTransformer, StreamingIRTransformer
+
+# One parser per process; guarded so concurrent first calls build it only once.
+_parsers = {}
+_lock = threading.Lock()
+# Idle (parser, StreamingIRTransformer) pairs for iter_compile.
+_stream_pool = []
+
+
+def grammar_digest(grammar: str) -> str:
+    import lark
+
+    # The serialized tables are only valid for this exact grammar text,
+    # lark release and Python minor version.
+    key = "\0".join([grammar, lark.__version__, "%d.%d" % sys.version_info[:2]])
+    return hashlib.sha256(key.encode("utf8")).hexdigest()
+
+
+def cache_dir():
+    path = os.environ.get("HINTZ_CACHE_DIR")
+    if path:
+        return path
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "hintz")
+
+
+def table_cache_path(grammar: str):
+    directory = cache_dir()
+    try:
+        os.makedirs(directory, exist_ok=True)
+    except OSError:
+        return None  # read-only home etc.: just build the tables in memory
+    return os.path.join(directory, f"c89-{grammar_digest(grammar)[:16]}.lark.cache")
+
+
+def build_parser(grammar: str = None, disk_cache=True, transformer=None):
+    if grammar is None:
+        if standalone is not None:
+            # Generated module is current: no lark import, no table build.
+            return standalone.Lark_StandAlone(transformer=transformer)
+        grammar = read_grammar()
+
+    from lark import Lark
+    cache = table_cache_path(grammar) if disk_cache else None
+    # lark stores its own hash in the cache file and rebuilds on mismatch,
+    # so a stale or corrupt file only costs one regeneration. The transformer
+    # is not part of that hash, so tree and inline parsers share one file.
+    return Lark(grammar, parser="lalr", start="start", cache=cache or False,
+                transformer=transformer)
+
+
+def get_parser():
+    parser = _parsers.get("tree")
+    if parser is None:
+        with _lock:
+            parser = _parsers.get("tree")
+            if parser is None:
+                parser = _parsers["tree"] = build_parser()
+    return parser
+
+
+def get_ir_parser():
+    # The inline parser is bound to one IRTransformer, which carries symbol
+    # table state, so each thread gets its own pair.
+    key = ("ir", threading.get_ident())
+    entry = _parsers.get(key)
+    if entry is None:
+        transformer = IRTransformer()
+        entry = _parsers[key] = (build_parser(transformer=transformer), transformer)
+    return entry
+
+
+def get_lexer():
+    # Built from the IR parser's terminals; stateless, so shared by threads.
+    lexer = _parsers.get("lexer")
+    if lexer is None:
+        lexer = _parsers["lexer"] = Lexer.for_parser(get_ir_parser()[0])
+    return lexer
+
+
+@contextmanager
+def stream_parser():
+    # Every live iter_compile generator needs a parser of its own, even
+    # several on one thread, so these are pooled instead of kept per thread.
+    with _lock:
+        entry = _stream_pool.pop() if _stream_pool else None
+    if entry is None:
+        transformer = StreamingIRTransformer()
+        entry = (build_parser(transformer=transformer), transformer)
+    try:
+        yield entry
+    finally:
+        with _lock:
+            _stream_pool.append(entry)
+
+
+def clear_parser_cache(disk=False):
+    _parsers.clear()
+    with _lock:
+        _stream_pool.clear()
+    if disk:
+        directory = cache_dir()
+        if os.path.isdir(directory):
+            for name in os.listdir(directory):
+                if name.endswith(".lark.cache"):
+                    os.remove(os.path.join(directory, name))
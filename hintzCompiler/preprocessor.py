@@ -1,56 +1,630 @@
 import os
 import re
+from array import array
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple, Union
+
+from hintzCompiler.lexer import make_token
+
+# One scan per line finds every identifier outside string literals; string
+# literals are matched whole so nothing inside them is replaced.
+_TOKEN = re.compile(r'"[^"]*"|[A-Za-z_][A-Za-z0-9_]*')
+_IDENT = re.compile(r'[A-Za-z_][A-Za-z0-9_]*')
+_GUARD_OPEN = re.compile(r'#\s*ifndef\s+([A-Za-z_][A-Za-z0-9_]*)\s*$')
+_GUARD_DEFINE = re.compile(r'#\s*define\s+([A-Za-z_][A-Za-z0-9_]*)(?!\S)')
+_DIRECTIVE = re.compile(r'#\s*(\w*)')
+_INCLUDE = re.compile(r'\s*"([^"]+)"')
+_CONDITIONALS = {"if", "ifdef", "ifndef", "elif", "else", "endif"}
+_DEFINED = re.compile(r'\bdefined\s*(?:\(\s*([A-Za-z_][A-Za-z0-9_]*)\s*\)|([A-Za-z_][A-Za-z0-9_]*))')
+_EXPR_TOKEN = re.compile(r'\s*(?:(\d\w*)|([A-Za-z_]\w*)|(&&|\|\||[=!<>]=|<<|>>|[-+*/%<>!~&|^?:()]))')
+
+
+def _c_div(a, b):
+    quotient = abs(a) // abs(b)
+    return quotient if (a < 0) == (b < 0) else -quotient
+
+
+_UNARY = {
+    "!": lambda a: int(not a),
+    "~": lambda a: ~a,
+    "-": lambda a: -a,
+    "+": lambda a: a,
+}
+# C precedence, loosest first: || && | ^ & equality relational shift additive multiplicative.
+_BINARY = {
+    "||": (1, lambda a, b: int(bool(a or b))),
+    "&&": (2, lambda a, b: int(bool(a and b))),
+    "|": (3, lambda a, b: a | b),
+    "^": (4, lambda a, b: a ^ b),
+    "&": (5, lambda a, b: a & b),
+    "==": (6, lambda a, b: int(a == b)),
+    "!=": (6, lambda a, b: int(a != b)),
+    "<": (7, lambda a, b: int(a < b)),
+    ">": (7, lambda a, b: int(a > b)),
+    "<=": (7, lambda a, b: int(a <= b)),
+    ">=": (7, lambda a, b: int(a >= b)),
+    "<<": (8, lambda a, b: a << b),
+    ">>": (8, lambda a, b: a >> b),
+    "+": (9, lambda a, b: a + b),
+    "-": (9, lambda a, b: a - b),
+    "*": (10, lambda a, b: a * b),
+    "/": (10, _c_div),
+    "%": (10, lambda a, b: a - b * _c_div(a, b)),
+}
+
+
+def _parse_number(text):
+    digits = text.rstrip("uUlL")
+    if digits[:2] in ("0x", "0X"):
+        return int(digits, 16)
+    if len(digits) > 1 and digits[0] == "0":
+        return int(digits, 8)
+    return int(digits)
+
+
+def _eval_expression(text):
+    # An #if expression after macro expansion: integer arithmetic as in C,
+    # with any identifier still left counting as 0.
+    tokens = []
+    text = text.rstrip()
+    pos = 0
+    while pos < len(text):
+        match = _EXPR_TOKEN.match(text, pos)
+        if not match:
+            raise ValueError(f"unexpected {text[pos:].strip()!r}")
+        number, name, op = match.groups()
+        tokens.append(_parse_number(number) if number else 0 if name else op)
+        pos = match.end()
+    tokens.append(None)
+    value, pos = _parse_expression(tokens, 0)
+    if tokens[pos] is not None:
+        raise ValueError(f"unexpected {tokens[pos]!r}")
+    return value
+
+
+def _parse_expression(tokens, pos, min_prec=0, evaluate=True):
+    # Precedence climbing; returns the value and the position after it.
+    # With `evaluate` false the operands are only parsed, as C does for the
+    # side of && || ?: that is not taken, and the value is meaningless.
+    token = tokens[pos]
+    if isinstance(token, int):
+        value, pos = token, pos + 1
+    elif token in _UNARY:
+        value, pos = _parse_expression(tokens, pos + 1, 11, evaluate)
+        value = _UNARY[token](value)
+    elif token == "(":
+        value, pos = _parse_expression(tokens, pos + 1, 0, evaluate)
+        if tokens[pos] != ")":
+            raise ValueError("missing ')'")
+        pos += 1
+    else:
+        raise ValueError(f"unexpected {token!r}" if token else "incomplete expression")
+    while True:
+        token = tokens[pos]
+        if token == "?" and min_prec == 0:
+            then, pos = _parse_expression(tokens, pos + 1, 0, evaluate and bool(value))
+            if tokens[pos] != ":":
+                raise ValueError("missing ':'")
+            otherwise, pos = _parse_expression(tokens, pos + 1, 0, evaluate and not value)
+            value = then if value else otherwise
+        elif token in _BINARY and _BINARY[token][0] >= min_prec:
+            prec, apply = _BINARY[token]
+            if token == "||":
+                right_evaluated = evaluate and not value
+            elif token == "&&":
+                right_evaluated = evaluate and bool(value)
+            else:
+                right_evaluated = evaluate
+            right, pos = _parse_expression(tokens, pos + 1, prec + 1, right_evaluated)
+            if evaluate:
+                value = apply(value, right)
+        else:
+            return value, pos
+
+
+@dataclass
+class IncludeEntry:
+    stat: Tuple[int, int]
+    # Output lines; a nested include that was cached itself is kept as a
+    # reference to its entry, so no line is stored twice.
+    segments: List[Union[str, "IncludeEntry"]]
+    guard: Optional[str]
+    # Every file read while producing the output, this one first, with its stat.
+    files: List[Tuple[str, Tuple[int, int]]]
+    # Every #include behind the output, nested ones too, with the path it
+    # resolved to. Other include paths or another cwd may resolve it elsewhere.
+    includes: List[Tuple[str, str]]
+    defines: List[Tuple[str, str]]
+    # The macros this file's own lines depend on and their values when it
+    # was produced. Nested entries are checked against their own keys, at
+    # the point they were included: after the first `n` of `defines`.
+    key_names: Tuple[str, ...]
+    key: Tuple[Optional[str], ...]
+    nested: List[Tuple[int, "IncludeEntry"]]
+    # Where each non-blank line came from: an index into `files` and a line
+    # number in that file.
+    line_files: array
+    line_numbers: array
+    # For lines where macros were expanded, keyed by the same index: the
+    # expansions' (start, end, source start, source end), flattened.
+    spans: Dict[int, Tuple[int, ...]]
+
+    def lines(self):
+        stack = [iter(self.segments)]
+        while stack:
+            for segment in stack[-1]:
+                if isinstance(segment, str):
+                    yield segment
+                else:
+                    stack.append(iter(segment.segments))
+                    break
+            else:
+                stack.pop()
+
+    def located_lines(self):
+        # (line, path, line number, spans) for every non-blank output line.
+        stack = [(self, iter(self.segments), iter(range(len(self.line_numbers))))]
+        while stack:
+            entry, segments, positions = stack[-1]
+            for segment in segments:
+                if isinstance(segment, str):
+                    if segment:
+                        i = next(positions)
+                        yield segment, entry.files[entry.line_files[i]][0], entry.line_numbers[i], entry.spans.get(i)
+                else:
+                    stack.append((segment, iter(segment.segments), iter(range(len(segment.line_numbers)))))
+                    break
+            else:
+                stack.pop()
+
+
+@dataclass
+class _Record:
+    files: List[Tuple[str, Tuple[int, int]]] = field(default_factory=list)
+    includes: List[Tuple[str, str]] = field(default_factory=list)
+    defines: List[Tuple[str, str]] = field(default_factory=list)
+    idents: Set[str] = field(default_factory=set)
+    # Includes skipped because the file was already visited.
+    skipped: Set[str] = field(default_factory=set)
+    segments: list = field(default_factory=list)
+    line_files: array = field(default_factory=lambda: array("I"))
+    line_numbers: array = field(default_factory=lambda: array("I"))
+    spans: dict = field(default_factory=dict)
+    nested: list = field(default_factory=list)
+    guard: Optional[str] = None
+    entry: Optional[IncludeEntry] = None
+
+
+class IncludeCache:
+    # Shared by every Preprocessor in the process, so batch workers, the
+    # daemon and BuildCache reuse work across translation units.
+    #
+    # `files` holds each file's fully preprocessed output, valid while the
+    # file and everything it included have the same (mtime_ns, size), every
+    # #include in it still resolves to the same file and every macro it used
+    # has the same value. A file wrapped in a classic include guard is
+    # skipped with a single stat when its guard macro is already defined.
+
+    def __init__(self):
+        self.files = {}
+
+    def clear(self):
+        self.files.clear()
+
+
+include_cache = IncludeCache()
+
+
+def _stat(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _read_lines(f):
+    # Buffered reads; only the current line is held.
+    with f:
+        for line in f:
+            yield line.rstrip()
+
 
 class Preprocessor:
-    def __init__(self, include_paths=None):
-        self.macros = {}
+    def __init__(self, include_paths=None, macros=None, include_cache=include_cache, cwd=None):
+        self.macros = dict(macros) if macros else {}
         self.include_paths = include_paths if include_paths else []
+        self.cwd = cwd  # what relative include paths and '.' are resolved against; None for os.getcwd()
+        self.include_cache = include_cache
+        self.dependencies = []  # every file read by the last preprocess(), in order
+        self.includes = []  # (name, resolved path) of every #include behind the last preprocess()
+        self._expansions = {}  # macro -> fully expanded body; reset when macros change
+        self._resolved = {}  # #include name -> path, for the current run only
+        self._lexer = None  # set by iter_tokens()
 
     def preprocess(self, filepath):
-        return self._process_file(filepath, set())
+        return "\n".join(self.iter_lines(filepath))
+
+    def iter_lines(self, filepath):
+        # Output lines in order, straight from the file being read or from the
+        # include cache; nothing is joined per include level.
+        for item in self._walk(filepath):
+            if isinstance(item, str):
+                yield item
+            else:
+                yield from item.lines()
+
+    def iter_tokens(self, filepath, lexer):
+        # The parser's tokens, positioned in the files they came from. Each
+        # line is scanned once, for directives, macros and tokens together.
+        self._lexer = lexer
+        try:
+            for item in self._walk(filepath):
+                if isinstance(item, list):
+                    yield from item
+                elif isinstance(item, IncludeEntry):
+                    for text, path, line, spans in item.located_lines():
+                        yield from lexer.tokens(text, path, line, spans)
+        finally:
+            self._lexer = None
+
+    def _walk(self, filepath):
+        self.dependencies = []
+        self.includes = []
+        self._expansions = {}  # self.macros may have been edited since the last run
+        self._resolved = {}
+        # Nested includes are driven from an explicit stack rather than
+        # `yield from`, so a line costs the same at any include depth.
+        stack = [self._process_file(filepath, set())]
+        sent = None
+        while stack:
+            try:
+                item = stack[-1].send(sent)
+            except StopIteration as stop:
+                stack.pop()
+                sent = stop.value
+                continue
+            sent = None
+            if isinstance(item, (str, list, IncludeEntry)):
+                yield item
+            else:
+                stack.append(item)
+        self.includes = sent.includes
 
     def _process_file(self, filepath, visited):
+        # A generator run by _walk(): yields output lines (token lists while
+        # lexing), cached entries to replay and generators for nested includes
+        # (receiving each one's _Record back), and returns a _Record describing
+        # this file. A file that produces nothing still yields one empty line,
+        # as the nested "\n".join()s this replaced did.
         if filepath in visited:
-            return ""  # Prevent circular includes
-        visited.add(filepath)
+            # Prevent circular includes. A guarded file would be hidden by its
+            # guard anyway, which makes the skip independent of include order.
+            yield ""
+            entry = self.include_cache.files.get(filepath)
+            if (entry is not None and entry.guard is not None and entry.guard in self.macros
+                    and entry.stat == _stat(filepath)):
+                return _Record(idents={entry.guard}, segments=[""])
+            return _Record(skipped={filepath}, segments=[""])
 
-        output = []
-        with open(filepath, 'r') as f:
-            lines = f.readlines()
+        st = _stat(filepath)
+        entry = self.include_cache.files.get(filepath)
+        if entry is not None and entry.stat == st:
+            if entry.guard is not None and entry.guard in self.macros:
+                visited.add(filepath)
+                self.dependencies.append(filepath)
+                yield ""
+                return _Record(files=[(filepath, st)], idents={entry.guard}, segments=[""])
+            if self._replayable(entry, visited):
+                record = self._replay(entry, visited)
+                yield entry
+                return record
+
+        visited.add(filepath)
+        self.dependencies.append(filepath)
+        start_macros = dict(self.macros)
+        record = _Record(files=[(filepath, st)])
+        segments = record.segments
+        conditions = []  # [active, taken, where, else seen] for each open #if group
+        skipping = False
+        # `#ifndef X` / `#define X` as the first two non-blank lines, closed
+        # by the last one, make X an include guard for the cache.
+        seen = 0
+        guard = None
+        guard_closed = False
 
-        for line in lines:
-            line = line.rstrip()
-            line = line.rstrip()
+        for lineno, line in enumerate(_read_lines(open(filepath, 'r')), 1):
             stripped = line.lstrip()
+            if stripped:
+                seen += 1
+                if guard_closed:
+                    guard = None
+                elif seen == 1:
+                    match = _GUARD_OPEN.match(stripped)
+                    guard = match.group(1) if match else None
+                elif seen == 2 and guard is not None:
+                    match = _GUARD_DEFINE.match(stripped)
+                    if not match or match.group(1) != guard:
+                        guard = None
 
-            if stripped.startswith('#include'):
-                match = re.match(r'#include\s+"([^"]+)"', stripped)
+            # Every directive is recognised the same way: `#`, optional
+            # blanks and the name, anywhere after leading whitespace.
+            directive = rest = None
+            if stripped.startswith('#'):
+                match = _DIRECTIVE.match(stripped)
+                directive, rest = match.group(1), stripped[match.end():]
+                if directive in _CONDITIONALS:
+                    skipping = self._conditional(directive, rest.strip(), conditions, record, f"{filepath}:{lineno}")
+                    guard_closed = guard is not None and not conditions
+                    continue
+            if skipping:
+                continue  # excluded code: no substitution, nothing emitted
+
+            if directive == "include":
+                match = _INCLUDE.match(rest)
                 if match:
                     include_file = match.group(1)
                     full_path = self._find_include_file(include_file)
                     if full_path:
-                        output.append(self._process_file(full_path, visited))
+                        nested = yield self._process_file(full_path, visited)
+                        offset = len(record.defines)
+                        file_offset = len(record.files)
+                        record.includes.append((include_file, full_path))
+                        record.includes.extend(nested.includes)
+                        record.files.extend(nested.files)
+                        record.defines.extend(nested.defines)
+                        record.skipped |= nested.skipped
+                        if nested.entry is not None:
+                            segments.append(nested.entry)
+                            record.nested.append((offset, nested.entry))
+                        else:
+                            segments.extend(nested.segments)
+                            line_offset = len(record.line_numbers)
+                            record.spans.update((i + line_offset, spans) for i, spans in nested.spans.items())
+                            record.line_files.extend(i + file_offset for i in nested.line_files)
+                            record.line_numbers.extend(nested.line_numbers)
+                            record.idents |= nested.idents
+                            record.nested.extend((offset + n, entry) for n, entry in nested.nested)
                     else:
                         raise FileNotFoundError(f"Include file not found: {include_file}")
                 continue
 
-            elif line.startswith('#define'):
-                parts = line.split(maxsplit=2)
-                if len(parts) == 3:
-                    _, key, val = parts
-                    self.macros[key] = val
+            elif directive == "pragma":
+                continue  # `#pragma once`: every file is included at most once anyway
+
+            elif directive == "define":
+                parts = rest.split(maxsplit=1)
+                if parts:
+                    self._define(parts[0], parts[1] if len(parts) == 2 else "", record)
                 continue
 
-            for key, val in self.macros.items():
-                line = re.sub(rf'\b{re.escape(key)}\b', val, line)
+            if self._lexer is not None:
+                tokens, line, spans = self._lex_line(line, filepath, lineno, record)
+                yield tokens
+            else:
+                line, spans = self._substitute(line, record)
+                yield line
+            segments.append(line)
+            if line:
+                if spans is not None:
+                    record.spans[len(record.line_numbers)] = spans
+                record.line_files.append(0)
+                record.line_numbers.append(lineno)
+
+        if conditions:
+            raise SyntaxError(f"{conditions[-1][2]}: #if without #endif")
+        if guard_closed:
+            record.guard = guard
+
+        if not segments:
+            yield ""
+            segments.append("")
+
+        # A skip of a file first read outside this one depends on what the
+        # translation unit included before, so such output is not reusable.
+        if st is not None and record.skipped <= {path for path, _ in record.files}:
+            key_names = self._key_names(record.idents, start_macros)
+            record.entry = self.include_cache.files[filepath] = IncludeEntry(
+                stat=st,
+                segments=segments,
+                guard=record.guard,
+                files=record.files,
+                includes=record.includes,
+                defines=record.defines,
+                key_names=key_names,
+                key=tuple(start_macros.get(name) for name in key_names),
+                nested=record.nested,
+                line_files=record.line_files,
+                line_numbers=record.line_numbers,
+                spans=record.spans,
+            )
+        return record
+
+    def _conditional(self, directive, expression, conditions, record, where):
+        # Updates the stack of open #if groups and returns whether the lines
+        # that follow are skipped.
+        if directive in ("if", "ifdef", "ifndef"):
+            if conditions and not conditions[-1][0]:
+                conditions.append([False, True, where, False])  # nothing inside a skipped group is taken
+            else:
+                value = self._condition(directive, expression, record, where)
+                conditions.append([value, value, where, False])
+        elif not conditions:
+            raise SyntaxError(f"{where}: #{directive} without #if")
+        elif directive == "endif":
+            conditions.pop()
+        else:
+            group = conditions[-1]
+            if group[3]:
+                raise SyntaxError(f"{where}: #{directive} after #else")
+            group[3] = directive == "else"
+            if group[1]:
+                group[0] = False
+            else:
+                group[0] = group[1] = directive == "else" or self._condition("if", expression, record, where)
+        return bool(conditions) and not conditions[-1][0]
+
+    def _condition(self, directive, expression, record, where):
+        if directive != "if":
+            name = _IDENT.match(expression)
+            if not name:
+                raise SyntaxError(f"{where}: #{directive} needs a macro name")
+            record.idents.add(name.group())
+            return (name.group() in self.macros) == (directive == "ifdef")
 
-            output.append(line)
+        def defined(match):
+            name = match.group(1) or match.group(2)
+            record.idents.add(name)
+            return "1" if name in self.macros else "0"
 
-        return "\n".join(output)
+        expression = _DEFINED.sub(defined, expression)
+        record.idents.update(_IDENT.findall(expression))
+        if self.macros:
+            expression = _TOKEN.sub(self._replace, expression)
+        try:
+            return _eval_expression(expression) != 0
+        except (ValueError, ZeroDivisionError) as e:
+            raise SyntaxError(f"{where}: bad #if expression {expression!r}: {e}") from None
+
+    def _define(self, key, val, record):
+        self.macros[key] = val
+        self._expansions = {}
+        record.defines.append((key, val))
+        record.idents.update(_IDENT.findall(val))
+
+    def _key_names(self, idents, macros):
+        # The identifiers used, plus everything their macro bodies refer to.
+        names = set(idents)
+        pending = list(names)
+        while pending:
+            body = macros.get(pending.pop())
+            if body:
+                for name in _IDENT.findall(body):
+                    if name not in names:
+                        names.add(name)
+                        pending.append(name)
+        return tuple(sorted(names))
+
+    def _replayable(self, entry, visited):
+        return (all(path not in visited for path, _ in entry.files)
+                and self._key_matches(entry, self.macros)
+                and all(_stat(path) == st for path, st in entry.files[1:])
+                and self.resolves(entry.includes))
+
+    def resolves(self, includes):
+        # Whether every (name, path) in `includes` still resolves to that path.
+        return all(self._find_include_file(name) == path for name, path in includes)
+
+    def _key_matches(self, entry, macros):
+        if not all(macros.get(name) == value for name, value in zip(entry.key_names, entry.key)):
+            return False
+        if not entry.nested:
+            return True
+        macros = dict(macros)
+        applied = 0
+        for n, nested in entry.nested:
+            macros.update(entry.defines[applied:n])
+            applied = n
+            if not self._key_matches(nested, macros):
+                return False
+        return True
+
+    def _replay(self, entry, visited):
+        record = _Record(files=entry.files, includes=entry.includes, entry=entry)
+        for path, _ in entry.files:
+            visited.add(path)
+            self.dependencies.append(path)
+        for key, val in entry.defines:
+            self._define(key, val, record)
+        return record
+
+    def _substitute(self, line, record):
+        # Records the line's identifiers and expands its macros. Returns the
+        # new text and the spans of the expansions in it (None if there were
+        # none), from which tokens get their columns in the source line.
+        macros = self.macros
+        idents = record.idents
+        pieces = []
+        spans = []
+        last = 0
+        length = 0
+        for match in _TOKEN.finditer(line):
+            token = match.group()
+            if token[0] == '"':
+                continue
+            idents.add(token)
+            if token in macros:
+                start, end = match.span()
+                pieces.append(line[last:start])
+                length += start - last
+                expansion = self._replace(match)
+                pieces.append(expansion)
+                spans += (length, length + len(expansion), start, end)
+                length += len(expansion)
+                last = end
+        if not pieces:
+            return line, None
+        pieces.append(line[last:])
+        return "".join(pieces), tuple(spans)
+
+    def _lex_line(self, line, filepath, lineno, record):
+        # One scan gives the parser's tokens and the identifiers for the cache
+        # key. A line that uses a macro is expanded first and then lexed, as
+        # the text would be, so the tokens match preprocess() exactly.
+        lexer = self._lexer
+        keywords = lexer.keywords
+        word_kinds = lexer.word_kinds
+        macros = self.macros
+        idents = record.idents
+        tokens = []
+        for match in lexer.pattern.finditer(line):
+            kind = match.lastgroup
+            value = match.group()
+            if kind in word_kinds:
+                if value in macros:
+                    line, spans = self._substitute(line, record)
+                    return lexer.tokens(line, filepath, lineno, spans), line, spans
+                idents.add(value)
+                kind = keywords.get(value, kind)
+            elif kind == "_error":
+                raise SyntaxError(f"{filepath}:{lineno}: unexpected character {value!r}")
+            tokens.append(make_token(kind, value, filepath, lineno, match.start() + 1))
+        return tokens, line, None
+
+    def _replace(self, match):
+        token = match.group()
+        if token not in self.macros:
+            return token  # also covers string literals, which never are keys
+        expansion = self._expansions.get(token)
+        if expansion is None:
+            expansion = self._expansions[token] = self._expand(token, frozenset())
+        return expansion
+
+    def _expand(self, name, active):
+        # Bodies are rescanned for other macros, as in C, but a macro is not
+        # expanded again inside its own expansion.
+        active = active | {name}
+
+        def replace(match):
+            token = match.group()
+            if token in self.macros and token not in active:
+                return self._expand(token, active)
+            return token
+
+        return _TOKEN.sub(replace, self.macros[name])
 
     def _find_include_file(self, filename):
+        # Memoized for one run only: across runs the include paths, the cwd
+        # or the files on the search path may have changed. The result is
+        # absolute, so it (and the include cache entry keyed by it) doesn't
+        # depend on the cwd.
+        if filename in self._resolved:
+            return self._resolved[filename]
+        found = None
         for path in self.include_paths + ['.']:
-            candidate = os.path.join(path, filename)
+            candidate = os.path.join(self.cwd or '', path, filename)
             if os.path.isfile(candidate):
-                return candidate
-        return None
+                found = os.path.abspath(candidate)
+                break
+        self._resolved[filename] = found
+        return found
@@ -1,21 +1,28 @@
 from dataclasses import dataclass, field
-from typing import List, Dict, Tuple, Optional
+from typing import List, Dict, Set, Tuple, Optional
 from hintzCompiler.src.ir_nodes import IRNode, Goto, Label, Block, Function, Return, If, While, DoWhile, For, Switch, Case, Break, SwitchJoin, IfJoin
+from hintzCompiler.src.visitor import DispatchTable
 
 from typing import cast
-import graphviz
 
-@dataclass
+@dataclass(eq=False)
 class CFGNode:
+    # Nodes compare and hash by identity. Edges are deduplicated on the
+    # target's id (unique within a graph) rather than by scanning
+    # `successors`, and every edge is recorded at both ends.
     id: int
     stmt: IRNode
     successors: List["CFGNode"] = field(default_factory=list)
     compositeNodeExit : Optional["CFGNode"] = None
     compositeNodeEntry : Optional["CFGNode"] = None
+    predecessors: List["CFGNode"] = field(default_factory=list, repr=False)
+    _successor_ids: Set[int] = field(default_factory=set, repr=False)
 
     def add_successor(self, succ: "CFGNode"):
-        if succ not in self.successors:
+        if succ.id not in self._successor_ids:
+            self._successor_ids.add(succ.id)
             self.successors.append(succ)
+            succ.predecessors.append(self)
 
     def __str__(self):
         stmt_str = str(self.stmt).replace("\n", " ")
@@ -73,109 +80,115 @@ class ControlFlowGraph:
         node = CFGNode(id=self.stmt_id, stmt=stmt)
         self.nodes.append(node)
         self.stmt_id += 1
-        if isinstance(stmt, Label):
-            self.label_map[stmt.name] = node
+        # __class__ rather than type(): FlatNode views report their node's class.
+        handler = _handlers[stmt.__class__]
+        if handler is None:
+            return node
+        return handler(self, stmt, node)
 
-        if isinstance(stmt, Goto):
-            self.goto_links.append((node, stmt.label))
+    def _handle_Label(self, stmt: Label, node: CFGNode) -> CFGNode:
+        self.label_map[stmt.name] = node
+        return node
 
-        elif isinstance(stmt, If):
+    def _handle_Goto(self, stmt: Goto, node: CFGNode) -> CFGNode:
+        self.goto_links.append((node, stmt.label))
+        return node
 
-            exit_node = CFGNode(id=self.stmt_id, stmt=IfJoin())  # dummy "join" node
-            self.nodes.append(exit_node)
-            self.stmt_id += 1
+    def _handle_If(self, stmt: If, node: CFGNode) -> CFGNode:
+        exit_node = CFGNode(id=self.stmt_id, stmt=IfJoin())  # dummy "join" node
+        self.nodes.append(exit_node)
+        self.stmt_id += 1
 
-            then_entry, then_last_node = self._build_branch(cast(Block, stmt.then_branch))
-            node.add_successor(then_entry)
-            then_last_node.add_successor(exit_node);
+        then_entry, then_last_node = self._build_branch(cast(Block, stmt.then_branch))
+        node.add_successor(then_entry)
+        then_last_node.add_successor(exit_node);
 
-            if stmt.else_branch:
-                else_entry, else_last = self._build_branch(cast(Block, stmt.else_branch))
-                node.add_successor(else_entry)
-                else_last.add_successor(exit_node)
+        if stmt.else_branch:
+            else_entry, else_last = self._build_branch(cast(Block, stmt.else_branch))
+            node.add_successor(else_entry)
+            else_last.add_successor(exit_node)
 
-            node.compositeNodeExit = exit_node;
-            return node
+        node.compositeNodeExit = exit_node;
+        return node
 
-        elif isinstance(stmt, While):
-            body_entry, body_last = self._build_branch(cast(Block, stmt.body))
-            node.add_successor(body_entry)
-            last = self._last_node(body_entry)
-            last.add_successor(node)
-
-        elif isinstance(stmt, DoWhile):
-            body_entry, dowhile_last = self._build_branch(cast(Block, stmt.body))
-            node.stmt = stmt  # node represents the condition
-            last = self._last_node(body_entry)
-            last.add_successor(node)
-
-        elif isinstance(stmt, For):
-
-            orignode = node;
-            if stmt.init:
-                init_node = CFGNode(id=self.stmt_id, stmt=stmt.init)
-                self.nodes.append(init_node)
-                self.stmt_id += 1
-                node.add_successor(init_node)
-                node = init_node
-
-            cond_node = CFGNode(id=self.stmt_id, stmt=stmt.condition) if stmt.condition else node
-            if stmt.condition:
-                self.nodes.append(cond_node)
-                self.stmt_id += 1
-                node.add_successor(cond_node)
-            else:
-                node.add_successor(cond_node)
+    def _handle_While(self, stmt: While, node: CFGNode) -> CFGNode:
+        body_entry, body_last = self._build_branch(cast(Block, stmt.body))
+        node.add_successor(body_entry)
+        last = self._last_node(body_entry)
+        last.add_successor(node)
+        return node
+
+    def _handle_DoWhile(self, stmt: DoWhile, node: CFGNode) -> CFGNode:
+        body_entry, dowhile_last = self._build_branch(cast(Block, stmt.body))
+        node.stmt = stmt  # node represents the condition
+        last = self._last_node(body_entry)
+        last.add_successor(node)
+        return node
 
-            node = cond_node
+    def _handle_For(self, stmt: For, node: CFGNode) -> CFGNode:
+        orignode = node;
+        if stmt.init:
+            init_node = CFGNode(id=self.stmt_id, stmt=stmt.init)
+            self.nodes.append(init_node)
+            self.stmt_id += 1
+            node.add_successor(init_node)
+            node = init_node
 
-            body_entry, body_last = self._build_branch(cast(Block, stmt.body))
-            cond_node.add_successor(body_entry)
-            #after_body = self._last_node(body_entry)
-            after_body = body_last
+        cond_node = CFGNode(id=self.stmt_id, stmt=stmt.condition) if stmt.condition else node
+        if stmt.condition:
+            self.nodes.append(cond_node)
+            self.stmt_id += 1
+            node.add_successor(cond_node)
+        else:
+            node.add_successor(cond_node)
 
-            if stmt.update:
-                update_node = CFGNode(id=self.stmt_id, stmt=stmt.update)
-                self.nodes.append(update_node)
-                self.stmt_id += 1
-                after_body.add_successor(update_node)
-                update_node.add_successor(cond_node)
-            else:
-                after_body.add_successor(cond_node)
+        node = cond_node
 
-            node.compositeNodeEntry = orignode;
-            return node;
+        body_entry, body_last = self._build_branch(cast(Block, stmt.body))
+        cond_node.add_successor(body_entry)
+        #after_body = self._last_node(body_entry)
+        after_body = body_last
 
-        #Handling for Switch Stmt.
-        elif isinstance(stmt, Switch):
-            switch_node = node
+        if stmt.update:
+            update_node = CFGNode(id=self.stmt_id, stmt=stmt.update)
+            self.nodes.append(update_node)
+            self.stmt_id += 1
+            after_body.add_successor(update_node)
+            update_node.add_successor(cond_node)
+        else:
+            after_body.add_successor(cond_node)
 
-            # Clear pending breaks for this switch block
-            prev_pending_breaks = self._pending_breaks
-            self._pending_breaks = []
+        node.compositeNodeEntry = orignode;
+        return node;
 
-            exit_node = CFGNode(id=self.stmt_id, stmt=SwitchJoin())  # dummy "join" node
+    def _handle_Switch(self, stmt: Switch, node: CFGNode) -> CFGNode:
+        switch_node = node
 
-            self.nodes.append(exit_node)
-            self.stmt_id += 1
+        # Clear pending breaks for this switch block
+        prev_pending_breaks = self._pending_breaks
+        self._pending_breaks = []
 
-            for case in stmt.cases:
-                case_entry, last_node = self._build_branch(case.body)
-                switch_node.add_successor(case_entry)
+        exit_node = CFGNode(id=self.stmt_id, stmt=SwitchJoin())  # dummy "join" node
 
-            # All breaks in the switch go to the exit node
-            for break_node in self._pending_breaks:
-                break_node.add_successor(exit_node)
+        self.nodes.append(exit_node)
+        self.stmt_id += 1
 
-            self._pending_breaks = prev_pending_breaks
+        for case in stmt.cases:
+            case_entry, last_node = self._build_branch(case.body)
+            switch_node.add_successor(case_entry)
 
-            node.compositeNodeExit = exit_node;
+        # All breaks in the switch go to the exit node
+        for break_node in self._pending_breaks:
+            break_node.add_successor(exit_node)
 
-            return node
+        self._pending_breaks = prev_pending_breaks
+
+        node.compositeNodeExit = exit_node;
 
-        elif isinstance(stmt, Break):
-            self._pending_breaks.append(node)
+        return node
 
+    def _handle_Break(self, stmt: Break, node: CFGNode) -> CFGNode:
+        self._pending_breaks.append(node)
         return node
 
     def _build_branch(self, block: Block) -> tuple[CFGNode, CFGNode] :
@@ -236,6 +249,8 @@ class ControlFlowGraph:
 
 
     def to_graphviz(self, output_path="cfg", view=False):
+        import graphviz  # only needed for --cfg; keeps it off the startup path
+
         dot = graphviz.Digraph(format="jpeg")
 
         # Add nodes with labels
@@ -252,3 +267,7 @@ class ControlFlowGraph:
         # Render graph
         dot.render(output_path, view=view, cleanup=True)
 
+
+# Statement class -> ControlFlowGraph._handle_<class name>, for the
+# statements that need more than a plain CFG node.
+_handlers = DispatchTable(ControlFlowGraph, "_handle_")
@@ -0,0 +1,212 @@
+from array import array
+
+from hintzCompiler.src.ir_nodes import *
+
+# Node kinds, by their index in FlatIR.kinds. Append only: the index is
+# what gets stored.
+KINDS = (Program, Function, Variable, BinaryOp, UnaryOp, Assignment, If, While, DoWhile,
+         Return, Block, Call, Literal, Identifier, FieldAccess, ArrayAccess, FunctionCall,
+         For, Goto, Label, Switch, Case, Break, SwitchJoin, IfJoin)
+# The field names and the field-values getter of each kind are the ones
+# ir_node gives every class; hzir uses these same tables.
+FIELDS = tuple(cls._fields for cls in KINDS)
+GETTERS = tuple(cls._values for cls in KINDS)
+KIND_INDEX = {cls: i for i, cls in enumerate(KINDS)}
+_FIELD_INDEX = tuple({name: i for i, name in enumerate(names)} for names in FIELDS)
+_ZEROS = tuple([0] * len(names) for names in FIELDS)
+
+# Slot tags. A slot's value is the node index (NODE), an index into
+# FlatIR.strings (STR) or FlatIR.numbers (FLOAT), the value itself (INT,
+# BOOL), or for LIST and DICT an index into list_first/list_len, whose
+# items are slots of their own (a DICT's alternate key and value).
+NONE, NODE, STR, INT, FLOAT, BOOL, LIST, DICT = range(8)
+
+
+class FlatIR:
+    # A Program (or any IR subtree) as parallel arrays instead of objects.
+    #
+    # Nodes are numbered in preorder, so node i's subtree is the index range
+    # [i, ends[i]). Node i's fields are the slots first[i], first[i] + 1, ...
+    # in dataclass field order, one tag and one value per slot.
+
+    def __init__(self):
+        self.kinds = array("B")
+        self.first = array("I")
+        self.ends = array("I")
+        self.tags = array("B")
+        self.values = array("q")
+        self.list_first = array("I")
+        self.list_len = array("I")
+        self.numbers = array("d")
+        self.strings = []
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def kind(self, index):
+        return KINDS[self.kinds[index]]
+
+    def node(self, index=0):
+        return FlatNode(self, index)
+
+    def walk(self, index=0):
+        # Node indices of the subtree rooted at `index`, in preorder.
+        return range(index, self.ends[index])
+
+    def field(self, index, name):
+        slot = self.first[index] + _FIELD_INDEX[self.kinds[index]][name]
+        return self._value(slot, self.node)
+
+    def children(self, index):
+        # Direct child nodes, in field (and list) order.
+        first = self.first[index]
+        tags, values = self.tags, self.values
+        todo = list(range(first + len(FIELDS[self.kinds[index]]) - 1, first - 1, -1))
+        while todo:
+            slot = todo.pop()
+            tag = tags[slot]
+            if tag == NODE:
+                yield values[slot]
+            elif tag == LIST or tag == DICT:
+                start = self.list_first[values[slot]]
+                todo.extend(range(start + self.list_len[values[slot]] - 1, start - 1, -1))
+
+    def _value(self, slot, node):
+        # `node` maps a node index to its object: a FlatNode view, or the
+        # already built tree node while unflattening.
+        tag = self.tags[slot]
+        value = self.values[slot]
+        if tag == NODE:
+            return node(value)
+        if tag == STR:
+            return self.strings[value]
+        if tag == NONE:
+            return None
+        if tag == INT:
+            return value
+        if tag == FLOAT:
+            return self.numbers[value]
+        if tag == BOOL:
+            return bool(value)
+        start = self.list_first[value]
+        items = [self._value(s, node) for s in range(start, start + self.list_len[value])]
+        if tag == DICT:
+            return dict(zip(items[::2], items[1::2]))
+        return items
+
+
+class FlatNode:
+    # A view of one node of a FlatIR that reads like the dataclass node, so
+    # tree code such as ControlFlowGraph runs on it unchanged: fields are
+    # attributes, child nodes are FlatNode views in turn, str()/repr() match
+    # the tree, and isinstance() sees the node's class through __class__.
+    __slots__ = ("ir", "index")
+
+    def __init__(self, ir, index):
+        self.ir = ir
+        self.index = index
+
+    @property
+    def __class__(self):
+        return KINDS[self.ir.kinds[self.index]]
+
+    def __getattr__(self, name):
+        try:
+            return self.ir.field(self.index, name)
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __str__(self):
+        return str(unflatten(self.ir, self.index))
+
+    def __repr__(self):
+        return repr(unflatten(self.ir, self.index))
+
+
+def flatten(root):
+    flat = FlatIR()
+    kinds, first, numbers = flat.kinds, flat.first, flat.numbers
+    list_first, list_len = flat.list_first, flat.list_len
+    # Filled as lists and turned into arrays at the end: storing into a list
+    # slot is cheaper than into an array.
+    tags, values, ends = [], [], []
+    strings = {}
+
+    # (value, slot to store it in); popping in order keeps nodes in preorder.
+    # Under each node's fields sits (None, -2 - node): popped once its whole
+    # subtree is done, which is where the subtree ends.
+    stack = [(root, -1)]
+    pop, push = stack.pop, stack.extend
+    while stack:
+        value, slot = pop()
+        cls = type(value)
+        kind = KIND_INDEX.get(cls)
+        if kind is not None:
+            tag, stored = NODE, len(kinds)
+            fields = GETTERS[kind](value)
+            start = len(tags)
+            tags += _ZEROS[kind]
+            values += _ZEROS[kind]
+            kinds.append(kind)
+            first.append(start)
+            ends.append(0)
+            stack.append((None, -2 - stored))
+            push(zip(reversed(fields), range(start + len(fields) - 1, start - 1, -1)))
+        elif cls is str:
+            tag = STR
+            stored = strings.get(value)
+            if stored is None:
+                stored = strings[value] = len(flat.strings)
+                flat.strings.append(value)
+        elif value is None:
+            tag, stored = NONE, 0
+        elif cls is list or cls is dict:
+            items = value if cls is list else [x for pair in value.items() for x in pair]
+            tag, stored = (LIST if cls is list else DICT), len(list_first)
+            start = len(tags)
+            tags += [0] * len(items)
+            values += [0] * len(items)
+            list_first.append(start)
+            list_len.append(len(items))
+            push(zip(reversed(items), range(start + len(items) - 1, start - 1, -1)))
+        elif cls is float:
+            tag, stored = FLOAT, len(numbers)
+            numbers.append(value)
+        elif cls is bool:
+            tag, stored = BOOL, int(value)
+        elif cls is int:
+            tag, stored = INT, value
+        else:
+            raise TypeError(f"cannot flatten {cls.__name__}")
+        if slot >= 0:
+            tags[slot] = tag
+            values[slot] = stored
+        elif slot < -1:
+            ends[-2 - slot] = len(kinds)
+    flat.tags = array("B", tags)
+    flat.values = array("q", values)
+    flat.ends = array("I", ends)
+    return flat
+
+
+def unflatten(flat, index=0):
+    # Builds the dataclass tree for node `index`'s subtree, deepest nodes
+    # first so every child exists before its parent.
+    end = flat.ends[index]
+    built = [None] * (end - index)
+    node = lambda i: built[i - index]
+    kinds, first, tags, values, strings = flat.kinds, flat.first, flat.tags, flat.values, flat.strings
+    for i in range(end - 1, index - 1, -1):
+        kind = kinds[i]
+        start = first[i]
+        args = []
+        for slot in range(start, start + len(FIELDS[kind])):
+            tag = tags[slot]
+            if tag == NODE:
+                args.append(built[values[slot] - index])
+            elif tag == STR:
+                args.append(strings[values[slot]])
+            else:
+                args.append(flat._value(slot, node))
+        built[i - index] = KINDS[kind](*args)
+    return built[0]
@@ -0,0 +1,247 @@
+import struct
+import sys
+from math import copysign
+
+from hintzCompiler.src.flat_ir import FIELDS, GETTERS, KIND_INDEX, KINDS
+from hintzCompiler.src.ir_nodes import Program
+
+# .hzir: a compiled Program on disk.
+#
+#   b"HZIR", varint FORMAT_VERSION, the node schema (every KINDS class name
+#   with its field names), then each top-level declaration as one value,
+#   then END.
+#
+# A value is a tag byte and its payload: NODE + kind followed by the
+# node's fields in order, LIST/DICT with a varint count then the items
+# (a dict's alternate key and value), a string as NEW_STR (varint byte
+# length, UTF-8) the first time it is written and STR (varint index, in
+# order of first appearance) after that, INT/WHOLE_FLOAT as a zigzag
+# varint and FLOAT as a little-endian double.
+MAGIC = b"HZIR"
+FORMAT_VERSION = 1
+NONE, FALSE, TRUE, INT, FLOAT, WHOLE_FLOAT, STR, NEW_STR, LIST, DICT = range(10)
+NODE = 0x20
+END = 0xFF
+
+_FIELD_COUNTS = tuple(len(names) for names in FIELDS)
+_DOUBLE = struct.Struct("<d")
+_FLUSH_BYTES = 1 << 16
+
+
+def _schema():
+    return [[cls.__name__, *names] for cls, names in zip(KINDS, FIELDS)]
+
+
+def _put_varint(out, n):
+    while n > 0x7F:
+        out.append(n & 0x7F | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _get_varint(data, pos):
+    n = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        n |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return n, pos
+        shift += 7
+
+
+def _put_text(out, text):
+    data = text.encode("utf-8", "surrogatepass")
+    _put_varint(out, len(data))
+    out += data
+
+
+def _get_text(data, pos):
+    size, pos = _get_varint(data, pos)
+    return data[pos:pos + size].decode("utf-8", "surrogatepass"), pos + size
+
+
+class IRWriter:
+    # Writes top-level declarations to a binary file as they come (e.g.
+    # from iter_compile), buffering up to _FLUSH_BYTES at a time. The file
+    # is only complete once close() has written the END marker.
+
+    def __init__(self, f):
+        self.f = f
+        self.strings = {}
+        self.buffer = bytearray(MAGIC)
+        _put_varint(self.buffer, FORMAT_VERSION)
+        schema = _schema()
+        _put_varint(self.buffer, len(schema))
+        for names in schema:
+            _put_varint(self.buffer, len(names))
+            for name in names:
+                _put_text(self.buffer, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+
+    def write(self, node):
+        out = self.buffer
+        strings = self.strings
+        stack = [node]
+        pop, push = stack.pop, stack.extend
+        while stack:
+            value = pop()
+            cls = type(value)
+            kind = KIND_INDEX.get(cls)
+            if kind is not None:
+                out.append(NODE + kind)
+                push(reversed(GETTERS[kind](value)))
+            elif cls is str:
+                index = strings.get(value)
+                if index is None:
+                    strings[value] = len(strings)
+                    out.append(NEW_STR)
+                    _put_text(out, value)
+                else:
+                    out.append(STR)
+                    _put_varint(out, index)
+            elif value is None:
+                out.append(NONE)
+            elif cls is list:
+                out.append(LIST)
+                _put_varint(out, len(value))
+                push(reversed(value))
+            elif cls is float:
+                # Literals are floats, nearly all of them whole numbers.
+                if value.is_integer() and abs(value) < 2**53 and copysign(1.0, value) > 0:
+                    out.append(WHOLE_FLOAT)
+                    _put_varint(out, int(value) << 1)
+                else:
+                    out.append(FLOAT)
+                    out += _DOUBLE.pack(value)
+            elif cls is bool:
+                out.append(TRUE if value else FALSE)
+            elif cls is int:
+                out.append(INT)
+                _put_varint(out, value << 1 if value >= 0 else (-value << 1) - 1)
+            elif cls is dict:
+                out.append(DICT)
+                _put_varint(out, len(value))
+                push(reversed([x for pair in value.items() for x in pair]))
+            else:
+                raise TypeError(f"cannot write {cls.__name__} to .hzir")
+        if len(out) >= _FLUSH_BYTES:
+            self.flush()
+
+    def flush(self):
+        self.f.write(self.buffer)
+        self.buffer = bytearray()
+
+    def close(self):
+        self.buffer.append(END)
+        self.flush()
+
+
+def write_program(program, f):
+    with IRWriter(f) as writer:
+        for declaration in program.declarations:
+            writer.write(declaration)
+
+
+def iter_declarations(f):
+    # Yields the top-level declarations of a .hzir file one at a time.
+    data = f.read()
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError("not a .hzir file")
+    try:
+        version, pos = _get_varint(data, len(MAGIC))
+        if version != FORMAT_VERSION:
+            raise ValueError(f"unsupported .hzir version {version} (expected {FORMAT_VERSION})")
+        count, pos = _get_varint(data, pos)
+        schema = []
+        for _ in range(count):
+            size, pos = _get_varint(data, pos)
+            names = []
+            for _ in range(size):
+                name, pos = _get_text(data, pos)
+                names.append(name)
+            schema.append(names)
+        if schema != _schema():
+            raise ValueError(".hzir file was written for a different IR layout")
+
+        strings = []
+        while data[pos] != END:
+            declaration, pos = _read_value(data, pos, strings)
+            yield declaration
+    except IndexError:
+        raise ValueError("truncated .hzir file") from None
+
+
+def read_program(f):
+    return Program(declarations=list(iter_declarations(f)))
+
+
+def _read_value(data, pos, strings):
+    # Iterative: each open node, list or dict is a (maker, size, items)
+    # frame that is closed once it has all its items.
+    intern = sys.intern
+    field_counts = _FIELD_COUNTS
+    stack = []
+    while True:
+        tag = data[pos]
+        pos += 1
+        if tag >= NODE:
+            kind = tag - NODE
+            if field_counts[kind]:
+                stack.append((KINDS[kind], field_counts[kind], []))
+                continue
+            value = KINDS[kind]()
+        elif tag == STR:
+            index = data[pos]
+            if index < 0x80:
+                pos += 1
+            else:
+                index, pos = _get_varint(data, pos)
+            value = strings[index]
+        elif tag == NEW_STR:
+            value, pos = _get_text(data, pos)
+            value = intern(value)
+            strings.append(value)
+        elif tag == NONE:
+            value = None
+        elif tag == LIST or tag == DICT:
+            size, pos = _get_varint(data, pos)
+            if tag == DICT:
+                size *= 2
+            if size:
+                stack.append((tag, size, []))
+                continue
+            value = [] if tag == LIST else {}
+        elif tag == WHOLE_FLOAT or tag == INT:
+            n, pos = _get_varint(data, pos)
+            value = n >> 1 if not n & 1 else -((n + 1) >> 1)
+            if tag == WHOLE_FLOAT:
+                value = float(value)
+        elif tag == FLOAT:
+            value = _DOUBLE.unpack_from(data, pos)[0]
+            pos += 8
+        elif tag == TRUE or tag == FALSE:
+            value = tag == TRUE
+        else:
+            raise ValueError(f"bad .hzir tag {tag:#x} at offset {pos - 1}")
+
+        while stack:
+            make, size, items = stack[-1]
+            items.append(value)
+            if len(items) < size:
+                break
+            stack.pop()
+            if make == LIST:
+                value = items
+            elif make == DICT:
+                value = dict(zip(items[::2], items[1::2]))
+            else:
+                value = make(*items)
+        else:
+            return value, pos
@@ -1,62 +1,305 @@
+import io
+import sys
+import threading
 from dataclasses import dataclass
+from operator import attrgetter
 from typing import List, Optional, Union
-from lark import Token
+
+def ir_node(cls):
+    # @dataclass with a slot per field and no per-instance __dict__; this is
+    # what dataclass(slots=True) does, which needs Python 3.10. __repr__,
+    # __eq__ and __hash__ come from IRNode.
+    cls = dataclass(cls)
+    names = tuple(cls.__dict__.get("__annotations__", ()))
+    namespace = dict(cls.__dict__)
+    # The generated __repr__ and __eq__ are what IRNode's call, until the
+    # tree gets deep; IRNode.__hash__ stands in for the __hash__ = None that
+    # comes with a generated __eq__.
+    namespace["_dataclass_repr"] = namespace.pop("__repr__")
+    namespace["_dataclass_eq"] = namespace.pop("__eq__")
+    del namespace["__hash__"]
+    namespace["__slots__"] = names
+    namespace["_fields"] = fields = tuple(cls.__dataclass_fields__)  # field names in order, for walkers
+    namespace["_values"] = staticmethod(_values_getter(fields))
+    for name in names:
+        namespace.pop(name, None)  # defaults are kept by the generated __init__
+    namespace.pop("__dict__", None)
+    namespace.pop("__weakref__", None)
+    return type(cls)(cls.__name__, cls.__bases__, namespace)
+
+
+def _no_values(node):
+    return ()
+
+
+def _values_getter(fields):
+    # A function giving a node's field values as a tuple, in field order.
+    if len(fields) > 1:
+        return attrgetter(*fields)
+    if fields:
+        get = attrgetter(fields[0])
+        return lambda node: (get(node),)
+    return _no_values
+
 
 class IRNode:
+    # _hash caches the structural hash once something asks for it, so a node
+    # must not be changed after it has been hashed.
+    __slots__ = ("_hash",)
+    _fields = ()
+    _values = staticmethod(_no_values)
+
+    def __post_init__(self):
+        self._hash = None
+
+    # __repr__ and __eq__ recurse as the dataclass ones do, which is fastest,
+    # for the first _MAX_RECURSION levels of nesting; below that they carry
+    # on from an explicit stack, so depth doesn't matter.
+
+    def __repr__(self):
+        depth = _local.depth
+        if depth >= _MAX_RECURSION:
+            return _repr_from_stack(self)
+        _local.depth = depth + 1
+        try:
+            return self._dataclass_repr()
+        finally:
+            _local.depth = depth
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        if type(other) is type(self):
+            # Once both sides are hashed, different hashes settle it.
+            mine, theirs = self._hash, other._hash
+            if mine != theirs and mine is not None and theirs is not None:
+                return False
+        depth = _local.depth
+        if depth >= _MAX_RECURSION:
+            return _eq_from_stack(self, other)
+        _local.depth = depth + 1
+        try:
+            return self._dataclass_eq(other)
+        finally:
+            _local.depth = depth
+
+    def __hash__(self):
+        # Merkle-style: a node's hash is built from its class and its
+        # fields, with each child node standing in as its own (cached) hash.
+        # Unhashed nodes are gathered in preorder from an explicit stack and
+        # then hashed in reverse, so children always come before parents.
+        if self._hash is not None:
+            return self._hash
+        order = []
+        stack = [self]
+        pop, push = stack.pop, stack.extend
+        while stack:
+            node = pop()
+            if not isinstance(node, IRNode):
+                if type(node) is list:
+                    push(node)
+                elif type(node) is dict:
+                    push(node.values())
+                continue
+            if node._hash is not None:
+                continue
+            order.append(node)
+            push(node._values(node))
+        # Only nodes are kept in `order`, which stops the collector from
+        # running over and over as it grows.
+        for node in reversed(order):
+            key = [node.__class__]
+            for value in node._values(node):
+                if isinstance(value, IRNode):
+                    key.append(value._hash)
+                elif type(value) is list or type(value) is dict:
+                    key.append(_key(value))
+                else:
+                    key.append(value)
+            node._hash = hash(tuple(key))
+        return self._hash
+
+    def __getstate__(self):
+        # Without the hash: str hashes differ from one process to the next.
+        state = {name: getattr(self, name) for name in self._fields}
+        state["_hash"] = None
+        return None, state
+
     def dump(self, indent=0):
-        pad = '  ' * indent
-        print(f"{pad}{self.__class__.__name__}:")
-        for field in self.__dataclass_fields__:
-            value = getattr(self, field)
-            if isinstance(value, list):
-                print(f"{pad}  {field}: [")
-                for v in value:
-                    if isinstance(v, IRNode):
-                        v.dump(indent + 2)
-                    else:
-                        print(f"{pad}    {v}")
-                print(f"{pad}  ]")
-            elif isinstance(value, IRNode):
-                print(f"{pad}  {field}:")
-                value.dump(indent + 2)
-            else:
-                print(f"{pad}  {field}: {value}")
-
-@dataclass
+        self.write(sys.stdout, indent)
+
+    def to_string(self, indent=0):
+        buf = io.StringIO()
+        self.write(buf, indent)
+        return buf.getvalue()
+
+    def write(self, f, indent=0):
+        # The text dump() prints, built from an explicit stack rather than
+        # by recursion (so nesting depth doesn't matter) and handed to
+        # f.write in chunks of about _WRITE_CHUNK lines.
+        out = []
+        stack = [(self, indent)]
+        pop = stack.pop
+        while stack:
+            item = pop()
+            if type(item) is str:
+                out.append(item)
+                continue
+            node, indent = item
+            pad = '  ' * indent
+            out.append(f"{pad}{node.__class__.__name__}:\n")
+            later = []
+            for field in node._fields:
+                value = getattr(node, field)
+                if isinstance(value, list):
+                    later.append(f"{pad}  {field}: [\n")
+                    for v in value:
+                        if isinstance(v, IRNode):
+                            later.append((v, indent + 2))
+                        else:
+                            later.append(f"{pad}    {v}\n")
+                    later.append(f"{pad}  ]\n")
+                elif isinstance(value, IRNode):
+                    later.append(f"{pad}  {field}:\n")
+                    later.append((value, indent + 2))
+                else:
+                    later.append(f"{pad}  {field}: {value}\n")
+            stack.extend(reversed(later))
+            if len(out) >= _WRITE_CHUNK:
+                f.write("".join(out))
+                out.clear()
+        f.write("".join(out))
+
+
+_WRITE_CHUNK = 4096
+
+
+_MAX_RECURSION = 50
+
+
+class _Depth(threading.local):
+    depth = 0  # how many __repr__/__eq__ calls are on this thread's stack
+
+
+_local = _Depth()
+
+
+def _repr_from_stack(node):
+    # The stack holds text still to be written (already repr'd values
+    # included) and nodes, lists and dicts still to be expanded.
+    out = []
+    stack = [node]
+    pop, push = stack.pop, stack.extend
+    while stack:
+        item = pop()
+        if type(item) is str:
+            out.append(item)
+            continue
+        parts = []
+        if isinstance(item, IRNode):
+            parts.append(f"{item.__class__.__qualname__}(")
+            for name, value in zip(item._fields, item._values(item)):
+                parts.append(f", {name}=" if len(parts) > 1 else f"{name}=")
+                parts.append(_repr_part(value))
+            parts.append(")")
+        elif type(item) is list:
+            parts.append("[")
+            for value in item:
+                if len(parts) > 1:
+                    parts.append(", ")
+                parts.append(_repr_part(value))
+            parts.append("]")
+        else:
+            parts.append("{")
+            for key, value in item.items():
+                parts.append(f", {key!r}: " if len(parts) > 1 else f"{key!r}: ")
+                parts.append(_repr_part(value))
+            parts.append("}")
+        push(reversed(parts))
+    return "".join(out)
+
+
+def _eq_from_stack(a, b):
+    # Two nodes of the same class, compared from a stack of node pairs.
+    stack = [(a, b)]
+    pop, push = stack.pop, stack.append
+    while stack:
+        a, b = pop()
+        if type(a) is type(b):
+            mine, theirs = a._hash, b._hash
+            if mine != theirs and mine is not None and theirs is not None:
+                return False
+        values = a._values
+        pairs = list(zip(values(a), values(b)))
+        for x, y in pairs:  # grows as list fields are opened up
+            if x is y:
+                continue
+            if isinstance(x, IRNode):
+                if y.__class__ is not x.__class__:
+                    return False
+                push((x, y))
+            elif type(x) is list and type(y) is list:
+                if len(x) != len(y):
+                    return False
+                pairs.extend(zip(x, y))
+            elif not x == y:
+                return False
+    return True
+
+
+def _repr_part(value):
+    if isinstance(value, IRNode) or type(value) is list or type(value) is dict:
+        return value
+    return repr(value)
+
+
+def _key(value):
+    # A hashable stand-in for a list or dict field, nodes in it already hashed.
+    if isinstance(value, IRNode):
+        return value._hash
+    if type(value) is list:
+        return tuple(map(_key, value))
+    if type(value) is dict:
+        return frozenset((key, _key(v)) for key, v in value.items())
+    return value
+
+@ir_node
 class Program(IRNode):
     declarations: List[IRNode]
 
-@dataclass
+@ir_node
 class Function(IRNode):
     return_type: str
     name: str
     params: List['Variable']
     body: IRNode
 
-@dataclass
+@ir_node
 class Variable(IRNode):
     name: str
     type_spec: Optional[str]
     attributes: dict = None
 
-@dataclass
+@ir_node
 class BinaryOp(IRNode):
     op: str
     left: IRNode
     right: IRNode
 
-@dataclass
+@ir_node
 class UnaryOp(IRNode):
-    op: Token
+    op: str
     operand: IRNode
     is_postfix: bool = False
 
-@dataclass
+@ir_node
 class Assignment(IRNode):
     target: IRNode
     value: IRNode
 
-@dataclass
+@ir_node
 class If(IRNode):
     condition: IRNode
     then_branch: IRNode
@@ -65,53 +308,53 @@ class If(IRNode):
     def __str__(self):
         return f"If {self.condition}"
 
-@dataclass
+@ir_node
 class While(IRNode):
     condition: IRNode
     body: IRNode
 
-@dataclass
+@ir_node
 class DoWhile(IRNode):
     body: IRNode
     condition: IRNode
 
-@dataclass
+@ir_node
 class Return(IRNode):
     value: Optional[IRNode]
 
-@dataclass
+@ir_node
 class Block(IRNode):
     statements: List[IRNode]
 
-@dataclass
+@ir_node
 class Call(IRNode):
     func: str
     args: List[IRNode]
 
-@dataclass
+@ir_node
 class Literal(IRNode):
     value: Union[int, float, str]
 
-@dataclass
+@ir_node
 class Identifier(IRNode):
     name: str
 
-@dataclass
-class FieldAccess:
+@ir_node
+class FieldAccess(IRNode):
     base: 'IRNode'  # e.g., Identifier('s')
     field: str      # e.g., 'f'
 
-@dataclass
-class ArrayAccess:
+@ir_node
+class ArrayAccess(IRNode):
     base: 'IRNode'  # e.g., Identifier('m')
     index: 'IRNode' # e.g., Literal(2)
 
-@dataclass
-class FunctionCall:
+@ir_node
+class FunctionCall(IRNode):
     name: str
     args: list
 
-@dataclass
+@ir_node
 class For(IRNode):
     init: Optional[IRNode]
     condition: Optional[IRNode]
@@ -121,15 +364,15 @@ class For(IRNode):
     def __str__(self):
         return "for(init; cond; update)"
 
-@dataclass
+@ir_node
 class Goto(IRNode):
     label: str
 
-@dataclass
+@ir_node
 class Label(IRNode):
     name: str
 
-@dataclass
+@ir_node
 class Switch(IRNode):
     expr: IRNode
     cases: List["Case"]
@@ -137,19 +380,19 @@ class Switch(IRNode):
     def __str__(self):
         return f"switch {self.expr}"
 
-@dataclass
+@ir_node
 class Case(IRNode):
     value: Optional[IRNode]  # None for default
     body: Block
 
-@dataclass
+@ir_node
 class Break(IRNode):
     pass
 
-@dataclass
+@ir_node
 class SwitchJoin(IRNode):
     pass
 
-@dataclass
+@ir_node
 class IfJoin(IRNode):
     pass
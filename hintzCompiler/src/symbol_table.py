@@ -11,39 +11,135 @@ class Symbol:
         return f"<Symbol {self.name}: type={self.type}, attrs={self.attributes}>"
 
 class SymbolTable:
+    # One scope. `symbols` holds what this scope defines; while the scope is
+    # open in a ScopedSymbolTableManager its symbols are also bound there,
+    # which is what makes lookups from the innermost scope a dict access.
+
     def __init__(self, parent: Optional['SymbolTable'] = None):
         self.symbols: Dict[str, Symbol] = {}
         self.parent = parent
+        self._manager: Optional['ScopedSymbolTableManager'] = None
+        self._shadowed: Dict[str, Symbol] = {}  # outer bindings of names this scope redefines
 
     def dump(self, indent=0):
-        pad = "  " * indent
-        print(f"{pad}Symbol Table:")
-        for name, sym in self.symbols.items():
-            print(f"{pad}  {name}: {sym}")
-        if self.parent:
-            print(f"{pad}  ↑ Parent scope:")
-            self.parent.dump(indent + 1)
+        scope = self
+        while scope is not None:
+            pad = "  " * indent
+            print(f"{pad}Symbol Table:")
+            for name, sym in scope.symbols.items():
+                print(f"{pad}  {name}: {sym}")
+            if scope.parent:
+                print(f"{pad}  ↑ Parent scope:")
+            scope = scope.parent
+            indent += 1
 
     def define(self, symbol: Symbol):
-        if symbol.name in self.symbols:
-            raise RuntimeError(f"Symbol '{symbol.name}' already declared.")
-        self.symbols[symbol.name] = symbol
+        name = symbol.name
+        if name in self.symbols:
+            raise RuntimeError(f"Symbol '{name}' already declared.")
+        self.symbols[name] = symbol
+        manager = self._manager
+        if manager is None:
+            return
+        if manager.current_scope is self:
+            bindings = manager._bindings
+            outer = bindings.get(name)
+            if outer is not None:
+                self._shadowed[name] = outer
+            bindings[name] = symbol
+        else:
+            manager._bind(self, symbol)
+
+    def remove(self, name: str):
+        del self.symbols[name]
+        if self._manager is not None:
+            self._manager._unbind(self, name)
 
     def lookup(self, name: str) -> Optional[Symbol]:
-        return self.symbols.get(name) or (self.parent.lookup(name) if self.parent else None)
+        symbol = self.symbols.get(name)
+        if symbol is not None:
+            return symbol
+        manager = self._manager
+        if manager is not None and manager.current_scope is self:
+            return manager._bindings.get(name)
+        scope = self.parent
+        while scope is not None:
+            symbol = scope.symbols.get(name)
+            if symbol is not None:
+                return symbol
+            scope = scope.parent
+        return None
 
     def __repr__(self):
         return "\n".join(f"{name}: {sym}" for name, sym in self.symbols.items())
 
 class ScopedSymbolTableManager:
+    # Every name visible from the current scope maps to its innermost
+    # binding, so lookup() is one dict access whatever the nesting depth.
+    # The rest of each name's stack of bindings is threaded through the open
+    # scopes: a scope that redefines a name keeps the binding it hid, and
+    # popping the scope puts back exactly what it changed.
+
     def __init__(self):
+        self._bindings: Dict[str, Symbol] = {}
         self.global_scope = SymbolTable()
+        self.global_scope._manager = self
         self.current_scope = self.global_scope
 
     def push_scope(self):
-        self.current_scope = SymbolTable(parent=self.current_scope)
+        scope = SymbolTable(parent=self.current_scope)
+        scope._manager = self
+        self.current_scope = scope
 
     def pop_scope(self):
-        if self.current_scope.parent is None:
+        scope = self.current_scope
+        if scope.parent is None:
             raise RuntimeError("Can't pop the global scope.")
-        self.current_scope = self.current_scope.parent
+        bindings = self._bindings
+        shadowed = scope._shadowed
+        for name in scope.symbols:
+            outer = shadowed.get(name)
+            if outer is None:
+                del bindings[name]
+            else:
+                bindings[name] = outer
+        scope._shadowed = {}
+        scope._manager = None
+        self.current_scope = scope.parent
+
+    def define(self, symbol: Symbol):
+        self.current_scope.define(symbol)
+
+    def lookup(self, name: str) -> Optional[Symbol]:
+        return self._bindings.get(name)
+
+    # Changes to a scope other than the current one (an outer scope still
+    # open underneath it) have to go under whatever the scopes nested inside
+    # it bind for the same name.
+
+    def _bind(self, scope, symbol):
+        inner = self._inner_binder(scope, symbol.name)
+        slot = inner._shadowed if inner is not None else self._bindings
+        outer = slot.get(symbol.name)
+        if outer is not None:
+            scope._shadowed[symbol.name] = outer
+        slot[symbol.name] = symbol
+
+    def _unbind(self, scope, name):
+        inner = self._inner_binder(scope, name)
+        slot = inner._shadowed if inner is not None else self._bindings
+        outer = scope._shadowed.pop(name, None)
+        if outer is not None:
+            slot[name] = outer
+        else:
+            del slot[name]
+
+    def _inner_binder(self, scope, name):
+        # The outermost open scope inside `scope` that defines `name`, if any.
+        found = None
+        inner = self.current_scope
+        while inner is not scope:
+            if name in inner.symbols:
+                found = inner
+            inner = inner.parent
+        return found
@@ -1,17 +1,76 @@
-from lark import Transformer, Token, Tree
+import sys
+
+from hintzCompiler.lark_runtime import Transformer, Token, Tree
 from hintzCompiler.src.ir_nodes import *
 from hintzCompiler.src.symbol_table import Symbol, ScopedSymbolTableManager
 
-class IRTransformer(Transformer):
 
-    def __init__(self):
+def _intern(value):
+    # sys.intern only takes exact str, not Token (a str subclass).
+    return sys.intern(str(value))
+
+
+class IRTransformer(Transformer):
+    # Operators, names and type specifiers are interned rather than kept as
+    # lark Tokens (or per-occurrence copies of them), so the IR holds no
+    # lark objects and each distinct string is stored once.
+    #
+    # With hash_cons, expression nodes are hash-consed as well: a
+    # subexpression equal to one already built is replaced by that node, so
+    # repeated expressions share one subtree (and compare by identity).
+    # Statements are always separate nodes.
+
+    def __init__(self, hash_cons=False):
         self.symtab_manager = ScopedSymbolTableManager()
+        self._consed = {} if hash_cons else None
 
     def __default__(self, data, children, meta):
+        if data.startswith("_"):
+            # lark's own helper rules (e.g. `__compound_stmt_star_4`). Only
+            # reached when running inside the parser, which splices their
+            # children into the parent rule and so needs a real Tree back.
+            return Tree(data, children, meta)
         print(f"DEFAULT HANDLER: Rule `{data}` with children: {children}")
         print(f"META: {meta}")
         return children
 
+    def transform(self, tree):
+        # lark's Transformer.transform (for the --debug path, which builds
+        # the parse tree first) without its recursion, which would need
+        # Python frames in proportion to how deeply the source nests:
+        # trees are expanded from an explicit stack and their callbacks run
+        # once all their children are done.
+        results = []
+        stack = [tree]
+        pop, push = stack.pop, stack.extend
+        while stack:
+            item = pop()
+            if type(item) is tuple:  # (tree,): its children are on results
+                tree = item[0]
+                start = len(results) - len(tree.children)
+                children = results[start:]
+                del results[start:]
+                results.append(self._call_userfunc(tree, children))
+            elif isinstance(item, Tree):
+                stack.append((item,))
+                push(reversed(item.children))
+            elif self.__visit_tokens__ and isinstance(item, Token):
+                results.append(self._call_userfunc_token(item))
+            else:
+                results.append(item)
+        return results[0]
+
+    def reset(self, symtab_manager=None, hash_cons=False):
+        if symtab_manager is None:
+            symtab_manager = ScopedSymbolTableManager()
+        self.symtab_manager = symtab_manager
+        self._consed = {} if hash_cons else None
+
+    def _cons(self, node):
+        if self._consed is None:
+            return node
+        return self._consed.setdefault(node, node)
+
     def get_global_symbol_table(self):
         return self.symtab_manager.global_scope
 
@@ -26,6 +85,9 @@ class IRTransformer(Transformer):
                 flat.append(item)
         return Program(declarations=flat)
 
+    def top_level(self, items):
+        return items[0]
+
     def start(self, items):
         return items[0]
 
@@ -41,11 +103,11 @@ class IRTransformer(Transformer):
     def struct_def(self, items):
         # Expecting:
         # [IDENT, ..., struct_body_tree, ...]
-        name = str(items[0])  # items[1] is IDENT
+        name = _intern(items[0])  # items[1] is IDENT
         struct_body = items[2]  # items[3] is Tree('struct_body', [...])
 
         fields = {}
-        for field_type, field_name in struct_body:
+        for field_name, field_type in struct_body:
             fields[field_name] = field_type
 
         self.symtab_manager.current_scope.define(
@@ -56,8 +118,8 @@ class IRTransformer(Transformer):
     def struct_body(self, items):
         fields = []
         for i in range(0, len(items), 3):
-            type_spec = str(items[i])
-            name = str(items[i + 1])
+            type_spec = _intern(items[i])
+            name = _intern(items[i + 1])
             fields.append((name, type_spec))
         return fields
 
@@ -65,9 +127,9 @@ class IRTransformer(Transformer):
         if not items:
             raise ValueError("Empty type_specifier encountered. Check grammar or parser output.") 
 
-        if isinstance(items[0], Tree) and items[0].data == "struct_type":
-            return f"struct {items[0].children[0]}"
-        return str(items[0])
+        if isinstance(items[0], Token) and items[0].type == "IDENT":  # from struct_type
+            return _intern(f"struct {items[0]}")
+        return _intern(items[0])
 
 
     def struct_type(self, items):
@@ -77,9 +139,9 @@ class IRTransformer(Transformer):
         return items
 
     def declarator(self, items):
-        name = str(items[0])
-        if len(items) == 2:
-            return Variable(name=name, type_spec="matrix", attributes={"dimensions": [int(items[1])]})
+        name = _intern(items[0])
+        if len(items) > 1:  # IDENT LSQB NUMBER RSQB
+            return Variable(name=name, type_spec="matrix", attributes={"dimensions": [int(items[2])]})
         return Variable(name=name, type_spec=None)
 
     def declaration(self, items):
@@ -101,7 +163,7 @@ class IRTransformer(Transformer):
 
     def function_def(self, items):
         return_type = items[0]
-        name = str(items[1])
+        name = _intern(items[1])
         params = []
         body = items[2]
         if len(items) == 5:
@@ -118,7 +180,7 @@ class IRTransformer(Transformer):
         return Function(return_type=return_type, name=name, params=params, body=body)
 
     def param_list(self, items):
-        return items
+        return items[::2]  # param (COMMA param)*
 
     def compound_stmt(self, items):
         innerS = items[1:-1]
@@ -153,32 +215,34 @@ class IRTransformer(Transformer):
             return items[0]
         node = items[0]
         for i in range(1, len(items), 2):
-            node = BinaryOp(op=items[i], left=node, right=items[i+1])
+            node = self._cons(BinaryOp(op=_intern(items[i]), left=node, right=items[i+1]))
         return node
 
     def primary(self, items):
+        if len(items) == 3:  # LPAR expr RPAR
+            return items[1]
         tok = items[0]
         if isinstance(tok, Token):
             if tok.type == "NUMBER":
-                return Literal(value=float(tok))
+                return self._cons(Literal(value=float(tok)))
             elif tok.type == "STRING":
-                return Literal(value=str(tok)[1:-1])
+                return self._cons(Literal(value=str(tok)[1:-1]))
             elif tok.type == "IDENT":
-                return Identifier(name=str(tok))
+                return self._cons(Identifier(name=_intern(tok)))
         return tok  # already a transformed node (e.g., func_call, array_access, etc.)
 
     def param(self, items):
-        return Variable(name=str(items[1]), type_spec=str(items[0]))
+        return Variable(name=_intern(items[1]), type_spec=_intern(items[0]))
 
     def unary(self, children):
         if len(children) == 2 and isinstance(children[1], Token):
             # postfix: primary ++ or primary --
             expr, op = children
-            return UnaryOp(op=op, operand=expr, is_postfix=True)
+            return self._cons(UnaryOp(op=_intern(op), operand=expr, is_postfix=True))
         elif len(children) == 2 and isinstance(children[0], Token):
             # prefix: ++ expr
             op, expr = children
-            return UnaryOp(op=op, operand=expr, is_postfix=False)
+            return self._cons(UnaryOp(op=_intern(op), operand=expr, is_postfix=False))
         else:
             return children[0]
 
@@ -189,30 +253,26 @@ class IRTransformer(Transformer):
         return items[0]  # usually an expr_stmt or compound_stmt
 
     def field_access(self, items):
-        base = Identifier(name=str(items[0]))
-        field = str(items[2])
-        return FieldAccess(base=base, field=field)
+        base = items[0]  # already an Identifier, FieldAccess, ArrayAccess, ...
+        field = _intern(items[2])
+        return self._cons(FieldAccess(base=base, field=field))
 
     def array_access(self, items):
-        base = Identifier(name=str(items[0]))
+        base = items[0]
         index = items[2]
-        return ArrayAccess(base=base, index=index)
+        return self._cons(ArrayAccess(base=base, index=index))
 
     def return_stmt(self, items):
-        if len(items) >= 1:
+        # [expr, ';'] or just [';']
+        if len(items) == 2:
             return Return(items[0])
         return Return(None);
 
     def func_call(self, items):
-        name = str(items[0])
-        if len(items) > 1:
-            args = items[1:]
-            if isinstance(args[0], list):  # for grouped arguments
-                args = args[0]
-        else:
-            args = []
-
-        return FunctionCall(name=name, args=args)
+        # IDENT LPAR (expr (COMMA expr)*)? RPAR
+        name = _intern(items[0])
+        args = items[2:-1:2]
+        return self._cons(FunctionCall(name=name, args=args))
 
     def if_stmt(self, children):
         # children: ['(', condition, ')', then_stmt, (optional) else_stmt]
@@ -253,16 +313,17 @@ class IRTransformer(Transformer):
         return While(condition=cond, body=body)
 
     def do_while_stmt(self, children):
-        body = children[1];
-        cond = children[4];
+        # [body_stmt, '(', cond_expr, ')', ';']
+        body = children[0];
+        cond = children[2];
         return DoWhile(body=body, condition=cond)
 
     def goto_stmt(self, children):
-        label = children[0].value  # IDENT
+        label = _intern(children[0].value)  # IDENT
         return Goto(label=label)
 
     def label_stmt(self, children):
-        label = children[0].value  # IDENT
+        label = _intern(children[0].value)  # IDENT
         return Label(name=label)
 
     def break_stmt(self, _):
@@ -281,3 +342,29 @@ class IRTransformer(Transformer):
         expr = children[1]
         cases = children[4:-1]
         return Switch(expr=expr, cases=cases)
+
+
+class StreamingIRTransformer(IRTransformer):
+    # Collects each top-level Function/Variable in `ready` as soon as it is
+    # reduced and hands `program` nothing, so the parser's value stack never
+    # holds more than the declaration currently being parsed.
+
+    def __init__(self):
+        super().__init__()
+        self.ready = []
+
+    def reset(self, symtab_manager=None, hash_cons=False):
+        super().reset(symtab_manager, hash_cons)
+        self.ready = []
+
+    def drain(self):
+        ready, self.ready = self.ready, []
+        return ready
+
+    def top_level(self, items):
+        item = items[0]
+        if isinstance(item, list):
+            self.ready.extend(item)
+        elif item is not None:  # struct_def only records a symbol
+            self.ready.append(item)
+        return None
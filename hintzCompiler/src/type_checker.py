@@ -0,0 +1,370 @@
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from hintzCompiler.src.ir_nodes import ArrayAccess, FieldAccess, Function, Identifier
+from hintzCompiler.src.symbol_table import ScopedSymbolTableManager, Symbol, SymbolTable
+from hintzCompiler.src.visitor import IRVisitor
+
+# Types are strings: a scalar ("int"), "struct P", a matrix with its
+# dimensions ("float[4][8]"), MATRIX, "string" for string literals, and
+# ERROR for an expression that already failed to check, which keeps one
+# mistake from being reported again by every expression around it.
+ERROR = "<error>"
+# The `matrix` type: doubles, in a shape only known at run time, so a
+# variable holds a pointer-sized handle to them. It is indexed like a
+# one-dimensional matrix and, unlike fixed ones, can be assigned.
+MATRIX = "matrix"
+_MATRIX_ELEMENT = "double"
+_HANDLE_SIZE = 8
+
+SCALAR_SIZES = {"char": 1, "int": 4, "float": 4, "double": 8}
+_RANK = {"char": 0, "int": 1, "float": 2, "double": 3}
+_INTEGRAL = ("char", "int")
+
+_ARITHMETIC_OPS = ("+", "-", "*", "/")
+_COMPARISON_OPS = ("<", ">", "<=", ">=", "==", "!=")
+_LOGICAL_OPS = ("&&", "||")
+
+
+@dataclass
+class FieldLayout:
+    name: str
+    type: str
+    offset: int
+    size: int
+
+
+@dataclass
+class StructLayout:
+    name: str  # "struct P"
+    size: int
+    align: int
+    fields: Dict[str, FieldLayout]  # in declaration order
+
+
+@dataclass
+class MatrixLayout:
+    element_type: str
+    dimensions: List[int]
+    element_size: int
+    strides: List[int]  # bytes between consecutive indices of each dimension, row-major
+    size: int
+
+
+def matrix_type(element_type, dimensions):
+    return element_type + "".join(f"[{n}]" for n in dimensions)
+
+
+def _element_of(matrix):
+    # "int[4][8]" -> "int[8]", "int[4]" -> "int"
+    head, _, rest = matrix.partition("[")
+    return head + rest[rest.index("]") + 1:]
+
+
+def _promote(a, b):
+    # Usual arithmetic conversions; char is promoted to int.
+    return max(a, b, "int", key=_RANK.__getitem__)
+
+
+class TypeChecker(IRVisitor):
+    # Resolves the type of every expression in a Program, bottom-up, and
+    # checks identifiers, field and matrix accesses, assignments, calls,
+    # returns and conditions against the declarations in scope. Problems
+    # are collected in `errors` rather than raised.
+    #
+    # Each expression's type is computed once, from its children's, and
+    # kept by node identity: type_of() is a dict lookup. Struct layouts
+    # (field offsets and sizes) and matrix layouts (strides) are built once
+    # per type, before anything is checked, and looked up by type string.
+    #
+    # Struct definitions only exist in the symbol table, so the
+    # transformer's global scope is passed in for them. In hash-consed IR
+    # one node may stand for several occurrences; it keeps the type of the
+    # last one checked.
+
+    def __init__(self, symbols: Optional[SymbolTable] = None):
+        self.errors: List[str] = []
+        self.types: Dict[int, str] = {}
+        self.struct_layouts: Dict[str, StructLayout] = {}
+        self.matrix_layouts: Dict[str, MatrixLayout] = {
+            MATRIX: MatrixLayout(_MATRIX_ELEMENT, [], SCALAR_SIZES[_MATRIX_ELEMENT], [], _HANDLE_SIZE),
+        }
+        self.scopes = ScopedSymbolTableManager()
+        self._return_type = None
+        self._body = None
+        if symbols is not None:
+            self._layout_structs([s for s in symbols.symbols.values() if s.type == "struct"])
+
+    def type_of(self, node) -> Optional[str]:
+        return self.types.get(id(node))
+
+    def size_of(self, type_) -> int:
+        if type_ in SCALAR_SIZES:
+            return SCALAR_SIZES[type_]
+        layout = self.struct_layouts.get(type_) or self.matrix_layouts.get(type_)
+        return layout.size if layout is not None else 0
+
+    def check(self, program) -> List[str]:
+        # Every function is declared up front, so calls may come before
+        # the definition (the grammar has no prototypes).
+        for decl in program.declarations:
+            if isinstance(decl, Function):
+                params = [param.type_spec for param in decl.params]
+                self._define(Symbol(decl.name, decl.return_type, {"params": params}))
+        self.visit(program)
+        return self.errors
+
+    # Layouts
+
+    def _layout_structs(self, symbols):
+        pending = {f"struct {s.name}": s for s in symbols}
+        for name in pending:
+            if name in self.struct_layouts:
+                continue
+            # Depth-first over by-value struct fields, from an explicit
+            # stack; a struct that contains itself is reported, not looped on.
+            stack, open_ = [name], {name}
+            while stack:
+                current = stack[-1]
+                fields = pending[current].attributes["fields"]
+                missing = [t for t in fields.values()
+                           if t in pending and t not in self.struct_layouts and t not in open_]
+                if missing:
+                    stack.append(missing[0])
+                    open_.add(missing[0])
+                    continue
+                self.struct_layouts[current] = self._struct_layout(current, fields, open_)
+                stack.pop()
+                open_.discard(current)
+
+    def _struct_layout(self, name, fields, open_):
+        # C-style: each field at the next offset aligned for its type, the
+        # whole struct padded to a multiple of its largest alignment.
+        offset, align, layouts = 0, 1, {}
+        for field_name, field_type in fields.items():
+            if field_type in open_:
+                self.errors.append(f"{name} contains {field_type}, which contains {name}")
+                size, field_align = 0, 1
+            else:
+                size, field_align = self._size_and_align(field_type, f"field '{field_name}' of {name}")
+            offset = -(-offset // field_align) * field_align
+            layouts[field_name] = FieldLayout(field_name, field_type, offset, size)
+            offset += size
+            align = max(align, field_align)
+        return StructLayout(name, -(-offset // align) * align, align, layouts)
+
+    def _size_and_align(self, type_, what):
+        if type_ in SCALAR_SIZES:
+            return SCALAR_SIZES[type_], SCALAR_SIZES[type_]
+        layout = self.struct_layouts.get(type_)
+        if layout is not None:
+            return layout.size, layout.align
+        if type_ == MATRIX:
+            return _HANDLE_SIZE, _HANDLE_SIZE
+        self.errors.append(f"{what} has unknown type '{type_}'")
+        return 0, 1
+
+    def _matrix_layout(self, element_type, dimensions):
+        name = matrix_type(element_type, dimensions)
+        if name not in self.matrix_layouts:
+            element_size = self.size_of(element_type)
+            strides = []
+            stride = element_size
+            for n in reversed(dimensions):
+                strides.append(stride)
+                stride *= n
+            strides.reverse()
+            self.matrix_layouts[name] = MatrixLayout(element_type, list(dimensions), element_size, strides, stride)
+        return name
+
+    # Declarations and scopes
+
+    def _define(self, symbol):
+        try:
+            self.scopes.define(symbol)
+        except RuntimeError:
+            self.errors.append(f"'{symbol.name}' redeclared")
+
+    def visit_Function(self, node):
+        self._return_type = node.return_type
+        self._body = node.body
+        self.scopes.push_scope()  # parameters and the body's own declarations
+
+    def leave_Function(self, node):
+        self.scopes.pop_scope()
+        self._return_type = None
+
+    def visit_Block(self, node):
+        if node is not self._body:
+            self.scopes.push_scope()
+
+    def leave_Block(self, node):
+        if node is not self._body:
+            self.scopes.pop_scope()
+
+    def visit_Variable(self, node):
+        type_ = node.type_spec
+        if type_ not in SCALAR_SIZES and type_ not in self.struct_layouts and type_ != MATRIX:
+            self.errors.append(f"'{node.name}' has unknown type '{type_}'")
+            type_ = ERROR
+        elif node.attributes and "dimensions" in node.attributes:
+            type_ = self._matrix_layout(type_, node.attributes["dimensions"])
+        self._define(Symbol(node.name, type_))
+
+    # Expressions
+
+    def _set(self, node, type_):
+        self.types[id(node)] = type_
+
+    def _error(self, node, message):
+        self.errors.append(message)
+        self.types[id(node)] = ERROR
+
+    def leave_Literal(self, node):
+        value = node.value
+        if isinstance(value, str):
+            self._set(node, "string")
+        else:
+            # Numbers all come out of the parser as floats.
+            self._set(node, "int" if float(value).is_integer() else "double")
+
+    def leave_Identifier(self, node):
+        symbol = self.scopes.lookup(node.name)
+        if symbol is None:
+            self._error(node, f"'{node.name}' undeclared")
+        elif "params" in symbol.attributes:
+            self._error(node, f"function '{node.name}' used as a value")
+        else:
+            self._set(node, symbol.type)
+
+    def leave_FieldAccess(self, node):
+        base = self.types[id(node.base)]
+        if base == ERROR:
+            return self._set(node, ERROR)
+        layout = self.struct_layouts.get(base)
+        if layout is None:
+            return self._error(node, f"field '{node.field}' of non-struct type '{base}'")
+        field = layout.fields.get(node.field)
+        if field is None:
+            return self._error(node, f"{base} has no field '{node.field}'")
+        self._set(node, field.type)
+
+    def leave_ArrayAccess(self, node):
+        types = self.types
+        base, index = types[id(node.base)], types[id(node.index)]
+        if base == ERROR or index == ERROR:
+            return self._set(node, ERROR)
+        if index not in _INTEGRAL:
+            self.errors.append(f"matrix index of type '{index}'")
+        if base == MATRIX:
+            return self._set(node, _MATRIX_ELEMENT)
+        if not base.endswith("]"):
+            return self._error(node, f"indexing non-matrix type '{base}'")
+        self._set(node, _element_of(base))
+
+    def leave_UnaryOp(self, node):
+        operand = self.types[id(node.operand)]
+        if operand == ERROR:
+            return self._set(node, ERROR)
+        if operand not in _RANK:
+            return self._error(node, f"operand of '{node.op}' has type '{operand}'")
+        if node.op in ("++", "--") and not isinstance(node.operand, (Identifier, FieldAccess, ArrayAccess)):
+            return self._error(node, f"operand of '{node.op}' is not assignable")
+        if node.op == "!":
+            return self._set(node, "int")
+        self._set(node, operand if node.op in ("++", "--") else _promote(operand, operand))
+
+    def leave_BinaryOp(self, node):
+        types, op = self.types, node.op
+        left, right = types[id(node.left)], types[id(node.right)]
+        if left == ERROR or right == ERROR:
+            return self._set(node, ERROR)
+        if left not in _RANK or right not in _RANK:
+            return self._error(node, f"'{op}' on '{left}' and '{right}'")
+        if op in _ARITHMETIC_OPS:
+            self._set(node, _promote(left, right))
+        elif op == "%":
+            if left not in _INTEGRAL or right not in _INTEGRAL:
+                return self._error(node, f"'%' on '{left}' and '{right}'")
+            self._set(node, "int")
+        elif op in _COMPARISON_OPS or op in _LOGICAL_OPS:
+            self._set(node, "int")
+        else:
+            self._error(node, f"unknown operator '{op}'")
+
+    def leave_Assignment(self, node):
+        types = self.types
+        target, value = types[id(node.target)], types[id(node.value)]
+        if target == ERROR or value == ERROR:
+            return self._set(node, ERROR)
+        if not isinstance(node.target, (Identifier, FieldAccess, ArrayAccess)) or target.endswith("]"):
+            return self._error(node, f"cannot assign to an expression of type '{target}'")
+        if not self._assignable(value, target):
+            return self._error(node, f"cannot assign '{value}' to '{target}'")
+        self._set(node, target)
+
+    def leave_FunctionCall(self, node):
+        self._check_call(node, node.name, node.args)
+
+    def leave_Call(self, node):
+        self._check_call(node, node.func, node.args)
+
+    def _check_call(self, node, name, args):
+        symbol = self.scopes.lookup(name)
+        if symbol is None or "params" not in symbol.attributes:
+            return self._error(node, f"call to undeclared function '{name}'")
+        params = symbol.attributes["params"]
+        if len(args) != len(params):
+            return self._error(node, f"'{name}' takes {len(params)} arguments, {len(args)} given")
+        types = self.types
+        for n, (arg, param) in enumerate(zip(args, params), 1):
+            arg = types[id(arg)]
+            if arg != ERROR and not self._assignable(arg, param):
+                self.errors.append(f"argument {n} of '{name}': '{arg}' for '{param}'")
+        self._set(node, symbol.type)
+
+    @staticmethod
+    def _assignable(value, target):
+        return value == target or (value in _RANK and target in _RANK)
+
+    # Statements
+
+    def _condition(self, expr, what):
+        if expr is None:
+            return
+        type_ = self.types[id(expr)]
+        if type_ != ERROR and type_ not in _RANK:
+            self.errors.append(f"{what} condition has type '{type_}'")
+
+    def leave_If(self, node):
+        self._condition(node.condition, "if")
+
+    def leave_While(self, node):
+        self._condition(node.condition, "while")
+
+    def leave_DoWhile(self, node):
+        self._condition(node.condition, "do-while")
+
+    def leave_For(self, node):
+        self._condition(node.condition, "for")
+
+    def leave_Switch(self, node):
+        type_ = self.types[id(node.expr)]
+        if type_ != ERROR and type_ not in _INTEGRAL:
+            self.errors.append(f"switch on type '{type_}'")
+
+    def leave_Case(self, node):
+        if node.value is not None:
+            type_ = self.types[id(node.value)]
+            if type_ != ERROR and type_ not in _INTEGRAL:
+                self.errors.append(f"case label of type '{type_}'")
+
+    def leave_Return(self, node):
+        expected = self._return_type
+        if node.value is None:
+            return
+        value = self.types[id(node.value)]
+        if expected == "void":
+            self.errors.append("return with a value in a void function")
+        elif value != ERROR and not self._assignable(value, expected):
+            self.errors.append(f"returning '{value}' from a function returning '{expected}'")
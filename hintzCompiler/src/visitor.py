@@ -0,0 +1,110 @@
+from hintzCompiler.src.ir_nodes import IRNode
+
+# Returned by a visit_* handler to leave that node's children unvisited.
+SKIP_CHILDREN = object()
+
+
+def field_values(node):
+    # A node's field values in field order, as a tuple.
+    return node._values(node)
+
+
+class DispatchTable(dict):
+    # Node class -> `owner`'s method named prefix + class name, or None.
+    # Looked up along the node class's MRO the first time that class is
+    # seen (so a visit_IRNode catches every node), then served from the
+    # dict.
+
+    def __init__(self, owner, prefix):
+        super().__init__()
+        self.owner = owner
+        self.prefix = prefix
+
+    def __missing__(self, cls):
+        handler = None
+        for base in cls.__mro__:
+            handler = getattr(self.owner, self.prefix + base.__name__, None)
+            if handler is not None:
+                break
+        self[cls] = handler
+        return handler
+
+
+class IRVisitor:
+    # Walks an IR tree (or list of nodes) in preorder, without recursion.
+    # Define visit_<NodeClass>(self, node) for nodes on the way down and
+    # leave_<NodeClass>(self, node) for after their children; either
+    # may name a base class, e.g. visit_IRNode. Lists inside fields are
+    # walked in order; other field values are not visited.
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._enter = DispatchTable(cls, "visit_")
+        cls._leave = DispatchTable(cls, "leave_")
+
+    def visit(self, tree):
+        enter, leave = self._enter, self._leave
+        stack = [tree]
+        pop, push = stack.pop, stack.extend
+        while stack:
+            value = pop()
+            cls = type(value)
+            if cls is list:
+                push(reversed(value))
+            elif cls is tuple:  # (node,): its children are done
+                node = value[0]
+                leave[type(node)](self, node)
+            elif isinstance(value, IRNode):
+                handler = enter[cls]
+                if handler is not None and handler(self, value) is SKIP_CHILDREN:
+                    continue
+                if leave[cls] is not None:
+                    stack.append((value,))
+                push(reversed(field_values(value)))
+
+
+class IRRewriter:
+    # Rebuilds an IR tree bottom-up, without recursion. Each node's
+    # children are rewritten first; if any came back different the node
+    # is copied with the new ones, then rewrite_<NodeClass>(self, node)
+    # (looked up like IRVisitor's handlers) may return a replacement.
+    # Unchanged subtrees are returned as they are, not copied.
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._rewrite = DispatchTable(cls, "rewrite_")
+
+    def rewrite(self, tree):
+        handlers = self._rewrite
+        results = []
+        stack = [tree]
+        pop, push = stack.pop, stack.extend
+        while stack:
+            value = pop()
+            cls = type(value)
+            if cls is tuple:  # (node or list, its old children): all rewritten
+                value, old = value
+                if old:
+                    new = results[-len(old):]
+                    del results[-len(old):]
+                    for a, b in zip(new, old):
+                        if a is not b:
+                            value = new if type(value) is list else type(value)(*new)
+                            break
+                handler = handlers[type(value)] if type(value) is not list else None
+                results.append(handler(self, value) if handler is not None else value)
+            elif cls is list:
+                stack.append((value, value))
+                push(reversed(value))
+            elif isinstance(value, IRNode):
+                old = field_values(value)
+                stack.append((value, old))
+                push(reversed(old))
+            else:
+                results.append(value)
+        return results[0]
+
+
+IRVisitor._enter = DispatchTable(IRVisitor, "visit_")
+IRVisitor._leave = DispatchTable(IRVisitor, "leave_")
+IRRewriter._rewrite = DispatchTable(IRRewriter, "rewrite_")
@@ -0,0 +1,210 @@
+import hashlib
+import json
+import os
+from bisect import bisect_left, insort
+from dataclasses import dataclass, field
+from typing import Any, Dict, List
+
+from hintzCompiler.compiler import INCLUDE_DIR, iter_compile
+from hintzCompiler.lark_runtime import read_grammar, standalone_digest
+from hintzCompiler.parser_cache import cache_dir
+from hintzCompiler.preprocessor import Preprocessor
+from hintzCompiler.src.ir_nodes import Function
+from hintzCompiler.src.symbol_table import ScopedSymbolTableManager
+
+# Bump when the layout of index.json or of a unit's symbol rows changes.
+INDEX_VERSION = 3
+
+
+@dataclass
+class IndexedSymbol:
+    name: str
+    kind: str  # "function", "struct", "matrix" or "variable"
+    type: str
+    source: str  # the translation unit that defines it
+    # function: {"params": [[name, type], ...]}, struct: {"fields": {name: type}},
+    # matrix: {"element_type": type, "dimensions": [n, ...]}
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+
+def unit_symbols(code: str):
+    # The top-level symbols of one preprocessed unit as JSON-ready rows of
+    # [kind, name, type, attributes]. Functions and variables come from the
+    # IR, since the transformer also defines locals in the global scope;
+    # structs only exist in the symbol table.
+    manager = ScopedSymbolTableManager()
+    rows = []
+    for decl in iter_compile(code, symtab_manager=manager):
+        if isinstance(decl, Function):
+            params = [[param.name, param.type_spec] for param in decl.params]
+            rows.append(["function", decl.name, decl.return_type, {"params": params}])
+        elif decl.attributes and "dimensions" in decl.attributes:
+            rows.append(["matrix", decl.name, "matrix",
+                         {"element_type": decl.type_spec, "dimensions": decl.attributes["dimensions"]}])
+        else:
+            rows.append(["variable", decl.name, decl.type_spec, {}])
+    for symbol in manager.global_scope.symbols.values():
+        if symbol.type == "struct":
+            rows.append(["struct", symbol.name, "struct", {"fields": dict(symbol.attributes["fields"])}])
+    return rows
+
+
+class SymbolIndex:
+    # On-disk index of the top-level symbols of a tree of translation units.
+    #
+    # index.json keeps, per unit, the (mtime_ns, size) of every file it read,
+    # the path every #include resolved to, a hash of its preprocessed text
+    # and its symbol rows. update() only preprocesses units whose files or
+    # include resolution changed and only parses those whose text did. Queries run against dicts and a sorted name list built when
+    # the index is opened and patched as units change.
+
+    def __init__(self, directory=None, include_paths=None, macros=None):
+        self.directory = directory or os.path.join(cache_dir(), "symbols")
+        self.index_path = os.path.join(self.directory, "index.json")
+        self.include_paths = include_paths if include_paths is not None else [INCLUDE_DIR]
+        self.macros = dict(macros) if macros else {}
+        self._salt = "\0".join([str(INDEX_VERSION), standalone_digest(read_grammar()),
+                                json.dumps(self.macros, sort_keys=True)])
+        os.makedirs(self.directory, exist_ok=True)
+        self._units = self._read_index()
+        self._by_name: Dict[str, List[IndexedSymbol]] = {}
+        self._by_field: Dict[str, List[IndexedSymbol]] = {}
+        for source, unit in self._units.items():
+            self._add(source, unit["symbols"])
+        self._names = sorted(self._by_name)
+        self.errors: Dict[str, str] = {}  # source -> error, from the last update()
+
+    def _read_index(self):
+        try:
+            with open(self.index_path) as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return index.get("units", {}) if index.get("salt") == self._salt else {}
+
+    def _write_index(self):
+        tmp = self.index_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"salt": self._salt, "units": self._units}, f)
+        os.replace(tmp, self.index_path)
+
+    def update(self, sources) -> List[str]:
+        # Brings the given units up to date and returns the ones that had to
+        # be parsed again. Units that fail to preprocess or parse are left
+        # out of the index, with their errors in `errors`.
+        self.errors = {}
+        stats = {}
+
+        def stat(path):
+            if path not in stats:
+                try:
+                    st = os.stat(path)
+                    stats[path] = [st.st_mtime_ns, st.st_size]
+                except OSError:
+                    stats[path] = None
+            return stats[path]
+
+        resolver = Preprocessor(include_paths=self.include_paths)
+        parsed = []
+        changed = False
+        for source in sources:
+            source = os.path.abspath(source)
+            unit = self._units.get(source)
+            if (unit and all(stat(path) == [mtime, size] for path, mtime, size in unit["deps"])
+                    and resolver.resolves(unit["includes"])):
+                continue
+
+            try:
+                preprocessor = Preprocessor(include_paths=self.include_paths, macros=self.macros)
+                code = preprocessor.preprocess(source)
+                key = hashlib.sha256(code.encode("utf8")).hexdigest()
+                reparse = not unit or unit["key"] != key
+                symbols = unit_symbols(code) if reparse else unit["symbols"]
+            except Exception as e:
+                # Whatever the unit defined before can't be trusted now;
+                # it is tried again on the next update.
+                self.errors[source] = f"{type(e).__name__}: {e}"
+                if unit:
+                    self._drop(source, self._units.pop(source)["symbols"])
+                    changed = True
+                continue
+            deps = [os.path.abspath(path) for path in preprocessor.dependencies]
+            if reparse:
+                if unit:
+                    self._drop(source, unit["symbols"])
+                for name in self._add(source, symbols):
+                    insort(self._names, name)
+                parsed.append(source)
+            self._units[source] = {"key": key, "deps": [[dep] + (stat(dep) or [0, -1]) for dep in deps],
+                                   "includes": preprocessor.includes, "symbols": symbols}
+            changed = True
+
+        if changed:
+            self._write_index()
+        return parsed
+
+    def remove(self, source):
+        source = os.path.abspath(source)
+        unit = self._units.pop(source)
+        self._drop(source, unit["symbols"])
+        self._write_index()
+
+    def clear(self):
+        self._units = {}
+        self._by_name = {}
+        self._by_field = {}
+        self._names = []
+        self.errors = {}
+        if os.path.exists(self.index_path):
+            os.remove(self.index_path)
+
+    def _add(self, source, rows):
+        # Returns the names that were not in the index before.
+        new = []
+        for kind, name, type_, attributes in rows:
+            symbol = IndexedSymbol(name, kind, type_, source, attributes)
+            entries = self._by_name.get(name)
+            if entries is None:
+                entries = self._by_name[name] = []
+                new.append(name)
+            entries.append(symbol)
+            if kind == "struct":
+                for field_name in attributes["fields"]:
+                    self._by_field.setdefault(field_name, []).append(symbol)
+        return new
+
+    def _drop(self, source, rows):
+        for kind, name, _, attributes in rows:
+            entries = self._by_name.get(name)
+            if entries is None:
+                continue
+            entries[:] = [symbol for symbol in entries if symbol.source != source]
+            if not entries:
+                del self._by_name[name]
+                del self._names[bisect_left(self._names, name)]
+            if kind == "struct":
+                for field_name in attributes["fields"]:
+                    structs = self._by_field.get(field_name)
+                    if structs is None:
+                        continue
+                    structs[:] = [symbol for symbol in structs if symbol.source != source]
+                    if not structs:
+                        del self._by_field[field_name]
+
+    # Queries. Nothing below reads a file.
+
+    def lookup(self, name: str) -> List[IndexedSymbol]:
+        # Every definition of `name`, one per unit that defines it (a
+        # definition in a header shows up for each unit including it).
+        return list(self._by_name.get(name, ()))
+
+    def names_with_prefix(self, prefix: str, limit=None) -> List[str]:
+        names = self._names
+        start = end = bisect_left(names, prefix)
+        stop = len(names) if limit is None else min(len(names), start + limit)
+        while end < stop and names[end].startswith(prefix):
+            end += 1
+        return names[start:end]
+
+    def structs_with_field(self, field_name: str) -> List[IndexedSymbol]:
+        return list(self._by_field.get(field_name, ()))
@@ -163,7 +163,12 @@ class TestCompiler(unittest.TestCase):
         """
         ir = compile_source(code)
         expected = """Switch:
-              expr: FieldAccess(base=Identifier(name="Identifier(name='v')"), field='x')
+              expr:
+                FieldAccess:
+                  base:
+                    Identifier:
+                      name: v
+                  field: x
               cases: [
                 Case:
                   value:
@@ -0,0 +1,57 @@
+import os
+import tempfile
+import unittest
+
+from hintzCompiler import batch
+
+
+class TestBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.out = os.path.join(self.root, "out")
+        self.sources = []
+        for sub, body in (("a", "x = 1;"), ("b", "x = 2;")):
+            os.makedirs(os.path.join(self.root, "src", sub))
+            path = os.path.join(self.root, "src", sub, "main.hz")
+            with open(path, "w") as f:
+                f.write(f"int main() {{ int x; {body} }}\n")
+            self.sources.append(path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read(self, *parts):
+        with open(os.path.join(self.out, *parts)) as f:
+            return f.read()
+
+    def check_outputs(self, results):
+        self.assertTrue(all(r.ok for r in results))
+        # Same basename in two directories: both outputs survive.
+        self.assertIn("value: 1.0", self.read("a", "main.ir"))
+        self.assertIn("value: 2.0", self.read("b", "main.ir"))
+
+    def test_serial(self):
+        results = batch.compile_batch(self.sources, self.out, jobs=1, cfg=True)
+        self.check_outputs(results)
+        self.assertTrue(self.read("a", "main.cfg").startswith("=== CFG ==="))
+
+    def test_process_pool(self):
+        results = batch.compile_batch(self.sources, self.out, jobs=2)
+        self.check_outputs(results)
+        self.assertEqual([r.source for r in results], self.sources)
+
+    def test_failures_reported_per_file(self):
+        bad = os.path.join(self.root, "src", "bad.hz")
+        with open(bad, "w") as f:
+            f.write("int main( {")
+        results = batch.compile_batch(self.sources + [bad], self.out, jobs=1)
+        self.assertEqual([r.ok for r in results], [True, True, False])
+        self.assertTrue(results[2].error)
+
+    def test_manifest(self):
+        manifest = os.path.join(self.root, "src", "build.txt")
+        with open(manifest, "w") as f:
+            f.write("# sources\na/main.hz\n\nb/main.hz  # second\n")
+        self.assertEqual(batch.read_manifest(manifest), self.sources)
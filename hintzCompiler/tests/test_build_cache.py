@@ -0,0 +1,100 @@
+import os
+import tempfile
+import time
+import unittest
+
+from hintzCompiler.build_cache import BuildCache
+from hintzCompiler.compiler import compile_source
+
+
+class TestBuildCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.clock = time.time_ns()
+        self.src = os.path.join(self.tmp.name, "src")
+        self.inc = os.path.join(self.tmp.name, "inc")
+        os.makedirs(self.src)
+        os.makedirs(self.inc)
+        self.write(self.inc, "util.hz", "int helper() { return 1; }\n")
+        self.write(self.src, "a.hz", '#include "util.hz"\nint main() { int x; x = SIZE; }\n')
+        self.write(self.src, "b.hz", "int other() { return 2; }\n")
+        self.sources = [os.path.join(self.src, name) for name in ("a.hz", "b.hz")]
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, directory, name, text):
+        path = os.path.join(directory, name)
+        with open(path, "w") as f:
+            f.write(text)
+        # Advance mtime explicitly so edits show up on coarse-mtime filesystems.
+        self.clock += 10**9
+        os.utime(path, ns=(self.clock, self.clock))
+        return path
+
+    def cache(self, **kwargs):
+        kwargs.setdefault("macros", {"SIZE": "4"})
+        return BuildCache(os.path.join(self.tmp.name, "cache"), include_paths=[self.inc], **kwargs)
+
+    def statuses(self, results):
+        return [results[os.path.abspath(s)].status for s in self.sources]
+
+    def test_noop_rebuild_is_fresh(self):
+        first = self.cache().build(self.sources)
+        self.assertEqual(self.statuses(first), ["compiled", "compiled"])
+        again = self.cache().build(self.sources)
+        self.assertEqual(self.statuses(again), ["fresh", "fresh"])
+
+        program = again[os.path.abspath(self.sources[0])].load()
+        with open(self.sources[0]) as f:
+            expected = compile_source(f.read().replace('#include "util.hz"', "int helper() { return 1; }")
+                                      .replace("SIZE", "4"))
+        self.assertEqual(repr(program), repr(expected))
+
+    def test_transitive_include_change_rebuilds_dependents_only(self):
+        self.cache().build(self.sources)
+        self.write(self.inc, "util.hz", "int helper() { return 3; }\n")
+        results = self.cache().build(self.sources)
+        self.assertEqual(self.statuses(results), ["compiled", "fresh"])
+
+    def test_shadowing_header_rebuilds(self):
+        first = os.path.join(self.tmp.name, "first")
+        os.makedirs(first)
+        cache = BuildCache(os.path.join(self.tmp.name, "cache"), include_paths=[first, self.inc],
+                           macros={"SIZE": "4"})
+        cache.build(self.sources)
+        self.write(first, "util.hz", "int shadow() { return 1; }\n")
+        results = cache.build(self.sources)
+        self.assertEqual(self.statuses(results), ["compiled", "fresh"])
+        self.assertEqual(results[self.sources[0]].load().declarations[0].name, "shadow")
+
+    def test_failed_unit_does_not_stop_the_build(self):
+        self.write(self.src, "b.hz", "int other( { return 2; }\n")
+        missing = os.path.join(self.src, "missing.hz")
+        results = self.cache().build(self.sources + [missing])
+        self.assertEqual(self.statuses(results), ["compiled", "failed"])
+        self.assertTrue(results[self.sources[1]].error)
+        self.assertTrue(results[missing].error.startswith("FileNotFoundError"))
+
+        self.write(self.src, "b.hz", "int other() { return 2; }\n")
+        self.assertEqual(self.statuses(self.cache().build(self.sources)), ["fresh", "compiled"])
+
+    def test_touched_but_identical_is_a_hit(self):
+        self.cache().build(self.sources)
+        with open(self.sources[1]) as f:
+            self.write(self.src, "b.hz", f.read())
+        self.assertEqual(self.statuses(self.cache().build(self.sources)), ["fresh", "hit"])
+
+    def test_macros_are_part_of_the_key(self):
+        self.cache().build(self.sources)
+        results = self.cache(macros={"SIZE": "8"}).build(self.sources)
+        self.assertEqual(self.statuses(results), ["compiled", "compiled"])
+
+    def test_eviction_keeps_store_under_limit(self):
+        cache = self.cache(max_bytes=1)
+        results = cache.build(self.sources)
+        self.assertLessEqual(cache.evict(), 1)
+        # Evicted objects are simply rebuilt next time.
+        self.assertEqual(self.statuses(cache.build(self.sources)), ["compiled", "compiled"])
+        self.assertTrue(all(r.status == "compiled" for r in results.values()))
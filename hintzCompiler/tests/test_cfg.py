@@ -1,6 +1,7 @@
 import unittest
 from hintzCompiler.compiler import compile_source
-from hintzCompiler.src.cfg import ControlFlowGraph
+from hintzCompiler.src.cfg import CFGNode, ControlFlowGraph
+from hintzCompiler.src.ir_nodes import Break, Goto
 from io import StringIO
 from unittest.mock import patch
 import difflib
@@ -73,9 +74,9 @@ class TestCFG(unittest.TestCase):
 [1] [Variable(name='i', type_spec='int', attributes=None)] -> 2
 [2] for(init; cond; update) -> 3
 [3] Assignment(target=Identifier(name='i'), value=Literal(value=0.0)) -> 4
-[4] BinaryOp(op=Token('LT_OP', '<'), left=Identifier(name='i'), right=Literal(value=5.0)) -> 5, 7
+[4] BinaryOp(op='<', left=Identifier(name='i'), right=Literal(value=5.0)) -> 5, 7
 [5] Assignment(target=Identifier(name='x'), value=Identifier(name='i')) -> 6
-[6] UnaryOp(op=Token('INCREMENT', '++'), operand=Identifier(name='i'), is_postfix=True) -> 4
+[6] UnaryOp(op='++', operand=Identifier(name='i'), is_postfix=True) -> 4
 [7] Return(value=Identifier(name='x')) ->""";
 
         # Optional: Print to visually confirm
@@ -159,7 +160,7 @@ class TestCFG(unittest.TestCase):
         expected = """Fcn : main
 [0] [Variable(name='x', type_spec='int', attributes=None)] -> 1
 [1] Assignment(target=Identifier(name='x'), value=Literal(value=1.0)) -> 2
-[2] If BinaryOp(op=Token('EQ_OP', '=='), left=Identifier(name='x'), right=Literal(value=1.0)) -> 4, 5
+[2] If BinaryOp(op='==', left=Identifier(name='x'), right=Literal(value=1.0)) -> 4, 5
 [3] IfJoin() -> 6
 [4] Assignment(target=Identifier(name='x'), value=Literal(value=2.0)) -> 3
 [5] Assignment(target=Identifier(name='x'), value=Literal(value=3.0)) -> 3
@@ -206,14 +207,14 @@ class TestCFG(unittest.TestCase):
 [0] [Variable(name='x', type_spec='int', attributes=None)] -> 1
 [1] [Variable(name='i', type_spec='int', attributes=None)] -> 2
 [2] Assignment(target=Identifier(name='x'), value=Literal(value=1.0)) -> 3
-[3] If BinaryOp(op=Token('EQ_OP', '=='), left=Identifier(name='x'), right=Literal(value=1.0)) -> 5, 12
+[3] If BinaryOp(op='==', left=Identifier(name='x'), right=Literal(value=1.0)) -> 5, 12
 [4] IfJoin() -> 13
 [5] Assignment(target=Identifier(name='x'), value=Literal(value=2.0)) -> 6
 [6] for(init; cond; update) -> 7
 [7] Assignment(target=Identifier(name='i'), value=Literal(value=0.0)) -> 8
-[8] BinaryOp(op=Token('LT_OP', '<'), left=Identifier(name='i'), right=Literal(value=5.0)) -> 9, 11
+[8] BinaryOp(op='<', left=Identifier(name='i'), right=Literal(value=5.0)) -> 9, 11
 [9] Assignment(target=Identifier(name='x'), value=Identifier(name='i')) -> 10
-[10] UnaryOp(op=Token('INCREMENT', '++'), operand=Identifier(name='i'), is_postfix=True) -> 8
+[10] UnaryOp(op='++', operand=Identifier(name='i'), is_postfix=True) -> 8
 [11] Assignment(target=Identifier(name='x'), value=Literal(value=5.0)) -> 4
 [12] Assignment(target=Identifier(name='x'), value=Literal(value=10.0)) -> 4
 [13] Return(value=Identifier(name='x')) ->""";
@@ -262,15 +263,15 @@ class TestCFG(unittest.TestCase):
 [0] [Variable(name='x', type_spec='int', attributes=None)] -> 1
 [1] [Variable(name='i', type_spec='int', attributes=None)] -> 2
 [2] Assignment(target=Identifier(name='x'), value=Literal(value=1.0)) -> 3
-[3] If BinaryOp(op=Token('EQ_OP', '=='), left=Identifier(name='x'), right=Literal(value=1.0)) -> 5, 6
+[3] If BinaryOp(op='==', left=Identifier(name='x'), right=Literal(value=1.0)) -> 5, 6
 [4] IfJoin() -> 13
 [5] Assignment(target=Identifier(name='x'), value=Literal(value=2.0)) -> 4
 [6] Assignment(target=Identifier(name='x'), value=Literal(value=3.0)) -> 7
 [7] for(init; cond; update) -> 8
 [8] Assignment(target=Identifier(name='i'), value=Literal(value=0.0)) -> 9
-[9] BinaryOp(op=Token('LT_OP', '<'), left=Identifier(name='i'), right=Literal(value=5.0)) -> 10, 12
+[9] BinaryOp(op='<', left=Identifier(name='i'), right=Literal(value=5.0)) -> 10, 12
 [10] Assignment(target=Identifier(name='x'), value=Identifier(name='i')) -> 11
-[11] UnaryOp(op=Token('INCREMENT', '++'), operand=Identifier(name='i'), is_postfix=True) -> 9
+[11] UnaryOp(op='++', operand=Identifier(name='i'), is_postfix=True) -> 9
 [12] Assignment(target=Identifier(name='x'), value=Literal(value=5.0)) -> 4
 [13] Return(value=Identifier(name='x')) ->""";
 
@@ -345,6 +346,47 @@ class TestCFG(unittest.TestCase):
 
 
 
+class TestCFGEdges(unittest.TestCase):
+
+    def test_edges_are_added_once_and_seen_from_both_ends(self):
+        a, b = CFGNode(0, Break()), CFGNode(1, Break())
+        a.add_successor(b)
+        a.add_successor(b)
+        self.assertEqual(a.successors, [b])
+        self.assertEqual(b.predecessors, [a])
+        # Equal-looking nodes are still different nodes.
+        self.assertNotEqual(CFGNode(2, Break()), CFGNode(2, Break()))
+
+    def test_while_with_several_statements(self):
+        ir = compile_source("int f(int a) { while (a) { a = a - 1; a = a + 0; } return a; }")
+        cfg = ControlFlowGraph(ir.declarations[0])
+        loop, first, second, ret = cfg.nodes
+        self.assertEqual(loop.successors, [first, ret])
+        self.assertEqual(second.successors, [loop])
+        self.assertEqual(loop.predecessors, [second])
+
+    def test_large_switch(self):
+        cases = 2000
+        arms = "".join(f"case {n}: a = {n}; break;\n" for n in range(cases))
+        ir = compile_source("int f(int a) { switch (a) {\n" + arms + "} return a; }")
+        cfg = ControlFlowGraph(ir.declarations[0])
+        switch, join = cfg.nodes[0], cfg.nodes[1]
+        self.assertEqual(len(switch.successors), cases)
+        self.assertEqual(len(join.predecessors), cases)
+        self.assertEqual([node.id for node in cfg.nodes], list(range(len(cfg.nodes))))
+        for node in cfg.nodes:
+            for succ in node.successors:
+                self.assertIn(node, succ.predecessors)
+
+    def test_gotos_to_one_label(self):
+        body = "".join(f"if (a > {n}) {{ goto done; }}\n" for n in range(100))
+        ir = compile_source("int f(int a) {\n" + body + "done:\nreturn a; }")
+        cfg = ControlFlowGraph(ir.declarations[0])
+        label = cfg.label_map["done"]
+        self.assertEqual(len([p for p in label.predecessors if isinstance(p.stmt, Goto)]), 100)
+
+
+
 
 
 #############################################################################
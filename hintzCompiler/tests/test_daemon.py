@@ -0,0 +1,80 @@
+import os
+import tempfile
+import threading
+import unittest
+
+from hintzCompiler import client
+from hintzCompiler.daemon import CompileServer
+
+
+class TestDaemon(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.socket_path = os.path.join(self.tmp.name, "hintz.sock")
+        self.source = os.path.join(self.tmp.name, "main.hz")
+        self.write("x = 5;")
+        self.server = CompileServer(self.socket_path, workers=2, idle_timeout=0.2, macros={"LIMIT": "42"})
+        self.thread = threading.Thread(target=self.server.serve)
+        self.thread.start()
+
+    def tearDown(self):
+        self.thread.join(timeout=10)
+        self.tmp.cleanup()
+
+    def write(self, body):
+        with open(self.source, "w") as f:
+            f.write(f"int main() {{ int x; {body} }}\n")
+
+    def request(self, op, cwd=None):
+        return client.request(op, self.source, self.socket_path, timeout=10, cwd=cwd)
+
+    def test_ops_share_one_compile(self):
+        ir = self.request("ir")
+        self.assertTrue(ir["ok"])
+        self.assertTrue(ir["output"].startswith("=== IR DUMP ===\nProgram:"))
+        cfg = self.request("cfg")
+        self.assertIn("Fcn : main", cfg["output"])
+        self.assertEqual(self.server.compiles, 1)
+
+    def test_edit_invalidates_cached_ir(self):
+        self.request("compile")
+        self.write("x = 123456;")
+        st = os.stat(self.source)
+        os.utime(self.source, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        self.assertIn("123456", self.request("ir")["output"])
+        self.assertEqual(self.server.compiles, 2)
+
+    def test_defines_reach_the_preprocessor(self):
+        self.write("x = LIMIT;")
+        self.assertIn("42", self.request("ir")["output"])
+
+    def test_includes_resolve_from_the_client_cwd(self):
+        dirs = [os.path.join(self.tmp.name, name) for name in ("one", "two")]
+        for directory, value in zip(dirs, ("111", "222")):
+            os.makedirs(directory)
+            with open(os.path.join(directory, "value.hz"), "w") as f:
+                f.write(f"int value() {{ return {value}; }}\n")
+        with open(self.source, "w") as f:
+            f.write('#include "value.hz"\nint main() { int x; x = value(); }\n')
+        self.assertIn("111", self.request("ir", cwd=dirs[0])["output"])
+        self.assertIn("222", self.request("ir", cwd=dirs[1])["output"])
+        self.assertIn("111", self.request("ir", cwd=dirs[0])["output"])
+        self.assertEqual(self.server.compiles, 3)
+
+    def test_errors_are_replies(self):
+        self.write("x = ;")
+        reply = self.request("ir")
+        self.assertFalse(reply["ok"])
+        self.assertTrue(reply["error"])
+        self.assertFalse(self.request("link")["ok"])
+
+    def test_idle_shutdown_removes_socket(self):
+        self.request("compile")
+        self.thread.join(timeout=10)
+        self.assertFalse(self.thread.is_alive())
+        self.assertFalse(os.path.exists(self.socket_path))
+
+    def test_second_daemon_refused(self):
+        with self.assertRaises(RuntimeError):
+            CompileServer(self.socket_path)
@@ -0,0 +1,114 @@
+import io
+import unittest
+
+from hintzCompiler.compiler import compile_source
+from hintzCompiler.lark_runtime import write_pretty
+from hintzCompiler.parser_cache import get_parser
+from hintzCompiler.src.ir_nodes import Assignment, BinaryOp, Block, For, Identifier, If, Literal, Return, UnaryOp, Variable
+from hintzCompiler.src.transformer import IRTransformer
+
+TERMS = 100000
+LEVELS = 5000
+
+
+def long_expression(terms):
+    return "int f(int a, int b) { a = " + " + ".join(["a"] * (terms - 1)) + " + b; return a; }\n"
+
+
+def nested_ifs(levels):
+    return "int f(int a) {\n" + "if (a) {\n" * levels + "a = 1;\n" + "}\n" * levels + "return a; }\n"
+
+
+def nested_fors(levels):
+    return "int f(int a) {\n" + "for (a = 0; a < 1; a++) {\n" * levels + "a = 1;\n" + "}\n" * levels + "return a; }\n"
+
+
+def tree_mode(code):
+    return IRTransformer().transform(get_parser().parse(code))
+
+
+class TestDeepInput(unittest.TestCase):
+
+    def test_long_expression(self):
+        ir = compile_source(long_expression(TERMS))
+        assignment = ir.declarations[0].body.statements[0]
+        self.assertIsInstance(assignment, Assignment)
+        node, depth = assignment.value, 0
+        while isinstance(node, BinaryOp):
+            node, depth = node.left, depth + 1
+        self.assertEqual(depth, TERMS - 1)
+        self.assertEqual(assignment.value.right, Identifier("b"))
+
+        expected = Identifier("a")
+        for _ in range(TERMS - 2):
+            expected = BinaryOp("+", expected, Identifier("a"))
+        expected = BinaryOp("+", expected, Identifier("b"))
+        self.assertEqual(assignment.value, expected)
+        self.assertNotEqual(assignment.value, BinaryOp("+", expected.left, Identifier("c")))
+        self.assertTrue(repr(assignment).startswith("Assignment(target=Identifier(name='a'), value=" +
+                                                    "BinaryOp(op='+', left=" * (TERMS - 1)))
+
+    def test_long_expression_in_tree_mode(self):
+        # The parse tree of a long chain is wide rather than deep; it is
+        # reduce_ops that makes it TERMS deep.
+        code = long_expression(20000)
+        self.assertEqual(tree_mode(code), compile_source(code))
+
+    def test_nested_statements(self):
+        for code, cls in ((nested_ifs(LEVELS), If), (nested_fors(LEVELS), For)):
+            ir = compile_source(code)
+            self.assertEqual(tree_mode(code), ir)
+            node, depth = ir.declarations[0].body.statements[0], 0
+            while isinstance(node, cls):
+                body = node.then_branch if cls is If else node.body
+                node, depth = body.statements[0], depth + 1
+            self.assertEqual(depth, LEVELS)
+            self.assertEqual(repr(ir).count(cls.__name__ + "("), LEVELS)
+
+    def test_nested_parentheses_in_tree_mode(self):
+        code = "int f(int a) { a = " + "(" * LEVELS + "-a" + ")" * LEVELS + "; return a; }\n"
+        ir = tree_mode(code)
+        self.assertEqual(ir.declarations[0].body.statements[0].value, UnaryOp("-", Identifier("a")))
+        self.assertEqual(ir, compile_source(code))
+
+    def test_debug_output(self):
+        # Indentation makes the text quadratic in the depth, hence fewer levels.
+        buf = io.StringIO()
+        tree = get_parser().parse(nested_ifs(LEVELS // 5))
+        write_pretty(tree, buf)
+        self.assertEqual(buf.getvalue().count("if_stmt"), LEVELS // 5)
+        tree = get_parser().parse(nested_fors(3))
+        buf = io.StringIO()
+        write_pretty(tree, buf)
+        self.assertEqual(buf.getvalue(), tree.pretty())
+
+
+class TestIterativeReprAndEq(unittest.TestCase):
+
+    def test_repr_matches_dataclass_format(self):
+        node = Block([Variable("m", "matrix", {"dimensions": [2, 3]}),
+                      Return(UnaryOp("-", Literal(1.5), is_postfix=False)), Return(None)])
+        self.assertEqual(repr(node),
+                         "Block(statements=[Variable(name='m', type_spec='matrix', attributes={'dimensions': [2, 3]}), "
+                         "Return(value=UnaryOp(op='-', operand=Literal(value=1.5), is_postfix=False)), "
+                         "Return(value=None)])")
+        self.assertEqual(str(Identifier("x")), "Identifier(name='x')")
+        self.assertEqual(str(If(Identifier("x"), Block([]))), "If Identifier(name='x')")
+
+    def test_eq(self):
+        def chain(leaf):
+            node = leaf
+            for _ in range(TERMS):
+                node = UnaryOp("-", node)
+            return Block([node, Literal(1.0)])
+
+        self.assertEqual(chain(Identifier("x")), chain(Identifier("x")))
+        self.assertNotEqual(chain(Identifier("x")), chain(Identifier("y")))
+        self.assertNotEqual(Block([Literal(1.0)]), Block([Literal(1.0), Literal(1.0)]))
+        self.assertNotEqual(Block([Literal(1.0)]), Block(Literal(1.0)))
+        self.assertEqual(Variable("m", "matrix", {"dimensions": [2]}), Variable("m", "matrix", {"dimensions": [2]}))
+        self.assertNotEqual(Variable("m", "matrix", {"dimensions": [2]}), Variable("m", "matrix", {"dimensions": [3]}))
+
+
+if __name__ == "__main__":
+    unittest.main()
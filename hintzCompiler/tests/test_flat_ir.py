@@ -0,0 +1,84 @@
+import unittest
+
+from hintzCompiler.compiler import compile_source
+from hintzCompiler.src.cfg import ControlFlowGraph
+from hintzCompiler.src.flat_ir import FlatNode, flatten, unflatten
+from hintzCompiler.src.ir_nodes import Block, Function, Identifier, If, IRNode, Literal
+
+CODE = """
+struct Vec2 { int x; };
+
+int add(int a, int b) {
+    return a + b;
+}
+
+int main() {
+    int i;
+    int x;
+    int m[4];
+    struct Vec2 v;
+    x = add(1, 2);
+    v.x = m[2] * -x;
+    if (x == 1) { x = 2; } else { x = 3; }
+    for (i = 0; i < 5; i++) { x = x + i; }
+    while (x > 0) { x--; }
+    do { x++; } while (x < 3);
+    switch (v.x) { case 1: x = 0; break; default: x = 1; break; }
+    goto end;
+    x = 4;
+    end: return puts("done");
+}
+"""
+
+
+class TestFlatIR(unittest.TestCase):
+
+    def setUp(self):
+        self.ir = compile_source(CODE)
+        self.flat = flatten(self.ir)
+
+    def test_round_trip(self):
+        self.assertEqual(unflatten(self.flat), self.ir)
+        self.assertEqual(repr(unflatten(self.flat)), repr(self.ir))
+
+    def test_subtrees_are_index_ranges(self):
+        flat = self.flat
+        self.assertEqual(list(flat.walk()), list(range(len(flat))))
+        add, main = flat.children(0)
+        self.assertEqual(flat.kind(add), Function)
+        self.assertEqual(flat.walk(add), range(add, main))
+        self.assertEqual(flat.ends[main], len(flat))
+        self.assertEqual(unflatten(flat, main), self.ir.declarations[1])
+
+    def test_node_views(self):
+        main = self.flat.node(list(self.flat.children(0))[1])
+        self.assertIsInstance(main, Function)
+        self.assertIs(type(main), FlatNode)
+        self.assertEqual(main.name, "main")
+        self.assertIsInstance(main.body, Block)
+        statements = main.body.statements
+        self.assertEqual(str(statements[0]), str(self.ir.declarations[1].body.statements[0]))
+        branch = next(s for s in statements if isinstance(s, If))
+        self.assertEqual(repr(branch.condition), repr(self.ir.declarations[1].body.statements[6].condition))
+        with self.assertRaises(AttributeError):
+            main.missing
+
+    def test_cfg_from_flat_ir(self):
+        for index, function in zip(self.flat.children(0), self.ir.declarations):
+            self.assertEqual(str(ControlFlowGraph(self.flat.node(index))), str(ControlFlowGraph(function)))
+
+    def test_scalar_fields(self):
+        flat = flatten(Block(statements=[Literal(1), Literal(2.5), Literal("s"), Identifier("a"), Identifier("a")]))
+        self.assertEqual(flat.strings, ["s", "a"])
+        self.assertEqual([type(s.value) for s in unflatten(flat).statements[:3]], [int, float, str])
+        with self.assertRaises(TypeError):
+            flatten(Block(statements=[object()]))
+
+    def test_kinds_cover_every_node_class(self):
+        from hintzCompiler.src import flat_ir, ir_nodes
+        classes = {cls for cls in vars(ir_nodes).values() if isinstance(cls, type) and issubclass(cls, IRNode)}
+        self.assertEqual(set(flat_ir.KINDS), classes - {IRNode})
+
+
+if __name__ == "__main__":
+    unittest.main()
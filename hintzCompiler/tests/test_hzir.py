@@ -0,0 +1,70 @@
+import io
+import unittest
+
+from hintzCompiler.compiler import compile_source
+from hintzCompiler.src import hzir
+from hintzCompiler.src.hzir import IRWriter, iter_declarations, read_program, write_program
+from hintzCompiler.src.ir_nodes import Block, Identifier, Literal, Program, Variable
+from hintzCompiler.tests.test_flat_ir import CODE
+
+
+def encode(program):
+    f = io.BytesIO()
+    write_program(program, f)
+    return f.getvalue()
+
+
+class TestHzir(unittest.TestCase):
+
+    def test_round_trip(self):
+        ir = compile_source(CODE)
+        self.assertEqual(read_program(io.BytesIO(encode(ir))), ir)
+
+    def test_scalars(self):
+        values = [0.0, -0.0, 2.0, -3.0, 2.5, float("inf"), 2.0**60, -7, 300, True, False, None, "é", ""]
+        ir = Program([Block([Literal(v) for v in values]),
+                      Variable("m", "matrix", {"dimensions": [4, 100000]})])
+        back = read_program(io.BytesIO(encode(ir)))
+        self.assertEqual(repr(back), repr(ir))
+        self.assertEqual([type(n.value) for n in back.declarations[0].statements], [type(v) for v in values])
+
+    def test_strings_written_once(self):
+        ir = Program([Identifier("a_long_identifier_name")] * 50)
+        data = encode(ir)
+        self.assertEqual(data.count(b"a_long_identifier_name"), 1)
+        back = read_program(io.BytesIO(data))
+        self.assertIs(back.declarations[0].name, back.declarations[49].name)
+
+    def test_streaming_writer(self):
+        f = io.BytesIO()
+        with IRWriter(f) as writer:
+            for n in range(3):
+                writer.write(Variable(f"v{n}", "int"))
+            self.assertFalse(f.getvalue())  # still buffered
+        self.assertEqual([v.name for v in iter_declarations(io.BytesIO(f.getvalue()))], ["v0", "v1", "v2"])
+
+    def test_deep_nesting(self):
+        node = Literal(1.0)
+        for _ in range(20000):
+            node = Block([node])
+        depth = 0
+        node = read_program(io.BytesIO(encode(Program([node])))).declarations[0]
+        while isinstance(node, Block):
+            node = node.statements[0]
+            depth += 1
+        self.assertEqual(depth, 20000)
+
+    def test_bad_files(self):
+        data = encode(compile_source(CODE))
+        with self.assertRaisesRegex(ValueError, "not a .hzir file"):
+            read_program(io.BytesIO(b"junk" + data))
+        with self.assertRaisesRegex(ValueError, "truncated"):
+            read_program(io.BytesIO(data[:-10]))
+        newer = bytearray(data)
+        newer[len(hzir.MAGIC)] = hzir.FORMAT_VERSION + 1
+        with self.assertRaisesRegex(ValueError, "unsupported .hzir version"):
+            read_program(io.BytesIO(bytes(newer)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+
+from hintzCompiler.compiler import compile_source
+from hintzCompiler.incremental import IncrementalCompiler, split_top_level
+
+
+class TestIncremental(unittest.TestCase):
+
+    code = """
+    struct Vec2 { int x; float y; };
+    int counter;
+    int add(int a, int b) {
+        if (a > b) { return a; }
+        return a + b;
+    }
+    int main() {
+        counter = add(1, 2);
+        print("}");
+    }
+    """
+
+    def assertSameAsFullCompile(self, compiler, code):
+        program = compiler.compile(code)
+        self.assertEqual(repr(program), repr(compile_source(code)))
+        return program
+
+    def test_split_top_level(self):
+        chunks = [c.strip() for c in split_top_level(self.code)]
+        self.assertEqual(len(chunks), 4)
+        self.assertTrue(chunks[0].startswith("struct Vec2") and chunks[0].endswith("};"))
+        self.assertTrue(chunks[3].startswith("int main()"))
+
+    def test_only_edited_function_reparsed(self):
+        compiler = IncrementalCompiler()
+        first = self.assertSameAsFullCompile(compiler, self.code)
+        self.assertEqual(compiler.reparsed, 4)
+        untouched = first.declarations[0]
+
+        edited = self.code.replace("counter = add(1, 2);", "counter = add(3, 4);")
+        second = self.assertSameAsFullCompile(compiler, edited)
+        self.assertEqual(compiler.reparsed, 1)
+        self.assertIs(second, first)
+        self.assertIs(second.declarations[0], untouched)
+
+    def test_symbol_table_patched(self):
+        compiler = IncrementalCompiler()
+        compiler.compile(self.code)
+        table = compiler.get_global_symbol_table()
+        self.assertIsNotNone(table.lookup("add"))
+
+        edited = self.code.replace("int add(", "int sum(").replace("add(1, 2)", "sum(1, 2)")
+        compiler.compile(edited)
+        self.assertIsNone(table.lookup("add"))
+        self.assertEqual(table.lookup("sum").type, "int")
+        self.assertIsNotNone(table.lookup("Vec2"))
+
+    def test_hash_after_recompile(self):
+        compiler = IncrementalCompiler()
+        program = compiler.compile(self.code)
+        hash(program)
+        edited = self.code.replace("counter = add(1, 2);", "counter = add(3, 4);")
+        program = compiler.compile(edited)
+        fresh = compile_source(edited)
+        self.assertEqual(hash(program), hash(fresh))
+        self.assertEqual(program, fresh)
+        self.assertEqual({fresh: 1}.get(program), 1)
+
+    def test_syntax_error_keeps_previous_result(self):
+        compiler = IncrementalCompiler()
+        program = compiler.compile(self.code)
+        before = repr(program)
+        with self.assertRaises(Exception):
+            compiler.compile(self.code.replace("return a + b;", "return a + ;"))
+        self.assertEqual(repr(program), before)
+        self.assertSameAsFullCompile(compiler, self.code)
+
+    def test_redefinition_still_rejected(self):
+        compiler = IncrementalCompiler()
+        compiler.compile(self.code)
+        with self.assertRaises(RuntimeError):
+            compiler.compile(self.code + "\nint counter;\n")
+        self.assertSameAsFullCompile(compiler, self.code)
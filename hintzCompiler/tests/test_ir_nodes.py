@@ -0,0 +1,248 @@
+import io
+import os
+import pickle
+import threading
+import time
+import unittest
+from dataclasses import fields
+from unittest.mock import patch
+
+from hintzCompiler.compiler import compile_file, compile_source
+from hintzCompiler.lark_runtime import Token, Tree
+from hintzCompiler.src import ir_nodes
+from hintzCompiler.src.ir_nodes import (Assignment, ArrayAccess, BinaryOp, Block, FieldAccess, FunctionCall, Identifier,
+                                        IRNode, Literal, Return, UnaryOp, Variable)
+
+
+class TestSlottedNodes(unittest.TestCase):
+
+    def test_no_instance_dict(self):
+        for cls in vars(ir_nodes).values():
+            if isinstance(cls, type) and issubclass(cls, IRNode):
+                # Any class in the MRO without __slots__ (object aside) adds a __dict__.
+                self.assertFalse(any("__dict__" in vars(k) for k in cls.__mro__[:-1]), cls.__name__)
+        node = Identifier("x")
+        self.assertFalse(hasattr(node, "__dict__"))
+        with self.assertRaises(AttributeError):
+            node.line = 1
+
+    def test_access_nodes_are_ir_nodes(self):
+        for cls in (FieldAccess, ArrayAccess, FunctionCall):
+            self.assertTrue(issubclass(cls, IRNode))
+
+    def test_defaults_and_fields(self):
+        self.assertIsNone(Variable("a", "int").attributes)
+        self.assertFalse(UnaryOp("-", Identifier("x")).is_postfix)
+        self.assertEqual(list(Variable.__dataclass_fields__), ["name", "type_spec", "attributes"])
+        self.assertEqual(repr(Identifier("x")), "Identifier(name='x')")
+
+    def test_pickle_round_trip(self):
+        ir = compile_source("struct P { int x; };\nint main() { struct P p; p.x = f(1); return p.x; }\n")
+        self.assertEqual(pickle.loads(pickle.dumps(ir, pickle.HIGHEST_PROTOCOL)), ir)
+
+
+class TestInterning(unittest.TestCase):
+
+    def values(self, node):
+        stack = [node]
+        while stack:
+            value = stack.pop()
+            yield value
+            if isinstance(value, list):
+                stack.extend(value)
+            elif isinstance(value, dict):
+                stack.extend(value.values())
+            elif isinstance(value, IRNode):
+                stack.extend(getattr(value, f.name) for f in fields(value))
+
+    def test_no_lark_objects(self):
+        path = os.path.join(os.path.dirname(__file__), "..", "..", "samples", "test_sample.hz")
+        with open(path) as f:
+            code = f.read()
+        code += "int g(int a, int b) { int k[4]; a = -a + k[1] * f(a); a++; goto end; end: return a; }\n"
+        code += "void h() { do { return; } while (1); }\n"
+        code += "int sq(int a) { return (a + 1) * (a - 1); }\n"
+        for ir in (compile_source(code), compile_file(path)):
+            for value in self.values(ir):
+                self.assertNotIsInstance(value, (Token, Tree))
+                if isinstance(value, str):
+                    self.assertIs(type(value), str)
+
+    def test_names_and_operators_are_shared(self):
+        ir = compile_source("int f(int a) { a = a + 1; return a + a; }\n")
+        strings = [v for v in self.values(ir) if isinstance(v, str)]
+        by_value = {}
+        for s in strings:
+            self.assertIs(by_value.setdefault(s, s), s)
+        self.assertEqual(sorted(by_value), ["+", "a", "f", "int"])
+
+
+class TestStructuralHash(unittest.TestCase):
+
+    CODE = "int f(int a, int b) { int m[2]; a = (a + b) * 2; b = (a + b) * 2; m[a + b] = f(a + b, 1); return a + b; }\n"
+
+    def test_equal_trees_hash_equal(self):
+        first, second = compile_source(self.CODE), compile_source(self.CODE)
+        self.assertIsNot(first, second)
+        self.assertEqual(hash(first), hash(second))
+        self.assertEqual(first, second)
+        other = compile_source(self.CODE.replace("* 2", "* 3"))
+        self.assertNotEqual(hash(first), hash(other))
+        self.assertNotEqual(first, other)
+        self.assertEqual({BinaryOp("+", Identifier("a"), Identifier("b")): 1}[BinaryOp("+", Identifier("a"), Identifier("b"))], 1)
+        self.assertNotEqual(Identifier("a"), Literal("a"))
+        self.assertNotEqual(UnaryOp("-", Identifier("a")), UnaryOp("-", Identifier("a"), is_postfix=True))
+
+    def test_hash_is_cached_bottom_up(self):
+        node = BinaryOp("+", Identifier("a"), Literal(1.0))
+        self.assertIsNone(node._hash)
+        hash(node)
+        self.assertTrue(all(n._hash is not None for n in (node, node.left, node.right)))
+        self.assertIsNone(pickle.loads(pickle.dumps(node))._hash)
+
+    def test_unequal_hash_skips_the_fields(self):
+        left = Return(BinaryOp("+", Identifier("a"), Literal(1.0)))
+        right = Return(BinaryOp("+", Identifier("a"), Literal(2.0)))
+        hash(left), hash(right)
+        with patch.object(BinaryOp, "_dataclass_eq", lambda self, other: True):
+            self.assertNotEqual(left, right)
+
+    def test_deep_tree(self):
+        node = Identifier("x")
+        for _ in range(100000):
+            node = UnaryOp("-", node)
+        self.assertIsInstance(hash(node), int)
+
+    def test_hash_cons(self):
+        ir = compile_source(self.CODE, hash_cons=True)
+        self.assertEqual(ir, compile_source(self.CODE))
+        stmts = ir.declarations[0].body.statements
+        first, second = stmts[1], stmts[2]
+        self.assertIsInstance(first, Assignment)
+        self.assertIs(first.value, second.value)
+        self.assertIs(first.value.left, stmts[3].target.index)
+        self.assertIs(stmts[3].value.args[0], stmts[4].value)
+        self.assertIs(first.target, second.value.left.left)
+        self.assertIsNot(compile_source(self.CODE).declarations[0].body.statements[1].value,
+                         compile_source(self.CODE).declarations[0].body.statements[2].value)
+
+    def test_hash_cons_in_tree_mode(self):
+        with patch("sys.stdout", io.StringIO()):
+            ir = compile_source(self.CODE, debug=True, hash_cons=True)
+        stmts = ir.declarations[0].body.statements
+        self.assertIs(stmts[1].value, stmts[2].value)
+
+
+class TestRecursionDepth(unittest.TestCase):
+
+    def test_depth_is_per_thread(self):
+        # A repr parked halfway down a tree on one thread must not count
+        # towards the depth on another.
+        entered, release = threading.Event(), threading.Event()
+
+        class Parked:
+            def __repr__(self):
+                entered.set()
+                release.wait(5)
+                return "parked"
+
+        node = Return(UnaryOp("-", Literal(Parked())))
+        thread = threading.Thread(target=repr, args=(node,))
+        thread.start()
+        try:
+            self.assertTrue(entered.wait(5))
+            self.assertEqual(ir_nodes._local.depth, 0)
+            self.assertEqual(repr(UnaryOp("-", Identifier("x"))),
+                             "UnaryOp(op='-', operand=Identifier(name='x'), is_postfix=False)")
+            self.assertEqual(ir_nodes._local.depth, 0)
+        finally:
+            release.set()
+            thread.join()
+
+
+class CountingFile(io.StringIO):
+
+    def __init__(self):
+        super().__init__()
+        self.writes = 0
+
+    def write(self, text):
+        self.writes += 1
+        return super().write(text)
+
+
+class TestTextDump(unittest.TestCase):
+
+    def test_format(self):
+        ir = compile_source("int main() { int a; a = -2; return; }\n")
+        self.assertEqual(ir.to_string(), """Program:
+  declarations: [
+    Function:
+      return_type: int
+      name: main
+      params: [
+      ]
+      body:
+        Block:
+          statements: [
+            [Variable(name='a', type_spec='int', attributes=None)]
+            Assignment:
+              target:
+                Identifier:
+                  name: a
+              value:
+                UnaryOp:
+                  op: -
+                  operand:
+                    Literal:
+                      value: 2.0
+                  is_postfix: False
+            Return:
+              value: None
+          ]
+  ]
+""")
+
+    def test_dump_and_write_match_to_string(self):
+        ir = compile_source("int f(int a, int b) { return a + b; }\n")
+        with patch('sys.stdout', new_callable=io.StringIO) as stdout:
+            ir.dump()
+        self.assertEqual(stdout.getvalue(), ir.to_string())
+        with patch('sys.stdout', new_callable=io.StringIO) as stdout:
+            ir.declarations[0].body.dump(2)
+        self.assertEqual(stdout.getvalue(), ir.declarations[0].body.to_string(2))
+        self.assertTrue(stdout.getvalue().startswith("    Block:\n"))
+
+    def test_writes_in_chunks(self):
+        ir = Block([Return(Identifier(f"x{n}")) for n in range(5000)])
+        f = CountingFile()
+        ir.write(f)
+        lines = f.getvalue().count("\n")
+        self.assertEqual(lines, 5000 * 4 + 3)
+        self.assertLess(f.writes, lines / 1000)
+
+    def test_deep_nesting(self):
+        node = Identifier("x")
+        for _ in range(10000):
+            node = UnaryOp("-", node)
+        text = Return(node).to_string()
+        self.assertEqual(text.count("UnaryOp:"), 10000)
+        self.assertIn("\n" + "  " * 20003 + "name: x\n", text)
+        self.assertEqual(text.count("\n"), 2 + 10000 * 4 + 2)
+
+    def test_throughput(self):
+        ir = Block([Return(UnaryOp("-", Literal(float(n)))) for n in range(20000)])
+        size = len(ir.to_string())
+        best = min(self.timed(ir) for _ in range(3))
+        # About 30 MB/s where this was written; far slower means something
+        # went back to per-line output.
+        self.assertGreater(size / best / 2**20, 3)
+
+    def timed(self, ir):
+        start = time.perf_counter()
+        ir.to_string()
+        return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    unittest.main()
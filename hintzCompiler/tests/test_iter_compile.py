@@ -0,0 +1,46 @@
+import unittest
+
+from hintzCompiler.compiler import compile_source, iter_compile
+from hintzCompiler.src.ir_nodes import Function, Variable
+from hintzCompiler.src.symbol_table import ScopedSymbolTableManager
+
+
+class TestIterCompile(unittest.TestCase):
+
+    code = """
+    struct Vec2 { int x; float y; };
+    int counter;
+    int add(int a, int b) { return a + b; }
+    float scale;
+    int main() {
+        counter = add(1, 2);
+    }
+    """
+
+    def test_matches_compile_source(self):
+        streamed = list(iter_compile(self.code))
+        self.assertEqual(repr(streamed), repr(compile_source(self.code).declarations))
+        self.assertEqual([type(d) for d in streamed], [Variable, Function, Variable, Function])
+
+    def test_symbol_table_updated_as_items_are_yielded(self):
+        manager = ScopedSymbolTableManager()
+        seen = []
+        for decl in iter_compile(self.code, symtab_manager=manager):
+            self.assertIsNotNone(manager.global_scope.lookup(decl.name))
+            seen.append(decl.name)
+        self.assertIsNotNone(manager.global_scope.lookup("Vec2"))
+        self.assertEqual(seen, ["counter", "add", "scale", "main"])
+
+    def test_items_yielded_before_rest_is_parsed(self):
+        stream = iter_compile("int first() { return 1; } int second( {")
+        self.assertEqual(next(stream).name, "first")
+        with self.assertRaises(Exception):  # lark's or the generated parser's UnexpectedInput
+            next(stream)
+
+    def test_interleaved_generators(self):
+        other = "int only() { return 2; }"
+        a = iter_compile(self.code)
+        b = iter_compile(other)
+        first = next(a)
+        self.assertEqual([d.name for d in b], ["only"])
+        self.assertEqual([first.name] + [d.name for d in a], ["counter", "add", "scale", "main"])
@@ -0,0 +1,85 @@
+import os
+import tempfile
+import unittest
+
+from hintzCompiler.batch import ir_text
+from hintzCompiler.compiler import compile_file, compile_source
+from hintzCompiler.parser_cache import get_lexer
+from hintzCompiler.preprocessor import IncludeCache, Preprocessor
+
+
+class TestTokenHandoff(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = IncludeCache()
+        self.write("defs.hz", "#ifndef DEFS_H\n#define DEFS_H\n#define SIZE 8\n\nint table[SIZE];\n#endif\n")
+        self.write("main.hz", '#include "defs.hz"\nint main() {\n    return  SIZE;\n}\n')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, text):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    def tokens(self, name="main.hz"):
+        preprocessor = Preprocessor(include_paths=[self.tmp.name], include_cache=self.cache)
+        tokens = preprocessor.iter_tokens(os.path.join(self.tmp.name, name), get_lexer())
+        return [(t.type, str(t), os.path.basename(t.file), t.line, t.column) for t in tokens]
+
+    def test_positions_follow_the_include_chain(self):
+        tokens = self.tokens()
+        self.assertEqual(tokens[:3], [("TYPE_INT", "int", "defs.hz", 5, 1),
+                                      ("IDENT", "table", "defs.hz", 5, 5),
+                                      ("LSQB", "[", "defs.hz", 5, 10)])
+        # The macro's expansion is placed where the macro was used.
+        self.assertIn(("NUMBER", "8", "defs.hz", 5, 11), tokens)
+        self.assertIn(("NUMBER", "8", "main.hz", 3, 13), tokens)
+
+    def test_cached_replay_gives_the_same_tokens(self):
+        first = self.tokens()
+        self.assertEqual(self.tokens(), first)
+        self.assertEqual(len(self.cache.files), 2)
+
+    def test_same_tokens_as_two_pass(self):
+        text = Preprocessor(include_paths=[self.tmp.name]).preprocess(os.path.join(self.tmp.name, "main.hz"))
+        self.assertEqual([(kind, value) for kind, value, *_ in self.tokens()],
+                         [(kind, value) for kind, value, _ in get_lexer().kinds(text)])
+
+    def test_keywords_are_whole_words(self):
+        self.write("words.hz", "int integer; double doubled;\n")
+        self.assertEqual([kind for kind, *_ in self.tokens("words.hz")],
+                         ["TYPE_INT", "IDENT", "SEMI", "TYPE_DOUBLE", "IDENT", "SEMI"])
+
+    def test_keyword_prefixed_identifiers_on_every_path(self):
+        code = ("int integer;\ndouble doubled;\nint main() { int casey; integer = 1; casey = integer;\n"
+                "goto gotoend; gotoend: return casey; }\n")
+        path = self.write("prefixed.hz", code)
+        expected = ir_text(compile_file(path))
+        self.assertIn("integer", expected)
+        self.assertEqual(ir_text(compile_source(code)), expected)
+        self.assertEqual(ir_text(compile_source(code, debug=True)), expected)
+
+    def test_unexpected_character(self):
+        self.write("bad.hz", "int a;\nint b @;\n")
+        with self.assertRaisesRegex(SyntaxError, r"bad.hz:2: unexpected character '@'"):
+            self.tokens("bad.hz")
+
+    def test_compile_file_matches_compile_source(self):
+        path = os.path.join(os.path.dirname(__file__), "..", "..", "samples", "test_sample.hz")
+        with open(path) as f:
+            expected = ir_text(compile_source(f.read()))
+        self.assertEqual(ir_text(compile_file(path)), expected)
+
+    def test_macro_lines_lex_like_the_text(self):
+        self.write("neg.hz", "#define NEG -\n#define LONG 1 + 2 + 3\nx = NEG-LONG + y;\n")
+        first = self.tokens("neg.hz")
+        self.assertEqual([(kind, value, column) for kind, value, _, _, column in first],
+                         [("IDENT", "x", 1), ("EQUAL", "=", 3), ("DECREMENT", "--", 5),
+                          ("NUMBER", "1", 9), ("ADD_OP", "+", 9), ("NUMBER", "2", 9),
+                          ("ADD_OP", "+", 9), ("NUMBER", "3", 9), ("ADD_OP", "+", 14),
+                          ("IDENT", "y", 16), ("SEMI", ";", 17)])
+        self.assertEqual(self.tokens("neg.hz"), first)
@@ -0,0 +1,104 @@
+import importlib.util
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from hintzCompiler import gen_parser, lark_runtime, parser_cache
+from hintzCompiler.compiler import compile_source
+from hintzCompiler.src.transformer import IRTransformer
+
+
+class TestParserCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.env = patch.dict(os.environ, {"HINTZ_CACHE_DIR": self.tmp.name})
+        self.env.start()
+        parser_cache.clear_parser_cache()
+
+    def tearDown(self):
+        parser_cache.clear_parser_cache()
+        self.env.stop()
+        self.tmp.cleanup()
+
+    def test_parser_reused_in_process(self):
+        self.assertIs(parser_cache.get_parser(), parser_cache.get_parser())
+
+    @patch.object(parser_cache, "standalone", None)
+    def test_tables_written_and_reloaded(self):
+        code = """
+        int main() {
+            int x;
+            x = 5;
+        }
+        """
+        first = compile_source(code)
+        files = os.listdir(self.tmp.name)
+        self.assertEqual(len(files), 1)
+        self.assertIn(parser_cache.grammar_digest(parser_cache.read_grammar())[:16], files[0])
+
+        parser_cache.clear_parser_cache()
+        second = compile_source(code)
+        self.assertEqual(repr(first), repr(second))
+
+    def test_digest_tracks_grammar_text(self):
+        grammar = parser_cache.read_grammar()
+        self.assertNotEqual(parser_cache.grammar_digest(grammar),
+                            parser_cache.grammar_digest(grammar + "\n// edited\n"))
+
+    def test_inline_transform_matches_tree_path(self):
+        code = """
+        struct Vec2 { int x; float y; };
+        int add(int a, int b) { return a + b; }
+        int main() {
+            int m[4];
+            struct Vec2 v;
+            for (i = 0; i < 4; i++) { m[i] = add(i, 2) * 3; }
+            if (v.x == 1) { v.y = 2; } else { v.y = 3; }
+        }
+        """
+        tree = parser_cache.get_parser().parse(code)
+        expected = IRTransformer().transform(tree)
+        self.assertEqual(repr(compile_source(code)), repr(expected))
+
+    def test_inline_transformer_state_reset_between_calls(self):
+        code = """
+        int main() {
+            int x;
+        }
+        """
+        compile_source(code)
+        # A second compile would raise "already declared" if the global
+        # scope leaked across calls.
+        compile_source(code)
+        _, transformer = parser_cache.get_ir_parser()
+        self.assertEqual(list(transformer.get_global_symbol_table().symbols), ["x", "main"])
+
+    def test_generated_parser_matches_runtime_grammar(self):
+        path = os.path.join(self.tmp.name, "c89_parser_gen.py")
+        gen_parser.generate(path)
+
+        with open(path) as f:
+            header = f.readline().strip()
+        digest = lark_runtime.standalone_digest(lark_runtime.read_grammar())
+        self.assertEqual(header, f'GRAMMAR_DIGEST = "{digest}"')
+
+        spec = importlib.util.spec_from_file_location("c89_parser_gen", path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        code = """
+        int main() {
+            int x;
+            x = 5;
+        }
+        """
+        expected = parser_cache.build_parser(lark_runtime.read_grammar(), disk_cache=False)
+        self.assertEqual(module.Lark_StandAlone().parse(code).pretty(), expected.parse(code).pretty())
+
+    def test_stale_generated_parser_is_ignored(self):
+        path = os.path.join(self.tmp.name, "c89_parser.py")
+        with open(path, "w") as f:
+            f.write('GRAMMAR_DIGEST = "0"\n')
+        with patch.object(lark_runtime, "STANDALONE_PATH", path):
+            self.assertIsNone(lark_runtime._load_standalone())
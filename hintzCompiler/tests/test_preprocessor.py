@@ -0,0 +1,221 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+from hintzCompiler.preprocessor import IncludeCache, Preprocessor
+
+
+class TestMacros(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def preprocess(self, text, **kwargs):
+        path = os.path.join(self.tmp.name, "main.hz")
+        with open(path, "w") as f:
+            f.write(text)
+        return Preprocessor(**kwargs).preprocess(path)
+
+    def test_whole_identifiers_only(self):
+        out = self.preprocess("#define N 4\nx = N + NN + N_1 + xN;\n")
+        self.assertEqual(out, "x = 4 + NN + N_1 + xN;")
+
+    def test_string_literals_untouched(self):
+        out = self.preprocess('#define N 4\nprint("N is", N);\n')
+        self.assertEqual(out, 'print("N is", 4);')
+
+    def test_bodies_rescanned(self):
+        out = self.preprocess("#define SIZE COUNT * 2\n#define COUNT 3\nx = SIZE;\n")
+        self.assertEqual(out, "x = 3 * 2;")
+
+    def test_self_reference_not_expanded_again(self):
+        self.assertEqual(self.preprocess("#define X X + 1\ny = X;\n"), "y = X + 1;")
+
+    def test_redefinition_takes_effect(self):
+        out = self.preprocess("#define N 1\na = N;\n#define N 2\nb = N;\n")
+        self.assertEqual(out, "a = 1;\nb = 2;")
+
+    def test_directive_spacing(self):
+        out = self.preprocess("  #define Q 3\n#  define R 1\n\t# define S\nx = Q + R + S;\n")
+        self.assertEqual(out, "x = 3 + 1 + ;")
+        with open(os.path.join(self.tmp.name, "b.hz"), "w") as f:
+            f.write("#ifndef B\n  # define B 2\nint b;\n#endif\n")
+        out = self.preprocess('  # include "b.hz"\n   #  pragma once\ny = B;\n', include_paths=[self.tmp.name])
+        self.assertEqual(out, "int b;\ny = 2;")
+
+    def test_initial_macros(self):
+        self.assertEqual(self.preprocess("x = DEBUG;\n", macros={"DEBUG": "0"}), "x = 0;")
+
+
+class TestConditionals(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def preprocess(self, text, **macros):
+        path = os.path.join(self.tmp.name, "main.hz")
+        with open(path, "w") as f:
+            f.write(text)
+        return Preprocessor(macros=macros, include_cache=IncludeCache()).preprocess(path)
+
+    def test_ifdef_else(self):
+        text = "#ifdef FAST\nint f;\n#else\nint s;\n#endif\nint x;\n"
+        self.assertEqual(self.preprocess(text, FAST=""), "int f;\nint x;")
+        self.assertEqual(self.preprocess(text), "int s;\nint x;")
+        self.assertEqual(self.preprocess(text.replace("ifdef", "ifndef")), "int f;\nint x;")
+
+    def test_if_expressions(self):
+        text = ("#if LEVEL > 2 && defined(FAST)\na;\n#elif LEVEL * 2 + 1 == 5 || defined X\nb;\n"
+                "#elif !(LEVEL % 2) ? 1 : 0\nc;\n#else\nd;\n#endif\n")
+        self.assertEqual(self.preprocess(text, LEVEL="3", FAST=""), "a;")
+        self.assertEqual(self.preprocess(text, LEVEL="2"), "b;")
+        self.assertEqual(self.preprocess(text, LEVEL="0x4"), "c;")
+        self.assertEqual(self.preprocess(text, LEVEL="3"), "d;")
+        self.assertEqual(self.preprocess(text, LEVEL="TWO", TWO="2"), "b;")
+
+    def test_short_circuit(self):
+        text = "#if {}\na;\n#else\nb;\n#endif\n"
+        self.assertEqual(self.preprocess(text.format("1 || 1 / 0")), "a;")
+        self.assertEqual(self.preprocess(text.format("0 && 1 % 0")), "b;")
+        self.assertEqual(self.preprocess(text.format("N ? 1 / N : 0"), N="0"), "b;")
+        self.assertEqual(self.preprocess(text.format("!N ? 1 / N : 1 || 1 / 0"), N="2"), "a;")
+        with self.assertRaisesRegex(SyntaxError, "bad #if expression"):
+            self.preprocess(text.format("0 || 1 / 0"))
+
+    def test_skipped_code_is_not_processed(self):
+        text = ('#if 0\n#include "missing.hz"\n#define N 1\n#if 1 / 0\nbroken(\n#endif\n#else\nN;\n#endif\n')
+        self.assertEqual(self.preprocess(text, N="2"), "2;")
+
+    def test_unbalanced(self):
+        with self.assertRaisesRegex(SyntaxError, "main.hz:1: #if without #endif"):
+            self.preprocess("#ifdef A\nint a;\n")
+        with self.assertRaisesRegex(SyntaxError, "main.hz:2: #endif without #if"):
+            self.preprocess("int a;\n#endif\n")
+        with self.assertRaisesRegex(SyntaxError, "bad #if expression"):
+            self.preprocess("#if 1 +\n#endif\n")
+        with self.assertRaisesRegex(SyntaxError, "main.hz:5: #else after #else"):
+            self.preprocess("#if 0\na;\n#else\nb;\n#else\nc;\n#endif\n")
+        with self.assertRaisesRegex(SyntaxError, "main.hz:4: #elif after #else"):
+            self.preprocess("#if 0\n#if 1\n#else\n#elif 1\n#endif\n#endif\n")
+
+
+class TestIncludeCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = IncludeCache()
+        self.clock = time.time_ns()
+        self.write("guarded.hz", "#ifndef GUARDED_H\n#define GUARDED_H\nint g;\n#endif\n")
+        self.write("once.hz", "#pragma once\nint o[SIZE];\n")
+        self.write("main.hz", '#include "guarded.hz"\n#include "once.hz"\n#include "guarded.hz"\nint m;\n')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, text):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "w") as f:
+            f.write(text)
+        self.clock += 10**9  # distinct mtimes even on coarse filesystems
+        os.utime(path, ns=(self.clock, self.clock))
+
+    def preprocess(self, name="main.hz", **macros):
+        macros.setdefault("SIZE", "4")
+        preprocessor = Preprocessor(include_paths=[self.tmp.name], macros=macros, include_cache=self.cache)
+        with patch("builtins.open", wraps=open) as opened:
+            text = preprocessor.preprocess(os.path.join(self.tmp.name, name))
+        return text, opened.call_count, preprocessor
+
+    def test_guard_and_pragma_lines_removed(self):
+        text, _, _ = self.preprocess()
+        self.assertEqual(text, "int g;\nint o[4];\n\nint m;")
+
+    def test_guard_already_defined_skips_file(self):
+        text, _, _ = self.preprocess("guarded.hz", GUARDED_H="")
+        self.assertEqual(text, "")
+
+    def test_repeat_compile_opens_nothing(self):
+        first, opens, _ = self.preprocess()
+        self.assertEqual(opens, 3)
+        again, opens, preprocessor = self.preprocess()
+        self.assertEqual((again, opens), (first, 0))
+        self.assertEqual(len(preprocessor.dependencies), 3)
+        self.assertIn("GUARDED_H", preprocessor.macros)
+
+    def test_macro_change_invalidates(self):
+        self.preprocess()
+        text, opens, _ = self.preprocess(SIZE="8")
+        self.assertEqual(text, "int g;\nint o[8];\n\nint m;")
+        # Only the files that use SIZE are re-read.
+        self.assertEqual(opens, 2)
+
+    def test_nested_edit_invalidates(self):
+        self.preprocess()
+        self.write("guarded.hz", "#ifndef GUARDED_H\n#define GUARDED_H\nint g2;\n#endif\n")
+        text, _, _ = self.preprocess()
+        self.assertEqual(text, "int g2;\nint o[4];\n\nint m;")
+
+    def test_already_included_elsewhere_not_reused(self):
+        self.write("wrapper.hz", '#include "once.hz"\n#include "main.hz"\n')
+        self.preprocess()
+        text, _, _ = self.preprocess("wrapper.hz")
+        self.assertEqual(text, "int o[4];\nint g;\n\n\nint m;")
+
+    def test_iter_lines_matches_preprocess(self):
+        text, _, _ = self.preprocess()
+        preprocessor = Preprocessor(include_paths=[self.tmp.name], macros={"SIZE": "4"}, include_cache=IncludeCache())
+        lines = preprocessor.iter_lines(os.path.join(self.tmp.name, "main.hz"))
+        self.assertEqual(next(lines), "int g;")
+        self.assertEqual("\n".join(["int g;", *lines]), text)
+        self.assertEqual(len(preprocessor.dependencies), 3)
+
+    def test_guard_needs_final_endif(self):
+        self.write("open.hz", "#ifndef OPEN_H\n#define OPEN_H\nint a;\n#endif\nint b;\n")
+        text, _, _ = self.preprocess("open.hz")
+        self.assertEqual(text, "int a;\nint b;")
+        self.assertIsNone(self.cache.files[os.path.join(self.tmp.name, "open.hz")].guard)
+
+    def test_cached_include_reused_by_another_unit(self):
+        self.preprocess("guarded.hz")
+        self.write("other.hz", '#include "guarded.hz"\nint x;\n')
+        first, _, _ = self.preprocess("other.hz")
+        again, opens, _ = self.preprocess("other.hz")
+        self.assertEqual((first, again, opens), ("int g;\nint x;", "int g;\nint x;", 0))
+
+    def test_include_paths_change_invalidates(self):
+        a, b = os.path.join(self.tmp.name, "a"), os.path.join(self.tmp.name, "b")
+        os.makedirs(a)
+        os.makedirs(b)
+        self.write("a/y.hz", "int fromA;\n")
+        self.write("b/y.hz", "int fromB;\n")
+        self.write("x.hz", '#include "y.hz"\n')
+        x = os.path.join(self.tmp.name, "x.hz")
+
+        def preprocess(*include_paths):
+            return Preprocessor(include_paths=list(include_paths), include_cache=self.cache).preprocess(x)
+
+        self.assertEqual(preprocess(a), "int fromA;")
+        self.assertEqual(preprocess(b), "int fromB;")
+        self.assertEqual(preprocess(b, a), "int fromB;")
+        self.assertEqual(preprocess(a, b), "int fromA;")
+        # A header added earlier on the search path is found from then on.
+        c = os.path.join(self.tmp.name, "c")
+        os.makedirs(c)
+        self.write("c/y.hz", "int fromC;\n")
+        self.assertEqual(preprocess(c, a, b), "int fromC;")
+        self.assertEqual(preprocess(a, b), "int fromA;")
+
+    def test_condition_change_invalidates(self):
+        self.write("cond.hz", "#ifdef FAST\nint f;\n#else\nint s;\n#endif\n")
+        self.write("other.hz", '#include "cond.hz"\n')
+        self.assertEqual(self.preprocess("other.hz")[0], "int s;")
+        self.assertEqual(self.preprocess("other.hz", FAST="")[0], "int f;")
+        self.assertEqual(self.preprocess("other.hz", FAST="")[:2], ("int f;", 0))
@@ -0,0 +1,162 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from hintzCompiler import symbol_index
+from hintzCompiler.symbol_index import IndexedSymbol, SymbolIndex, unit_symbols
+
+
+class TestUnitSymbols(unittest.TestCase):
+
+    def test_kinds(self):
+        rows = unit_symbols("struct P { int x; float y; };\n"
+                            "int m[8];\n"
+                            "float scale;\n"
+                            "int add(int a, float b) { int t; t = a; return t; }\n")
+        self.assertEqual(rows, [
+            ["matrix", "m", "matrix", {"element_type": "int", "dimensions": [8]}],
+            ["variable", "scale", "float", {}],
+            ["function", "add", "int", {"params": [["a", "int"], ["b", "float"]]}],
+            ["struct", "P", "struct", {"fields": {"x": "int", "y": "float"}}],
+        ])
+
+
+class TestSymbolIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.clock = time.time_ns()
+        self.src = os.path.join(self.tmp.name, "src")
+        self.inc = os.path.join(self.tmp.name, "inc")
+        os.makedirs(self.src)
+        os.makedirs(self.inc)
+        self.write(self.inc, "shapes.hz", "struct Point { int x; int y; };\n")
+        self.a = self.write(self.src, "a.hz", '#include "shapes.hz"\nint add(int a, int b) { return a + b; }\n')
+        self.b = self.write(self.src, "b.hz", "struct Size { int w; int x; };\nfloat grid[SIZE];\n"
+                                              "int addr() { return 0; }\n")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, directory, name, text):
+        path = os.path.join(directory, name)
+        with open(path, "w") as f:
+            f.write(text)
+        self.clock += 10**9
+        os.utime(path, ns=(self.clock, self.clock))
+        return path
+
+    def index(self, **kwargs):
+        kwargs.setdefault("macros", {"SIZE": "16"})
+        kwargs.setdefault("include_paths", [self.inc])
+        return SymbolIndex(os.path.join(self.tmp.name, "index"), **kwargs)
+
+    def test_queries(self):
+        index = self.index()
+        self.assertEqual(index.update([self.a, self.b]), [self.a, self.b])
+        self.assertEqual(index.lookup("add"),
+                         [IndexedSymbol("add", "function", "int", self.a, {"params": [["a", "int"], ["b", "int"]]})])
+        self.assertEqual(index.lookup("grid"),
+                         [IndexedSymbol("grid", "matrix", "matrix", self.b,
+                                        {"element_type": "float", "dimensions": [16]})])
+        self.assertEqual(index.lookup("missing"), [])
+        self.assertEqual(index.names_with_prefix("add"), ["add", "addr"])
+        self.assertEqual(index.names_with_prefix("ad", limit=1), ["add"])
+        self.assertEqual(index.names_with_prefix("z"), [])
+        self.assertEqual(index.names_with_prefix(""), ["Point", "Size", "add", "addr", "grid"])
+        self.assertEqual(sorted(s.name for s in index.structs_with_field("x")), ["Point", "Size"])
+        self.assertEqual([s.name for s in index.structs_with_field("w")], ["Size"])
+
+    def test_reopen_without_parsing(self):
+        self.index().update([self.a, self.b])
+        with mock.patch.object(symbol_index, "unit_symbols") as parse:
+            index = self.index()
+            self.assertEqual(index.update([self.a, self.b]), [])
+            self.assertEqual(index.lookup("add")[0].attributes["params"], [["a", "int"], ["b", "int"]])
+            self.assertEqual([s.name for s in index.structs_with_field("y")], ["Point"])
+        parse.assert_not_called()
+
+    def test_incremental_update(self):
+        index = self.index()
+        index.update([self.a, self.b])
+        self.write(self.src, "b.hz", "struct Size { int w; int h; };\nint sub(int a) { return a; }\n")
+        self.assertEqual(index.update([self.a, self.b]), [self.b])
+        self.assertEqual(index.lookup("addr"), [])
+        self.assertEqual(index.lookup("grid"), [])
+        self.assertEqual(index.names_with_prefix("ad"), ["add"])
+        self.assertEqual([s.name for s in index.structs_with_field("x")], ["Point"])
+        self.assertEqual([s.name for s in index.structs_with_field("h")], ["Size"])
+        self.assertEqual(index.lookup("sub")[0].source, self.b)
+
+        reopened = self.index()
+        self.assertEqual(reopened.names_with_prefix(""), index.names_with_prefix(""))
+        self.assertEqual(reopened.lookup("sub"), index.lookup("sub"))
+
+    def test_header_change_reindexes_includers(self):
+        index = self.index()
+        index.update([self.a, self.b])
+        self.write(self.inc, "shapes.hz", "struct Point { int x; int z; };\n")
+        self.assertEqual(index.update([self.a, self.b]), [self.a])
+        self.assertEqual([s.name for s in index.structs_with_field("z")], ["Point"])
+        self.assertEqual(index.structs_with_field("y"), [])
+
+    def test_shadowing_header_reindexes_includers(self):
+        first = os.path.join(self.tmp.name, "first")
+        os.makedirs(first)
+        index = self.index(include_paths=[first, self.inc])
+        index.update([self.a, self.b])
+        self.write(first, "shapes.hz", "struct Point { int x; int fromfirst; };\n")
+        self.assertEqual(index.update([self.a, self.b]), [self.a])
+        self.assertEqual([s.name for s in index.structs_with_field("fromfirst")], ["Point"])
+
+    def test_touched_but_identical_is_not_parsed(self):
+        index = self.index()
+        index.update([self.a, self.b])
+        with open(self.b) as f:
+            self.write(self.src, "b.hz", f.read())
+        self.assertEqual(index.update([self.a, self.b]), [])
+
+    def test_macros_invalidate(self):
+        self.index().update([self.b])
+        index = self.index(macros={"SIZE": "32"})
+        self.assertEqual(index.lookup("grid"), [])
+        index.update([self.b])
+        self.assertEqual(index.lookup("grid")[0].attributes["dimensions"], [32])
+
+    def test_bad_units_are_skipped(self):
+        index = self.index()
+        index.update([self.a, self.b])
+        self.write(self.src, "b.hz", "int broken( { return 0; }\n")
+        dup = self.write(self.src, "dup.hz", "int f() { int t; return t; }\nint g() { int t; return t; }\n")
+        c = self.write(self.src, "c.hz", "int sub(int a) { return a; }\n")
+        missing = os.path.join(self.src, "missing.hz")
+        self.assertEqual(index.update([self.a, self.b, dup, missing, c]), [c])
+        self.assertEqual(sorted(index.errors), sorted([self.b, dup, missing]))
+        self.assertTrue(index.errors[dup].startswith("RuntimeError"))
+        self.assertEqual(index.names_with_prefix(""), ["Point", "add", "sub"])
+        self.assertEqual([s.name for s in index.structs_with_field("x")], ["Point"])
+        self.assertEqual(self.index().names_with_prefix(""), ["Point", "add", "sub"])
+
+        self.write(self.src, "b.hz", "int addr() { return 0; }\n")
+        self.assertEqual(index.update([self.a, self.b, c]), [self.b])
+        self.assertEqual(index.errors, {})
+        self.assertEqual(index.names_with_prefix("ad"), ["add", "addr"])
+
+    def test_remove_and_clear(self):
+        index = self.index()
+        index.update([self.a, self.b])
+        index.remove(self.b)
+        self.assertEqual(index.names_with_prefix(""), ["Point", "add"])
+        self.assertEqual([s.name for s in index.structs_with_field("x")], ["Point"])
+        with open(index.index_path) as f:
+            self.assertEqual(list(json.load(f)["units"]), [self.a])
+        index.clear()
+        self.assertEqual(index.lookup("add"), [])
+        self.assertEqual(self.index().names_with_prefix(""), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
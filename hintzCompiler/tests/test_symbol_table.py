@@ -0,0 +1,133 @@
+import contextlib
+import io
+import random
+import unittest
+
+from hintzCompiler.src.symbol_table import ScopedSymbolTableManager, Symbol, SymbolTable
+
+
+class TestScopedSymbolTableManager(unittest.TestCase):
+
+    def setUp(self):
+        self.manager = ScopedSymbolTableManager()
+        self.manager.global_scope.define(Symbol("x", "int"))
+        self.manager.global_scope.define(Symbol("f", "int"))
+
+    def test_shadowing_and_pop(self):
+        manager = self.manager
+        manager.push_scope()
+        manager.current_scope.define(Symbol("x", "float"))
+        manager.push_scope()
+        self.assertEqual(manager.lookup("x").type, "float")
+        self.assertEqual(manager.current_scope.lookup("f").type, "int")
+        manager.current_scope.define(Symbol("x", "char"))
+        self.assertEqual(manager.current_scope.lookup("x").type, "char")
+        manager.pop_scope()
+        self.assertEqual(manager.current_scope.lookup("x").type, "float")
+        manager.pop_scope()
+        self.assertEqual(manager.lookup("x").type, "int")
+        self.assertIsNone(manager.lookup("y"))
+        with self.assertRaises(RuntimeError):
+            manager.pop_scope()
+
+    def test_deep_nesting(self):
+        manager = self.manager
+        for depth in range(5000):
+            manager.push_scope()
+            manager.define(Symbol(f"v{depth}", "int"))
+        self.assertEqual(manager.current_scope.lookup("x").type, "int")
+        self.assertEqual(manager.lookup("v0").name, "v0")
+        for _ in range(5000):
+            manager.pop_scope()
+        self.assertIsNone(manager.lookup("v0"))
+        self.assertEqual(sorted(manager._bindings), ["f", "x"])
+
+    def test_outer_scope_changes_while_nested(self):
+        manager = self.manager
+        outer = manager.current_scope
+        manager.push_scope()
+        manager.define(Symbol("g", "float"))
+        outer.define(Symbol("g", "int"))
+        outer.define(Symbol("h", "int"))
+        self.assertEqual(manager.lookup("g").type, "float")
+        self.assertEqual(manager.lookup("h").type, "int")
+        self.assertEqual(outer.lookup("g").type, "int")
+        outer.remove("g")
+        self.assertEqual(manager.lookup("g").type, "float")
+        manager.pop_scope()
+        self.assertIsNone(manager.lookup("g"))
+        self.assertEqual(manager.lookup("h").type, "int")
+
+    def test_matches_walking_the_scopes(self):
+        def open_scopes():
+            scopes, scope = [], manager.current_scope
+            while scope is not None:
+                scopes.append(scope)
+                scope = scope.parent
+            return scopes
+
+        rng = random.Random(7)
+        manager = ScopedSymbolTableManager()
+        names = "abcdef"
+        for step in range(3000):
+            action, scope = rng.random(), rng.choice(open_scopes())
+            if action < 0.2:
+                manager.push_scope()
+            elif action < 0.35:
+                if manager.current_scope.parent is not None:
+                    manager.pop_scope()
+            elif action < 0.8:
+                name = rng.choice(names)
+                if name not in scope.symbols:
+                    scope.define(Symbol(name, str(step)))
+            elif scope.symbols:
+                scope.remove(rng.choice(list(scope.symbols)))
+            scopes = open_scopes()
+            for name in names:
+                expected = next((s.symbols[name] for s in scopes if name in s.symbols), None)
+                self.assertIs(manager.lookup(name), expected)
+                self.assertIs(manager.current_scope.lookup(name), expected)
+
+    def test_remove(self):
+        self.manager.global_scope.remove("f")
+        self.assertIsNone(self.manager.lookup("f"))
+        with self.assertRaises(KeyError):
+            self.manager.global_scope.remove("f")
+        self.manager.global_scope.define(Symbol("f", "void"))
+        self.assertEqual(self.manager.lookup("f").type, "void")
+
+    def test_redefinition(self):
+        with self.assertRaises(RuntimeError):
+            self.manager.global_scope.define(Symbol("x", "float"))
+        self.assertEqual(self.manager.lookup("x").type, "int")
+
+    def test_detached_scopes_walk_their_parents(self):
+        manager = self.manager
+        manager.push_scope()
+        inner = manager.current_scope
+        inner.define(Symbol("y", "int"))
+        manager.pop_scope()
+        self.assertEqual(inner.lookup("y").type, "int")
+        self.assertEqual(inner.lookup("x").type, "int")
+        table = SymbolTable(parent=manager.global_scope)
+        self.assertEqual(table.lookup("f").type, "int")
+        self.assertIsNone(table.lookup("y"))
+
+    def test_dump(self):
+        manager = self.manager
+        manager.push_scope()
+        manager.define(Symbol("y", "int"))
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            manager.current_scope.dump()
+        self.assertEqual(out.getvalue(),
+                         "Symbol Table:\n"
+                         "  y: <Symbol y: type=int, attrs={}>\n"
+                         "  ↑ Parent scope:\n"
+                         "  Symbol Table:\n"
+                         "    x: <Symbol x: type=int, attrs={}>\n"
+                         "    f: <Symbol f: type=int, attrs={}>\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,162 @@
+import unittest
+
+from hintzCompiler.compiler import iter_compile
+from hintzCompiler.src.ir_nodes import Assignment, Block, Function, Identifier, If, Literal, Program, Return, Variable
+from hintzCompiler.src.symbol_table import ScopedSymbolTableManager
+from hintzCompiler.src.type_checker import FieldLayout, MatrixLayout, TypeChecker
+
+STRUCTS = """
+struct Q { char c; double d; };
+struct P { int x; struct Q q; char tag; };
+"""
+
+
+def check(code, *more):
+    # `more` is parsed separately: the transformer keeps locals in the
+    # global scope, so it rejects redefinitions itself.
+    manager = ScopedSymbolTableManager()
+    program = Program(list(iter_compile(code, symtab_manager=manager)))
+    for chunk in more:
+        program.declarations.extend(iter_compile(chunk))
+    checker = TypeChecker(manager.global_scope)
+    checker.check(program)
+    return program, checker
+
+
+class TestLayouts(unittest.TestCase):
+
+    def test_struct_layout(self):
+        _, checker = check(STRUCTS)
+        q, p = checker.struct_layouts["struct Q"], checker.struct_layouts["struct P"]
+        self.assertEqual((q.size, q.align), (16, 8))
+        self.assertEqual(list(p.fields.values()), [FieldLayout("x", "int", 0, 4),
+                                                   FieldLayout("q", "struct Q", 8, 16),
+                                                   FieldLayout("tag", "char", 24, 1)])
+        self.assertEqual((p.size, p.align), (32, 8))
+        self.assertEqual(checker.size_of("struct P"), 32)
+        self.assertEqual(checker.errors, [])
+
+    def test_struct_defined_after_its_use_in_a_field(self):
+        _, checker = check("struct A { struct B b; int n; };\nstruct B { char c; };\n")
+        self.assertEqual(checker.struct_layouts["struct A"].fields["n"].offset, 4)
+        self.assertEqual(checker.errors, [])
+
+    def test_structs_containing_each_other(self):
+        _, checker = check("struct A { struct B b; };\nstruct B { struct A a; int n; };\n")
+        self.assertEqual(len(checker.errors), 1)
+        self.assertIn("which contains", checker.errors[0])
+        _, checker = check("struct A { struct Missing m; };\n")
+        self.assertEqual(checker.errors, ["field 'm' of struct A has unknown type 'struct Missing'"])
+
+    def test_matrix_layout(self):
+        program, checker = check(STRUCTS + "struct P grid[10];\ndouble v[3];\n")
+        self.assertEqual(checker.matrix_layouts["struct P[10]"], MatrixLayout("struct P", [10], 32, [32], 320))
+        self.assertEqual(checker.matrix_layouts["double[3]"].strides, [8])
+
+    def test_matrix_type(self):
+        program, checker = check("struct M { int n; matrix m; };\n"
+                                 "matrix q;\nmatrix r[3];\nstruct M s;\n"
+                                 "int f(int i) { q[i] = q[0] + 1; r[1] = q; r[2][i] = 2.5; s.m = r[0];\n"
+                                 "  q = 1; return i; }\n")
+        self.assertEqual(checker.matrix_layouts["matrix"], MatrixLayout("double", [], 8, [], 8))
+        self.assertEqual(checker.matrix_layouts["matrix[3]"], MatrixLayout("matrix", [3], 8, [8], 24))
+        self.assertEqual(checker.struct_layouts["struct M"].fields["m"], FieldLayout("m", "matrix", 8, 8))
+        self.assertEqual(checker.size_of("struct M"), 16)
+        first, second, third, _, _ = program.declarations[-1].body.statements[:5]
+        self.assertEqual(checker.type_of(first.target), "double")
+        self.assertEqual(checker.type_of(second), "matrix")
+        self.assertEqual(checker.type_of(third.target.base), "matrix")
+        self.assertEqual(checker.errors, ["cannot assign 'int' to 'matrix'"])
+
+    def test_matrix_strides_are_row_major(self):
+        checker = TypeChecker()
+        name = checker._matrix_layout("float", [4, 5, 6])
+        self.assertEqual(name, "float[4][5][6]")
+        self.assertEqual(checker.matrix_layouts[name].strides, [120, 24, 4])
+        self.assertEqual(checker.size_of(name), 480)
+
+
+class TestTypeChecker(unittest.TestCase):
+
+    def test_expression_types_are_cached_per_node(self):
+        program, checker = check(STRUCTS + "struct P p;\nfloat m[4];\n"
+                                           "int f(int a) { p.q.d = m[a] + 1; return !a; }\n")
+        self.assertEqual(checker.errors, [])
+        assignment, ret = program.declarations[2].body.statements
+        self.assertEqual(checker.type_of(assignment), "double")
+        self.assertEqual(checker.type_of(assignment.target.base), "struct Q")
+        self.assertEqual(checker.type_of(assignment.value), "float")
+        self.assertEqual(checker.type_of(assignment.value.left.base), "float[4]")
+        self.assertEqual(checker.type_of(assignment.value.right), "int")
+        self.assertEqual(checker.type_of(ret.value), "int")
+
+    def test_errors(self):
+        _, checker = check(STRUCTS + """
+            struct P p;
+            float m[4];
+            int g(int a, float b) { return a; }
+            void h() { return 1; }
+            int f(int a) {
+                p.y = 1;
+                a.x = 1;
+                m = 1;
+                m[1.5] = 2;
+                a = "s";
+                a = g(1);
+                a = g(p, 1);
+                a = k(1);
+                a = b + 1;
+                a = a % 2.5;
+                if (p) { a = 1; }
+                switch (m[0]) { case 1: break; }
+                return p;
+            }
+        """)
+        self.assertEqual(checker.errors, [
+            "return with a value in a void function",
+            "struct P has no field 'y'",
+            "field 'x' of non-struct type 'int'",
+            "cannot assign to an expression of type 'float[4]'",
+            "matrix index of type 'double'",
+            "cannot assign 'string' to 'int'",
+            "'g' takes 2 arguments, 1 given",
+            "argument 1 of 'g': 'struct P' for 'int'",
+            "call to undeclared function 'k'",
+            "'b' undeclared",
+            "'%' on 'int' and 'double'",
+            "if condition has type 'struct P'",
+            "switch on type 'float'",
+            "returning 'struct P' from a function returning 'int'",
+        ])
+
+    def test_scopes(self):
+        _, checker = check("""
+            float x;
+            int f(int a) {
+                int y;
+                if (a) { struct Q q; y = 1; }
+                y = later(a);
+                return x;
+            }
+            int later(int n) { return y; }
+        """, "int f(int b) { return b; }\n")
+        self.assertEqual(checker.errors, ["'f' redeclared", "'q' has unknown type 'struct Q'", "'y' undeclared"])
+
+    def test_shadowing(self):
+        # int f(int a) { int x; if (a) { double x; x = 1; } return x; }, built
+        # by hand as the transformer won't take the inner x.
+        inner = Assignment(Identifier("x"), Literal(1.0))
+        ret = Return(Identifier("x"))
+        function = Function("int", "f", [Variable("a", "int")], Block([
+            [Variable("x", "int")],
+            If(Identifier("a"), Block([[Variable("x", "double")], inner])),
+            ret,
+        ]))
+        checker = TypeChecker()
+        self.assertEqual(checker.check(Program([Variable("x", "float"), function])), [])
+        self.assertEqual(checker.type_of(inner), "double")
+        self.assertEqual(checker.type_of(ret.value), "int")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+import unittest
+
+from hintzCompiler.compiler import compile_source
+from hintzCompiler.src.ir_nodes import BinaryOp, Block, Function, Identifier, IRNode, Literal, Return, UnaryOp
+from hintzCompiler.src.visitor import SKIP_CHILDREN, IRRewriter, IRVisitor, field_values
+
+CODE = """
+int f(int a) {
+    a = a + 1;
+    if (a > 2) { return a * 2; }
+    return a;
+}
+"""
+
+
+class Recorder(IRVisitor):
+
+    def __init__(self):
+        self.events = []
+
+    def visit_IRNode(self, node):
+        self.events.append(type(node).__name__)
+
+    def visit_Identifier(self, node):
+        self.events.append(node.name)
+
+    def leave_Function(self, node):
+        self.events.append("/" + node.name)
+
+
+class Special(Identifier):
+    pass
+
+
+class TestIRVisitor(unittest.TestCase):
+
+    def test_preorder_with_leave(self):
+        ir = Block([Return(BinaryOp("+", Identifier("a"), Literal(1.0))),
+                    Function("int", "g", [], Block([]))])
+        recorder = Recorder()
+        recorder.visit(ir)
+        self.assertEqual(recorder.events, ["Block", "Return", "BinaryOp", "a", "Literal",
+                                           "Function", "Block", "/g"])
+
+    def test_handlers_follow_the_mro(self):
+        recorder = Recorder()
+        recorder.visit([Special("s"), Literal(2.0)])
+        self.assertEqual(recorder.events, ["s", "Literal"])
+        self.assertEqual(Recorder._enter[Special], Recorder.visit_Identifier)
+        self.assertEqual(Recorder._enter[Literal], Recorder.visit_IRNode)
+        self.assertIsNone(Recorder._leave[Literal])
+
+    def test_skip_children(self):
+        class Outer(Recorder):
+            def visit_If(self, node):
+                self.events.append("If")
+                return SKIP_CHILDREN
+
+        recorder = Outer()
+        recorder.visit(compile_source(CODE))
+        self.assertIn("If", recorder.events)
+        self.assertEqual(recorder.events.count("a"), 3)  # none from inside the if
+
+    def test_deep_tree(self):
+        node = Identifier("x")
+        for _ in range(100000):
+            node = UnaryOp("-", node)
+        recorder = Recorder()
+        recorder.visit(node)
+        self.assertEqual(len(recorder.events), 100001)
+        self.assertEqual(recorder.events[-1], "x")
+
+    def test_field_values(self):
+        node = BinaryOp("+", Identifier("a"), Literal(1.0))
+        self.assertEqual(field_values(node), ("+", node.left, node.right))
+        self.assertEqual(field_values(Identifier("a")), ("a",))
+        self.assertEqual(BinaryOp._fields, ("op", "left", "right"))
+        self.assertEqual(IRNode._fields, ())
+
+
+class Rename(IRRewriter):
+
+    def rewrite_Identifier(self, node):
+        return Identifier("b") if node.name == "a" else node
+
+
+class Fold(IRRewriter):
+
+    def rewrite_BinaryOp(self, node):
+        if type(node.left) is Literal and type(node.right) is Literal and node.op == "+":
+            return Literal(node.left.value + node.right.value)
+        return node
+
+
+class TestIRRewriter(unittest.TestCase):
+
+    def test_rename(self):
+        ir = compile_source(CODE)
+        renamed = Rename().rewrite(ir)
+        before, after = Recorder(), Recorder()
+        before.visit(ir)
+        after.visit(renamed)
+        self.assertEqual(after.events, ["b" if e == "a" else e for e in before.events])
+        self.assertEqual(before.events.count("a"), 5)  # the input is left alone
+
+    def test_unchanged_subtrees_are_shared(self):
+        ir = compile_source(CODE + "int g() { return 1; }\n")
+        renamed = Rename().rewrite(ir)
+        self.assertIsNot(renamed.declarations[0], ir.declarations[0])
+        self.assertIs(renamed.declarations[1], ir.declarations[1])
+        self.assertIs(Rename().rewrite(ir.declarations[1]), ir.declarations[1])
+
+    def test_bottom_up(self):
+        ir = Return(BinaryOp("+", BinaryOp("+", Literal(1.0), Literal(2.0)), Literal(3.0)))
+        self.assertEqual(Fold().rewrite(ir), Return(Literal(6.0)))
+
+    def test_deep_tree(self):
+        node = Identifier("a")
+        for _ in range(100000):
+            node = UnaryOp("-", node)
+        node = Rename().rewrite(node)
+        for _ in range(100000):
+            node = node.operand
+        self.assertEqual(node, Identifier("b"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -9,7 +9,8 @@ setup(
     ],
     entry_points={
         "console_scripts": [
-            "hintz=hintzCompiler.compiler:main"
+            "hintz=hintzCompiler.compiler:main",
+            "hintz-client=hintzCompiler.client:main",
         ]
     },
     python_requires=">=3.7",